@@ -8,13 +8,15 @@ from click import Path as ClickPath
 from click import argument, option, pass_context, secho
 import click
 from fuzzywuzzy import fuzz
+from lxml.etree import QName
 from tabulate import tabulate
 from ocx_tools.schema_xml.element import LxmlElement
 from .cli_context import GlobalContext, UrlParamType
 
 import ocx_tools.utils as utils
 from ocx_tools.cli import INFO_COLOR, ERROR_COLOR
-from ocx_tools.schema import DEFAULT_SCHEMA, SUB_COMMAND
+from ocx_tools.schema import DEFAULT_SCHEMA, SUB_COMMAND, WATCH_INTERVAL
+from ocx_tools.schema.watch import SchemaWatcher
 
 URL = UrlParamType()
 
@@ -95,6 +97,29 @@ def assign_folder(ctx, schema_folder):
     )
 
 
+@schema.command(short_help="Assign an XML catalog resolving the schema imports")
+@pass_context
+@option(
+    "-f",
+    "--file",
+    required=True,
+    help="The OASIS XML catalog file mapping remote schema locations to local copies.",
+    type=ClickPath(exists=True),
+)
+@option(
+    "--strict",
+    is_flag=True,
+    help="Fail when a remote schema is not in the catalog instead of downloading it.",
+)
+def assign_catalog(ctx, file, strict):
+    """Assign an OASIS XML catalog used to resolve the schema locations to local copies when parsing."""
+    schema_reader = ctx.obj.get_tool("OcxSchema")
+    if schema_reader.load_catalog(file, strict):
+        secho(f"Assigned the XML catalog: {file}", fg=INFO_COLOR)
+    else:
+        secho(f"Failed to load the XML catalog: {file}", fg=ERROR_COLOR)
+
+
 @schema.command(short_help="Print the schema change history")
 @pass_context
 @option(
@@ -223,18 +248,31 @@ def element_types(ctx):
 
 
 @schema.command(short_help="List schema namespaces")
+@option(
+    "-d",
+    "--documents",
+    is_flag=True,
+    help="List the prefixes declared by each schema document",
+)
 @pass_context
-def namespace(ctx):
+def namespace(ctx, documents):
     """Output all schema namespaces with its associated prefix."""
     glob_ctx = ctx.obj
     fmt = glob_ctx.get_table_format()
     schema_reader = glob_ctx.get_tool("OcxSchema")
     if schema_reader.is_parsed():
-        result = schema_reader.get_namespaces()
+        registry = schema_reader.get_namespace_registry()
         table = defaultdict(list)
-        for key, values in result.items():
-            table["Prefix"].append(key)
-            table["Namespace"].append(values)
+        if documents:
+            for location, scope in registry.get_scopes().items():
+                for key, values in scope.items():
+                    table["Document"].append(location)
+                    table["Prefix"].append(key)
+                    table["Namespace"].append(values)
+        else:
+            for key, values in registry.get_namespaces().items():
+                table["Prefix"].append(key)
+                table["Namespace"].append(values)
         secho(tabulate(table, headers=list(table.keys()), tablefmt=fmt), fg=INFO_COLOR)
     else:
         secho("No schema has been parsed. Parse a schema first", fg=INFO_COLOR)
@@ -268,6 +306,9 @@ def inspect(ctx, element):
                 tabulate(result, headers=list(result.keys()), tablefmt=fmt),
                 fg=INFO_COLOR,
             )
+            model = e.get_content_model()
+            if model is not None:
+                secho(f"Content model: {model.to_notation()}", fg=INFO_COLOR)
             secho("\nAttributes:", fg=INFO_COLOR)
             result = e.attributes_to_dict()
             secho(
@@ -279,6 +320,10 @@ def inspect(ctx, element):
             for key in items:
                 parents.append(LxmlElement.strip_namespace_tag(key))
             secho(f"Parents: {parents}", fg=INFO_COLOR)
+            members = schema_reader.get_substitution_groups().get_members(e.get_tag())
+            if len(members) > 0:
+                names = [LxmlElement.strip_namespace_tag(tag) for tag in members]
+                secho(f"Substitution group members: {names}", fg=INFO_COLOR)
             secho(f"\nHas assertions: {e.has_assertion()}", fg=INFO_COLOR)
             for test in e.get_assertion_tests():
                 secho(f"Test: {test}", fg=INFO_COLOR)
@@ -329,3 +374,147 @@ def elements(ctx):
         secho(tabulate(table, headers=list(table.keys()), tablefmt=fmt), fg=INFO_COLOR)
     else:
         secho("No schema has been parsed. Parse a schema first", fg=INFO_COLOR)
+
+
+@schema.command(short_help="Print the schema cache statistics")
+@pass_context
+def cache(ctx):
+    """Output the number of hits and misses of the persistent schema cache."""
+    glob_ctx = ctx.obj
+    schema_reader = glob_ctx.get_tool("OcxSchema")
+    statistics = schema_reader.get_cache_statistics().to_dict()
+    table = [["Item", "Value"]]
+    for item in statistics:
+        table.append([item, statistics[item]])
+    print_table(table, glob_ctx, False)
+
+
+@schema.command(short_help="Print the imported schemas")
+@pass_context
+def imports(ctx):
+    """Output the schemas imported by the last parsed schema and the time spent fetching and parsing each of them."""
+    glob_ctx = ctx.obj
+    schema_reader = glob_ctx.get_tool("OcxSchema")
+    if schema_reader.is_parsed():
+        graph = schema_reader.get_import_graph()
+        table = []
+        for node in graph.get_nodes().values():
+            row = node.to_dict()
+            if len(table) == 0:
+                table.append(list(row.keys()))
+            table.append(list(row.values()))
+        print_table(table, glob_ctx, False)
+        for cycle in graph.find_cycles():
+            secho(f'Cyclic import: {" -> ".join(cycle)}', fg=INFO_COLOR)
+    else:
+        secho("No schema has been parsed. Parse a schema first", fg=INFO_COLOR)
+
+
+@schema.command(name="where-used", short_help="Find where a type, element or attribute is used")
+@argument("name", type=str, nargs=1)
+@option(
+    "-d",
+    "--derived",
+    is_flag=True,
+    help="Include the elements of all types derived from the type",
+)
+@pass_context
+def where_used(ctx, name, derived):
+    """Output the global elements and types using ``NAME``.
+
+    Arguments:
+        ``NAME``:  The name of a schema type, element or attribute on the form ``prefix:Name``.
+        The output lists the elements of the type, the elements and types referencing the element in their
+        content model and the elements carrying the attribute.
+    """
+    glob_ctx = ctx.obj
+    fmt = glob_ctx.get_table_format()
+    schema_reader = glob_ctx.get_tool("OcxSchema")
+    if schema_reader.is_parsed():
+        registry = schema_reader.get_namespace_registry()
+        table = defaultdict(list)
+        for usage, tags in schema_reader.where_used(name, derived).items():
+            for tag in tags:
+                namespace = QName(tag).namespace
+                table["Usage"].append(usage)
+                table["Prefix"].append(registry.get_prefix(namespace))
+                table["Name"].append(LxmlElement.strip_namespace_tag(tag))
+                table["Namespace"].append(namespace)
+        if len(table) == 0:
+            secho(f"{name} is not used in the schema", fg=INFO_COLOR)
+        else:
+            secho(
+                tabulate(table, headers=list(table.keys()), tablefmt=fmt),
+                fg=INFO_COLOR,
+            )
+    else:
+        secho("No schema has been parsed. Parse a schema first", fg=INFO_COLOR)
+
+
+@schema.command(short_help="Watch the schema files and reparse on changes")
+@pass_context
+@option(
+    "-i",
+    "--interval",
+    type=float,
+    default=WATCH_INTERVAL,
+    help="The polling interval in seconds",
+)
+@option("--stop", is_flag=True, help="Stop watching the schema files")
+def watch(ctx, interval, stop):
+    """Watch the parsed schema and its imported schemas in the background. The schema is reparsed incrementally
+    when any of the schema files is saved, and the added, removed and changed global elements are printed.
+
+    """
+    glob_ctx = ctx.obj
+    schema_reader = glob_ctx.get_tool("OcxSchema")
+    watcher = glob_ctx.get_tool("SchemaWatcher")
+    if stop:
+        if watcher is not None and watcher.is_watching():
+            watcher.stop()
+            secho("Stopped watching the schema files", fg=INFO_COLOR)
+        else:
+            secho("The schema files are not watched", fg=INFO_COLOR)
+        return
+    if not schema_reader.is_parsed():
+        secho("No schema has been parsed. Parse a schema first", fg=INFO_COLOR)
+        return
+    if watcher is not None and watcher.is_watching():
+        secho("The schema files are already watched", fg=INFO_COLOR)
+        return
+
+    def report(delta):
+        secho(
+            f"Reparsed {len(delta.files)} changed schema file(s)",
+            fg=INFO_COLOR,
+        )
+        for marker, tags in (
+            ("+", delta.added),
+            ("-", delta.removed),
+            ("~", delta.changed),
+        ):
+            for tag in tags:
+                secho(f"  {marker} {LxmlElement.strip_namespace_tag(tag)}", fg=INFO_COLOR)
+
+    watcher = SchemaWatcher(glob_ctx.get_logger(), schema_reader, report, interval)
+    glob_ctx.register_tool(watcher)
+    watcher.start()
+    secho(
+        f"Watching {len(schema_reader.get_parsed_files())} schema files. Stop with 'watch --stop'",
+        fg=INFO_COLOR,
+    )
+
+
+@schema.command(short_help="Print the schema processing times")
+@pass_context
+def timings(ctx):
+    """Output the time spent in each stage of processing the last parsed schema."""
+    glob_ctx = ctx.obj
+    schema_reader = glob_ctx.get_tool("OcxSchema")
+    if schema_reader.is_parsed():
+        table = [["Stage", "Seconds"]]
+        for stage, seconds in schema_reader.get_timings().items():
+            table.append([stage, f"{seconds:.4f}"])
+        print_table(table, glob_ctx, False)
+    else:
+        secho("No schema has been parsed. Parse a schema first", fg=INFO_COLOR)
@@ -14,3 +14,19 @@ SCHEMA_FOLDER = app_config.get("SCHEMA_FOLDER")
 W3C_SCHEMA_BUILT_IN_TYPES = app_config.get("W3C_SCHEMA_BUILT_IN_TYPES")
 PROCESS_SCHEMA_TYPES = app_config.get("PROCESS_SCHEMA_TYPES")
 SUB_COMMAND = app_config.get("SUB_COMMAND")
+USE_SCHEMA_CACHE = app_config.get("USE_SCHEMA_CACHE")
+CACHE_FOLDER = app_config.get("CACHE_FOLDER")
+DOWNLOAD_INDEX = app_config.get("DOWNLOAD_INDEX")
+SCHEMA_FOLDER_SIZE_LIMIT = app_config.get("SCHEMA_FOLDER_SIZE_LIMIT")
+DOWNLOAD_TIMEOUT = app_config.get("DOWNLOAD_TIMEOUT")
+IMPORT_WORKERS = app_config.get("IMPORT_WORKERS")
+DOWNLOAD_RETRIES = app_config.get("DOWNLOAD_RETRIES")
+DOWNLOAD_BACKOFF = app_config.get("DOWNLOAD_BACKOFF")
+DOWNLOAD_CHUNK_SIZE = app_config.get("DOWNLOAD_CHUNK_SIZE")
+WATCH_INTERVAL = app_config.get("WATCH_INTERVAL")
+SCHEMA_CATALOG = app_config.get("SCHEMA_CATALOG")
+CATALOG_STRICT = app_config.get("CATALOG_STRICT")
+LAZY_IMPORTS = app_config.get("LAZY_IMPORTS")
+DETACHED_MODEL = app_config.get("DETACHED_MODEL")
+LAZY_ELEMENTS = app_config.get("LAZY_ELEMENTS")
+MATERIALIZED_ELEMENTS = app_config.get("MATERIALIZED_ELEMENTS")
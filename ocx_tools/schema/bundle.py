@@ -0,0 +1,162 @@
+#  Copyright (c) 2023.  OCX Consortium https://3docx.org. See the LICENSE
+
+import zipfile
+from logging import Logger
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Union
+
+from ocx_tools.schema import DEFAULT_SCHEMA
+from ocx_tools.schema_xml.parse import ARCHIVE_SEPARATOR, archive_root_member, split_archive_location
+from .cache import SchemaCache
+
+
+class SchemaBundle:
+    """A schema release packed in a single zip archive or a gzip compressed xsd file.
+
+    The schemas are parsed directly from the archive without extracting them. A document in a zip archive has
+    the location ``archive.zip!/member``. The ``schemaLocation`` of an import is resolved to the archive member
+    with the same path or, for remote locations, the same file name.
+
+    Args:
+        logger: The main python logger
+        file: The path to the ``.zip``, ``.xsd.gz`` or ``.xml.gz`` file
+
+    Attributes:
+        _file: The resolved path to the archive
+        _members: Hash table with the member name as key and the content fingerprint as value
+
+    """
+
+    def __init__(self, logger: Logger, file: str):
+        self.log = logger
+        self._file = str(Path(file).resolve())
+        self._members = {}
+
+    @staticmethod
+    def is_bundle(schema_url: str) -> bool:
+        """Whether the schema location is a local zip archive or gzip compressed xsd file.
+        A compressed tar archive is not a schema bundle.
+
+        Args:
+            schema_url: The schema location
+
+        Returns:
+            True if the location is a schema bundle, False otherwise
+
+        """
+        location = str(schema_url).lower()
+        if location.startswith(("http://", "https://")):
+            return False
+        return location.endswith((".zip", ".xsd.gz", ".xml.gz"))
+
+    def _is_zip(self) -> bool:
+        return self._file.lower().endswith(".zip")
+
+    def open(self) -> bool:
+        """Read the table of contents of the archive
+
+        Returns:
+            True if the archive could be read, False otherwise
+
+        """
+        try:
+            if self._is_zip():
+                with zipfile.ZipFile(self._file) as archive:
+                    self._members = {
+                        info.filename: f"{info.CRC:08x}-{info.file_size}"
+                        for info in archive.infolist()
+                        if not info.is_dir()
+                    }
+            else:
+                self._members = {
+                    Path(self._file).stem: SchemaCache.file_digest(self._file)
+                }
+        except (OSError, zipfile.BadZipFile) as e:
+            self.log.error(f'Failed to open the schema bundle "{self._file}": {e}')
+            return False
+        return True
+
+    def get_file(self) -> str:
+        """The path to the archive"""
+        return self._file
+
+    def get_members(self) -> List[str]:
+        """The member names of the archive"""
+        return list(self._members)
+
+    def location(self, member: str) -> str:
+        """The document location of an archive member
+
+        Args:
+            member: The member name
+
+        Returns:
+            The location ``archive.zip!/member``, or the archive file of a gzip compressed file
+
+        """
+        if not self._is_zip():
+            return self._file
+        return f"{self._file}{ARCHIVE_SEPARATOR}{member}"
+
+    def _member(self, location: str) -> Union[str, None]:
+        """The member name of a document location in this archive, None if the document is not in this archive"""
+        if not self._is_zip():
+            return self.get_members()[0] if str(location) == self._file else None
+        archive = split_archive_location(location)
+        if archive is None or str(Path(archive[0]).resolve()) != self._file:
+            return None
+        return archive[1] if archive[1] in self._members else None
+
+    def contains(self, location: str) -> bool:
+        """Whether a document location is a member of this archive"""
+        return self._member(location) is not None
+
+    def get_root(self) -> Union[str, None]:
+        """The location of the root schema of the bundle.
+        The root schema is the member with the file name of the default schema, else the first xsd member.
+
+        Returns:
+            The document location of the root schema, None if the bundle contains no schema
+
+        """
+        if not self._is_zip():
+            return self.location(self.get_members()[0])
+        member = archive_root_member(self.get_members(), PurePosixPath(DEFAULT_SCHEMA).name)
+        if member is None:
+            self.log.error(f'The schema bundle "{self._file}" contains no schema')
+            return None
+        return self.location(member)
+
+    def fingerprint(self, location: str) -> Union[str, None]:
+        """The content fingerprint of a member document
+
+        Args:
+            location: The document location
+
+        Returns:
+            The CRC and size of a zip archive member or the content hash of a gzip file, None if not a member
+
+        """
+        member = self._member(location)
+        return None if member is None else self._members[member]
+
+    def resolve(self, location: str) -> Union[str, None]:
+        """Resolve an import location to a member of the archive
+
+        Args:
+            location: The ``schemaLocation`` of an import, resolved against the importing document
+
+        Returns:
+            The document location of the matching member, None if the archive has no matching member
+
+        """
+        if location is None:
+            return None
+        if self.contains(location):
+            return str(location)
+        name = PurePosixPath(str(location).rpartition(ARCHIVE_SEPARATOR)[2]).name
+        matches: Dict[str, str] = {
+            PurePosixPath(member).name: member for member in reversed(self.get_members())
+        }
+        member = matches.get(name)
+        return None if member is None else self.location(member)
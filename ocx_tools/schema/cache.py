@@ -0,0 +1,283 @@
+#  Copyright (c) 2023.  OCX Consortium https://3docx.org. See the LICENSE
+
+import hashlib
+import io
+import json
+import os
+import pickle
+import tempfile
+import types
+from logging import Logger
+from pathlib import Path
+from typing import Dict, List, Union
+
+from lxml import etree
+
+import ocx_tools
+from ocx_tools.schema import PROCESS_SCHEMA_TYPES
+from .data_classes import CacheStatistics
+
+# Bump the format version whenever the pickled model layout changes
+CACHE_FORMAT = 10
+
+
+class _ModelPickler(pickle.Pickler):
+    """Pickler storing loggers and the bound methods of the schema reader as persistent references and dropping
+    all ``lxml`` elements, such that the pickled model is detached from the parsed schema trees.
+
+    Args:
+        file: The open binary file to write to
+
+    """
+
+    def __init__(self, file):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Logger):
+            return ("logger",)
+        if etree.iselement(obj):
+            return ("element",)
+        if isinstance(obj, types.MethodType):
+            return "method", obj.__name__
+        return None
+
+
+class _ModelUnpickler(pickle.Unpickler):
+    """Unpickler resolving the persistent references written by ``_ModelPickler``. The ``lxml`` elements
+    are unpickled as None.
+
+    Args:
+        file: The open binary file to read from
+        logger: The logger assigned to all unpickled objects holding a logger
+        owner: The schema reader the unpickled methods are bound to
+
+    """
+
+    def __init__(self, file, logger: Logger, owner: object):
+        super().__init__(file)
+        self._log = logger
+        self._owner = owner
+
+    def persistent_load(self, pid):
+        if pid[0] == "logger":
+            return self._log
+        if pid[0] == "element":
+            return None
+        if pid[0] == "method":
+            return getattr(self._owner, pid[1])
+        raise pickle.UnpicklingError(f"Unsupported persistent reference: {pid}")
+
+
+class SchemaCache:
+    """A persistent on-disk cache of the processed schema model.
+
+    The cache entry of a schema is keyed by the content hash of the schema file and all its transitively
+    imported schema files. A manifest per schema url records the imported files such that the key can be
+    computed without parsing. The model is stored detached from the parsed schema trees, so a cached
+    schema is loaded without parsing any schema file. All files are written to a temporary file and renamed
+    into place, so the cache can safely be shared by several processes using the same schema folder.
+
+    The entries are pickled, and unpickling can execute arbitrary code. Only load a cache folder that is trusted,
+    i.e. written by the application itself and not writable by other users.
+
+    Args:
+        logger: The main python logger
+        cache_folder: The folder where the cache entries are stored
+
+    Attributes:
+        _folder: The cache folder
+        _statistics: The cache hit and miss counters
+
+    """
+
+    def __init__(self, logger: Logger, cache_folder: str):
+        self.log = logger
+        self._folder = Path(cache_folder)
+        self._statistics = CacheStatistics()
+
+    @staticmethod
+    def file_digest(file: str) -> str:
+        """The SHA-256 content hash of a file
+
+        Args:
+            file: The file path
+
+        Returns:
+            The hex digest of the file content
+
+        """
+        sha = hashlib.sha256()
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def get_folder(self) -> str:
+        """The cache folder
+
+        Returns:
+            The path to the cache folder
+
+        """
+        return str(self._folder)
+
+    def get_statistics(self) -> CacheStatistics:
+        """The cache usage counters
+
+        Returns:
+            The ``CacheStatistics`` of this cache instance
+
+        """
+        return self._statistics
+
+    def cache_key(self, digests: List[str]) -> str:
+        """The cache key of a set of schema files
+
+        Args:
+            digests: The content hashes of the schema files in parse order
+
+        Returns:
+            The hex digest identifying the cache entry
+
+        """
+        sha = hashlib.sha256()
+        sha.update(
+            f"{CACHE_FORMAT}:{ocx_tools.__version__}:{','.join(PROCESS_SCHEMA_TYPES)}".encode()
+        )
+        for digest in digests:
+            sha.update(digest.encode())
+        return sha.hexdigest()
+
+    def _manifest_file(self, schema_url: str) -> Path:
+        name = hashlib.sha1(str(schema_url).encode()).hexdigest()
+        return self._folder / f"manifest-{name}.json"
+
+    def _entry_file(self, key: str) -> Path:
+        return self._folder / f"{key}.pickle"
+
+    def _write_atomic(self, file: Path, data: bytes):
+        """Write to a temporary file in the cache folder and rename it into place."""
+        self._folder.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self._folder, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, file)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def get_manifest(self, schema_url: str) -> Union[List[str], None]:
+        """The urls of the schema and all its imported schemas recorded when the schema was stored
+
+        Args:
+            schema_url: The path or URL to the root xsd file
+
+        Returns:
+            The list of schema urls in parse order, None if the schema is not in the cache
+
+        """
+        manifest = self._manifest_file(schema_url)
+        try:
+            with open(manifest) as f:
+                return json.load(f).get("urls")
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.log.warning(f'Ignoring unreadable cache manifest "{manifest}": {e}')
+            return None
+
+    def lookup(self, schema_url: str, digests: List[str]) -> Union[str, None]:
+        """Look up the cache entry of a schema
+
+        Args:
+            schema_url: The path or URL to the root xsd file
+            digests: The content hashes of the current schema files listed in the manifest
+
+        Returns:
+            The key of the cache entry, or None if the cache has no entry for the current file content
+
+        """
+        key = self.cache_key(digests)
+        if self._entry_file(key).exists():
+            return key
+        self._statistics.misses += 1
+        self.log.info(f'Schema cache miss for "{schema_url}"')
+        return None
+
+    def miss(self, schema_url: str):
+        """Record a cache miss for a schema without a manifest
+
+        Args:
+            schema_url: The path or URL to the root xsd file
+
+        """
+        self._statistics.misses += 1
+        self.log.info(f'Schema cache miss for "{schema_url}"')
+
+    def load(self, key: str, owner: object) -> Union[Dict, None]:
+        """Load a processed schema model from the cache
+
+        Args:
+            key: The cache key returned by ``lookup``
+            owner: The schema reader the callbacks of the model are bound to
+
+        Returns:
+            The detached model as a dict, or None if the entry could not be read
+
+        """
+        try:
+            with open(self._entry_file(key), "rb") as f:
+                model = _ModelUnpickler(f, self.log, owner).load()
+        except (OSError, pickle.UnpicklingError, IndexError, EOFError, AttributeError) as e:
+            self._statistics.errors += 1
+            self.log.warning(f'Failed to read the cache entry "{key}": {e}')
+            return None
+        self._statistics.hits += 1
+        self.log.info(f'Schema cache hit for entry "{key}"')
+        return model
+
+    def store(self, schema_url: str, urls: List[str], digests: List[str], model: Dict) -> bool:
+        """Store a processed schema model in the cache. The ``lxml`` elements of the model are not stored.
+
+        Args:
+            schema_url: The path or URL to the root xsd file
+            urls: The schema urls in parse order
+            digests: The content hashes of the schema files in parse order
+            model: The processed model as a dict
+
+        Returns:
+            True if the model was stored, False otherwise
+
+        """
+        key = self.cache_key(digests)
+        try:
+            buffer = io.BytesIO()
+            _ModelPickler(buffer).dump(model)
+            self._write_atomic(self._entry_file(key), buffer.getvalue())
+            # Drop the previous entry of this schema, it can never be hit again
+            previous = self._read_manifest_key(schema_url)
+            manifest = {"urls": urls, "key": key}
+            self._write_atomic(
+                self._manifest_file(schema_url), json.dumps(manifest).encode()
+            )
+        except (OSError, pickle.PicklingError) as e:
+            self._statistics.errors += 1
+            self.log.warning(f'Failed to store "{schema_url}" in the schema cache: {e}')
+            return False
+        if previous is not None and previous != key:
+            try:
+                self._entry_file(previous).unlink(missing_ok=True)
+            except OSError:
+                pass  # Still open by another process
+        self._statistics.stores += 1
+        self.log.debug(f'Stored "{schema_url}" in the schema cache with key "{key}"')
+        return True
+
+    def _read_manifest_key(self, schema_url: str) -> Union[str, None]:
+        try:
+            with open(self._manifest_file(schema_url)) as f:
+                return json.load(f).get("key")
+        except (OSError, ValueError):
+            return None
@@ -70,3 +70,85 @@ class SchemaSummary:
     schema_version: List[Tuple] = field(metadata={"header": "Schema Version"})
     schema_types: List[Tuple] = field(metadata={"header": "Schema Types"})
     schema_namespaces: List[Tuple] = field(metadata={"header": "Namespaces"})
+
+
+@dataclass
+class CacheStatistics(BaseDataClass):
+    """Class for keeping track of the schema cache usage
+
+    Args:
+         hits: The number of schema models loaded from the cache
+         misses: The number of look-ups not found in the cache
+         stores: The number of schema models written to the cache
+         errors: The number of cache entries that could not be read or written
+
+    """
+
+    hits: int = field(default=0, metadata={"header": "Hits"})
+    misses: int = field(default=0, metadata={"header": "Misses"})
+    stores: int = field(default=0, metadata={"header": "Stores"})
+    errors: int = field(default=0, metadata={"header": "Errors"})
+
+
+@dataclass
+class ImportNode(BaseDataClass):
+    """Class for a schema in the import graph
+
+    Args:
+         url: The schema location
+         file: The local copy of the schema
+         parse_time: The time in seconds spent fetching and parsing the schema
+         imports: The number of schemas imported by the schema
+
+    """
+
+    url: str = field(metadata={"header": "URL"})
+    file: str = field(metadata={"header": "File"})
+    parse_time: float = field(default=0.0, metadata={"header": "Parse Time"})
+    imports: int = field(default=0, metadata={"header": "Imports"})
+
+
+@dataclass
+class SchemaDelta(BaseDataClass):
+    """Class for the changes of an incremental schema reprocess
+
+    Args:
+         added: The tags of the new global elements
+         removed: The tags of the deleted global elements
+         changed: The tags of the global elements depending on a modified declaration
+         rebuilt: The number of global elements built again
+         files: The schema locations parsed again or no longer imported
+
+    """
+
+    added: List[str] = field(default_factory=list, metadata={"header": "Added"})
+    removed: List[str] = field(default_factory=list, metadata={"header": "Removed"})
+    changed: List[str] = field(default_factory=list, metadata={"header": "Changed"})
+    rebuilt: int = field(default=0, metadata={"header": "Rebuilt"})
+    files: List[str] = field(default_factory=list, metadata={"header": "Files"})
+
+
+@dataclass
+class ElementProperties(BaseDataClass):
+    """Class for the snapshot of the schema properties of a detached global element
+
+    Args:
+         name: The element name
+         schema_type: The element type on the form ``prefix:name``
+         annotation: The element description, None if not documented
+         substitution_group: The name of the substitution group head, None if the element is not a member
+         is_reference: Whether the element has a reference
+         is_mandatory: Whether the element is mandatory
+         is_choice: Whether the element is a choice
+         is_abstract: Whether the element is abstract
+
+    """
+
+    name: str = field(metadata={"header": "Name"})
+    schema_type: str = field(metadata={"header": "Type"})
+    annotation: str = field(metadata={"header": "Description"})
+    substitution_group: str = field(metadata={"header": "Substitution Group"})
+    is_reference: bool = field(metadata={"header": "Reference"})
+    is_mandatory: bool = field(metadata={"header": "Mandatory"})
+    is_choice: bool = field(metadata={"header": "Choice"})
+    is_abstract: bool = field(metadata={"header": "Abstract"})
@@ -0,0 +1,265 @@
+#  Copyright (c) 2023.  OCX Consortium https://3docx.org. See the LICENSE
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from logging import Logger
+from pathlib import Path
+from typing import Dict, Union
+
+import requests
+from requests import RequestException
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ocx_tools.schema import (
+    DOWNLOAD_INDEX,
+    SCHEMA_FOLDER_SIZE_LIMIT,
+    DOWNLOAD_TIMEOUT,
+    DOWNLOAD_RETRIES,
+    DOWNLOAD_BACKOFF,
+    DOWNLOAD_CHUNK_SIZE,
+    IMPORT_WORKERS,
+)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def shared_session() -> requests.Session:
+    """The HTTP session shared by all schema downloads.
+    The session pools and keeps alive the connections, requests gzip transfer encoding and
+    retries failed requests with an exponential backoff.
+
+    Returns:
+        The shared ``requests.Session``
+
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=DOWNLOAD_RETRIES,
+                backoff_factor=DOWNLOAD_BACKOFF,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET", "HEAD"]),
+            )
+            adapter = HTTPAdapter(
+                pool_connections=IMPORT_WORKERS,
+                pool_maxsize=IMPORT_WORKERS,
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(
+                {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+            )
+            _session = session
+        return _session
+
+
+class SchemaDownloader:
+    """Download remote schemas to the local schema folder using conditional HTTP requests.
+
+    The ``ETag`` and ``Last-Modified`` response headers are stored per url in an index file in the schema folder.
+    A cached schema is revalidated with ``If-None-Match`` and ``If-Modified-Since`` and the cached file is returned
+    if the server responds with ``304 Not Modified``. The downloaded files are kept within a size budget by
+    evicting the least recently used files.
+
+    Args:
+        logger: The main python logger
+        folder: The local schema folder
+        size_limit: The maximum total size in bytes of the downloaded files
+        session: The HTTP session. Default is the session shared by all downloaders
+
+    Attributes:
+        _folder: The local schema folder
+        _session: The pooled HTTP session
+        _size_limit: The size budget of the downloaded files
+        _index: Hash table with url as key of the stored download meta data
+        _lock: Serializes the updates of the download index by concurrent downloads
+
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        folder: str,
+        size_limit: int = SCHEMA_FOLDER_SIZE_LIMIT,
+        session: requests.Session = None,
+    ):
+        self.log = logger
+        self._session = session if session is not None else shared_session()
+        self._folder = Path(folder)
+        self._size_limit = size_limit
+        self._lock = threading.RLock()
+        self._index = self._read_index()
+
+    def get_folder(self) -> str:
+        """The local download folder
+
+        Returns:
+            The path to the schema folder
+
+        """
+        return str(self._folder)
+
+    def get_index(self) -> Dict:
+        """The download meta data
+
+        Returns:
+            Hash table with url as key and the meta data of the local copy as value
+
+        """
+        return self._index
+
+    @staticmethod
+    def local_name(url: str) -> str:
+        """The file name of the local copy of a remote schema.
+        The name is made unique by a hash of the url, as different schema versions share the same file name.
+
+        Args:
+            url: The schema URL
+
+        Returns:
+            The local file name
+
+        """
+        path = Path(url)
+        digest = hashlib.sha1(url.encode()).hexdigest()[:8]
+        return f"{path.stem}-{digest}{path.suffix}"
+
+    def _index_file(self) -> Path:
+        return self._folder / DOWNLOAD_INDEX
+
+    def _read_index(self) -> Dict:
+        try:
+            with open(self._index_file()) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.log.warning(f'Ignoring unreadable download index "{self._index_file()}": {e}')
+            return {}
+
+    def _write_index(self):
+        self._folder.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self._folder, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._index, f, indent=2)
+            os.replace(tmp, self._index_file())
+        except OSError as e:
+            Path(tmp).unlink(missing_ok=True)
+            self.log.warning(f'Failed to write the download index "{self._index_file()}": {e}')
+
+    def fetch(self, url: str) -> Union[Path, None]:
+        """Return an up-to-date local copy of the remote schema
+
+        Args:
+            url: The schema URL
+
+        Returns:
+            The path to the local copy, None if the schema is not accessible
+
+        """
+        file = self._folder / self.local_name(url)
+        with self._lock:
+            # Pick up downloads made by other processes sharing the schema folder
+            self._index = self._read_index()
+            entry = self._index.get(url)
+        headers = {}
+        if entry is not None and file.exists():
+            if entry.get("etag") is not None:
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified") is not None:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        else:
+            entry = None
+        try:
+            with self._session.get(
+                url, headers=headers, timeout=DOWNLOAD_TIMEOUT, stream=True
+            ) as r:
+                r.raise_for_status()
+                if r.status_code == 304:
+                    self.log.debug(
+                        f'Remote schema "{url}" is not modified, using "{file}"'
+                    )
+                else:
+                    size = self._stream_to_file(r, file)
+                    entry = {
+                        "file": file.name,
+                        "etag": r.headers.get("ETag"),
+                        "last_modified": r.headers.get("Last-Modified"),
+                        "size": size,
+                    }
+                    self.log.debug(
+                        f'Successfully downloaded remote schema "{url}" to local folder "{self._folder}"'
+                    )
+        except (RequestException, OSError) as e:
+            if entry is not None:
+                self.log.warning(
+                    f'Failed to revalidate "{url}", using the cached copy "{file}": {e}'
+                )
+                return file
+            self.log.error(f'Failed to access schema from "{url}": {e}')
+            return None
+        entry["last_access"] = time.time()
+        with self._lock:
+            self._index = self._read_index()
+            self._index[url] = entry
+            self._evict(keep=url)
+            self._write_index()
+        return file
+
+    def _stream_to_file(self, response: requests.Response, file: Path) -> int:
+        """Stream the response body in chunks to a temporary file and rename it into place
+
+        Args:
+            response: The streamed response
+            file: The destination file
+
+        Returns:
+            The number of bytes written
+
+        """
+        self._folder.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self._folder, prefix=".tmp-")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    size += len(chunk)
+            os.replace(tmp, file)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return size
+
+    def _evict(self, keep: str):
+        """Remove the least recently used downloads until the total size is within the size budget
+
+        Args:
+            keep: The url that must not be evicted
+
+        """
+        total = sum(entry["size"] for entry in self._index.values())
+        lru = sorted(self._index.items(), key=lambda item: item[1]["last_access"])
+        for url, entry in lru:
+            if total <= self._size_limit:
+                break
+            if url == keep:
+                continue
+            try:
+                (self._folder / entry["file"]).unlink(missing_ok=True)
+            except OSError as e:
+                self.log.warning(f'Failed to evict "{entry["file"]}": {e}')
+                continue
+            total -= entry["size"]
+            del self._index[url]
+            self.log.debug(f'Evicted the least recently used schema "{url}"')
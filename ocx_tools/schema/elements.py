@@ -1,15 +1,30 @@
 #  Copyright (c) 2022-2023.  OCX Consortium https://3docx.org. See the LICENSE
 
+import sys
 from collections import defaultdict
 from logging import Logger
-from typing import Dict, List, Union
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple, Union
 
 from lxml.etree import Element, QName
 
+from ocx_tools.schema.data_classes import ElementProperties
 from ocx_tools.schema.helpers import SchemaHelper
 from ocx_tools.schema_xml.element import LxmlElement
 
 
+def _intern(value: Union[str, None]) -> Union[str, None]:
+    """Intern a string such that equal names and types held by many model objects share one string"""
+    return value if value is None else sys.intern(value)
+
+
+def _cardinality(element: Element) -> Tuple[int, Union[int, str]]:
+    """The cardinality of a schema element with an integer upper bound or ``unbounded``"""
+    lower, upper = LxmlElement.cardinality(element)
+    if upper != "unbounded":
+        upper = int(upper)
+    return lower, upper
+
+
 class OcxAttribute:
     """Global schema attribute class capturing the xsd schema definition of a global xs:attribute.
 
@@ -27,11 +42,21 @@ class OcxAttribute:
 
     """
 
+    __slots__ = (
+        "_name",
+        "_type",
+        "_use",
+        "_fixed",
+        "_default",
+        "_annotation",
+        "_is_global",
+    )
+
     def __init__(self, xs_attribute: Element):
         # Private
-        self._name = LxmlElement.get_name(xs_attribute)
-        self._type = SchemaHelper.get_type(xs_attribute)
-        self._use = LxmlElement.get_use(xs_attribute)
+        self._name = _intern(LxmlElement.get_name(xs_attribute))
+        self._type = _intern(SchemaHelper.get_type(xs_attribute))
+        self._use = _intern(LxmlElement.get_use(xs_attribute))
         self._fixed = xs_attribute.get("fixed")
         self._default = xs_attribute.get("default")
         self._annotation = LxmlElement.get_element_text(xs_attribute)
@@ -113,7 +138,7 @@ class OcxAttribute:
             None
 
         """
-        self._use = use
+        self._use = _intern(use)
 
     def put_type(self, type: str):
         """Set the xs:attribute type string
@@ -122,7 +147,7 @@ class OcxAttribute:
             None
 
         """
-        self._type = type
+        self._type = _intern(type)
 
     def put_name(self, name: str):
         """Set the xs:attribute name
@@ -131,7 +156,7 @@ class OcxAttribute:
             None
 
         """
-        self._name = name
+        self._name = _intern(name)
 
     def attributes_to_dict(self) -> Dict:
         """A dictionary of the OcxAttribute values
@@ -168,7 +193,7 @@ class OcxChildElement:
 
     Attributes:
         _tag: The unique tag of th schema element
-        _element: The ``xs:element`` instance
+        _element: The ``xs:element`` instance, None if the element is detached
         _name : The attribute name
         _type : The attribute type
         _use : Whether the child is optional or required
@@ -178,13 +203,24 @@ class OcxChildElement:
 
     """
 
+    __slots__ = (
+        "_element",
+        "_tag",
+        "_name",
+        "_type",
+        "_use",
+        "_cardinality",
+        "_annotation",
+        "_is_choice",
+    )
+
     def __init__(self, xs_element: Element):
         # Private
         self._element = xs_element
         self._tag = ""
-        self._name = LxmlElement.get_name(xs_element)
-        self._type = SchemaHelper.get_type(xs_element)
-        self._cardinality = LxmlElement.cardinality(xs_element)
+        self._name = _intern(LxmlElement.get_name(xs_element))
+        self._type = _intern(SchemaHelper.get_type(xs_element))
+        self._cardinality = _cardinality(xs_element)
         self._annotation = LxmlElement.get_element_text(xs_element)
         self._is_choice = LxmlElement.is_choice(xs_element)
 
@@ -256,7 +292,7 @@ class OcxChildElement:
             None
 
         """
-        self._use = use
+        self._use = _intern(use)
 
     def put_reference(self, tag: str):
         """Set the tag reference to the global schema element
@@ -265,7 +301,20 @@ class OcxChildElement:
             None
 
         """
-        self._tag = tag
+        self._tag = _intern(tag)
+
+    def detach(self):
+        """Release the reference to the ``xs:element``. All properties are captured on construction."""
+        self._element = None
+
+    def rebind(self, nodes: Dict[Element, Element]):
+        """Replace the reference to the ``xs:element`` by the equal node of a schema document parsed again
+
+        Args:
+            nodes: Hash table with the old node as key and the new node as value. Nodes not in the table are kept.
+
+        """
+        self._element = nodes.get(self._element, self._element)
 
     def is_mandatory(self) -> bool:
         """Whether the element mandatory or not
@@ -295,6 +344,15 @@ class OcxChildElement:
         """
         return self._tag != ""
 
+    def get_reference(self) -> str:
+        """The tag of the referenced global schema element
+
+        Returns:
+            The unique tag of the global element, an empty string if the element is not a reference
+
+        """
+        return self._tag
+
     def put_type(self, type: str):
         """Set the xs:attribute type string
 
@@ -302,7 +360,7 @@ class OcxChildElement:
             None
 
         """
-        self._type = type
+        self._type = _intern(type)
 
     def put_name(self, name: str):
         """Set the xs:attribute name
@@ -311,7 +369,7 @@ class OcxChildElement:
             None
 
         """
-        self._name = name
+        self._name = _intern(name)
 
     def attributes_to_dict(self) -> Dict:
         """A dictionary of the ''OcxChildElement'' values
@@ -340,6 +398,111 @@ class OcxChildElement:
         }
 
 
+class OcxContentParticle:
+    """A particle of the effective content model of a complex type.
+
+    A particle is either a model group (``sequence``, ``choice`` or ``all``) of nested particles,
+    a child ``element`` or an ``any`` wildcard. The content model of a type derived by extension is the sequence
+    of the content model of its base type followed by its own particles.
+    The particles are immutable and shared by all global elements of the same type.
+
+    Args:
+        kind: The particle kind, one of ``sequence``, ``choice``, ``all``, ``element`` or ``any``
+        cardinality: The tuple ``(minOccurs, maxOccurs)`` of the particle. ``maxOccurs`` is ``unbounded`` or an int
+        particles: The nested particles of a model group
+        element: The child element of an element particle
+
+    Attributes:
+        _elements: The flattened child elements of the particle in document order
+
+    """
+
+    __slots__ = ("_kind", "_cardinality", "_particles", "_element", "_elements")
+
+    def __init__(
+        self,
+        kind: str,
+        cardinality: Tuple[int, Union[int, str]],
+        particles: Tuple["OcxContentParticle", ...] = (),
+        element: "OcxChildElement" = None,
+    ):
+        self._kind = kind
+        self._cardinality = cardinality
+        self._particles = particles
+        self._element = element
+        self._elements = None
+
+    def get_kind(self) -> str:
+        """The particle kind
+
+        Returns:
+            One of ``sequence``, ``choice``, ``all``, ``element`` or ``any``
+
+        """
+        return self._kind
+
+    def get_cardinality(self) -> Tuple[int, Union[int, str]]:
+        """The cardinality of the particle
+
+        Returns:
+            The tuple ``(minOccurs, maxOccurs)``
+
+        """
+        return self._cardinality
+
+    def get_particles(self) -> Tuple["OcxContentParticle", ...]:
+        """The nested particles of a model group in document order"""
+        return self._particles
+
+    def get_element(self) -> Union["OcxChildElement", None]:
+        """The child element of an element particle, None for other particles"""
+        return self._element
+
+    def is_group(self) -> bool:
+        """Whether the particle is a ``sequence``, ``choice`` or ``all`` model group"""
+        return self._kind in ("sequence", "choice", "all")
+
+    def iter_elements(self) -> Iterator["OcxChildElement"]:
+        """Iterate over the child elements of the particle and all nested particles in document order"""
+        stack = [self]
+        while stack:
+            particle = stack.pop()
+            if particle._element is not None:
+                yield particle._element
+            stack.extend(reversed(particle._particles))
+
+    def get_elements(self) -> Tuple["OcxChildElement", ...]:
+        """The flattened child elements of the particle in document order.
+        The tuple is computed once and shared by all global elements with this content model.
+
+        Returns:
+            The child elements
+
+        """
+        if self._elements is None:
+            self._elements = tuple(self.iter_elements())
+        return self._elements
+
+    def to_notation(self) -> str:
+        """The content model in a compact notation, for example ``(A, (B | C)[0, ∞])``
+
+        Returns:
+            The sequence particles separated by ``,``, the choice particles by ``|`` and the all particles by ``&``,
+            each followed by the cardinality if not ``[1, 1]``
+
+        """
+        lower, upper = self._cardinality
+        if upper == "unbounded":
+            upper = "\u221E"  # UTF-8 Infinity symbol
+        occurs = "" if (lower, upper) == (1, 1) else f"[{lower}, {upper}]"
+        if self._kind == "element":
+            return f"{self._element.get_name()}{occurs}"
+        if self._kind == "any":
+            return f"any{occurs}"
+        separator = {"sequence": ", ", "choice": " | ", "all": " & "}[self._kind]
+        return f"({separator.join(p.to_notation() for p in self._particles)}){occurs}"
+
+
 class OcxGlobalElement:
     """Global schema element class capturing the xsd schema definition of a global ``xs:element``.
 
@@ -349,28 +512,79 @@ class OcxGlobalElement:
 
     Attributes:
         log: The Python logger instance
-        _element: The ``lxml.Element`` instance
+        _element: The ``lxml.Element`` instance, None if the element is detached
+        _properties: The snapshot of the schema properties of a detached element, None if not detached
         _attributes: The attributes of the global element including the attributes of all schema supertypes
         _reference: The ``OcxGlobalElement`` hase reference to a global schema element. 'None' if no reference
         _tag: The unique global tag of the ``OcXGlobalElement``
         _parents: Hash table of references to all parent schema types with tag as key
+        _shared_parents: True if the parents hash table is shared with other elements of the same type
         _children: List of references to all children schema types with tag as key.
                         Includes also children of all super-types.
+        _content_model: The effective content model of the element type
         -assertions: List of any assertions associated with the ``xs:element``
+        _loader: Returns the materialized element holding the resolved parents, attributes and children,
+            None if they are resolved into this element
 
     """
 
+    __slots__ = (
+        "log",
+        "_element",
+        "_properties",
+        "_attributes",
+        "_namespace",
+        "_tag",
+        "_reference",
+        "_cardinality",
+        "_children",
+        "_content_model",
+        "_parents",
+        "_shared_parents",
+        "_assertions",
+        "_loader",
+    )
+
     def __init__(self, xsd_element: Element, unique_tag: str, logger: Logger):
         self.log = logger
         # Private
         self._element = xsd_element
+        self._properties = None
         self._attributes = []
-        self._namespace = QName(unique_tag).namespace
-        self._tag = unique_tag
-        self._cardinality = LxmlElement.cardinality(xsd_element)
+        self._namespace = _intern(QName(unique_tag).namespace)
+        self._tag = _intern(unique_tag)
+        self._reference = None
+        self._cardinality = _cardinality(xsd_element)
         self._children = []
+        self._content_model = None
         self._parents = {}
+        self._shared_parents = False
         self._assertions = []
+        self._loader = None
+
+    def put_loader(self, loader: Union[Callable[[str], "OcxGlobalElement"], None]):
+        """Resolve the parents, attributes and children on first access instead of holding them
+
+        Arguments:
+            loader: Returns the materialized element of the unique tag, None to hold the details in this element
+
+        """
+        self._loader = loader
+
+    def _details(self) -> "OcxGlobalElement":
+        """The element holding the resolved parents, attributes and children"""
+        if self._loader is None:
+            return self
+        return self._loader(self._tag)
+
+    def is_lazy(self) -> bool:
+        """Whether the parents, attributes and children are resolved on access
+
+        Returns:
+            True if the details are materialized on access, False if they are held by the element
+
+        """
+        return self._loader is not None
 
     def add_attribute(self, attribute: OcxAttribute):
         """Add attributes to the global element
@@ -379,9 +593,20 @@ class OcxGlobalElement:
             attribute : The ``OcxAttribute`` instance to be added
 
         """
-
+        if isinstance(self._attributes, tuple):
+            # Copy on write, the attributes are shared with other elements of the same type
+            self._attributes = list(self._attributes)
         self._attributes.append(attribute)
 
+    def put_attributes(self, attributes: Tuple[OcxAttribute, ...]):
+        """Set all attributes of the global element. The tuple is shared, not copied.
+
+        Arguments:
+            attributes : The ``OcxAttribute`` instances including the attributes of all schema supertypes
+
+        """
+        self._attributes = attributes
+
     def add_child(self, child: OcxChildElement):
         """Add a child of an OCX global element'
 
@@ -392,6 +617,9 @@ class OcxGlobalElement:
             Nothing
 
         """
+        if isinstance(self._children, tuple):
+            # Copy on write, the children are shared with other elements of the same type
+            self._children = list(self._children)
         self._children.append(child)
 
     def add_assertion(self, test: str):
@@ -413,7 +641,7 @@ class OcxGlobalElement:
              Tru if the global element as assertions, False otherwise
 
         """
-        return len(self._assertions) > 0
+        return len(self._details()._assertions) > 0
 
     def put_parent(self, tag: str, parent: Element):
         """Add a parent element
@@ -426,16 +654,35 @@ class OcxGlobalElement:
             None
 
         """
+        if self._shared_parents:
+            # Copy on write, the parents are shared with other elements of the same type
+            self._parents = dict(self._parents)
+            self._shared_parents = False
         self._parents[tag] = parent
 
+    def put_parents(self, parents: dict):
+        """Set all parent elements. The hash table is shared, not copied.
+
+        Arguments:
+            parents: Hash table with the unique parent tag as key and the parent xsd schema element as value,
+                nearest first
+
+        Returns:
+            None
+
+        """
+        self._parents = parents
+        self._shared_parents = True
+
     def get_parents(self) -> dict:
         """Get all my attributes
 
         Returns:
-            Return all parents as a dict of key-value pairs ``(tag, Element)``
+            Return all parents as a dict of key-value pairs ``(tag, Element)``.
+            The elements are None if the element is detached.
 
         """
-        return self._parents
+        return self._details()._parents
 
     def get_parent_names(self) -> List:
         """Get all my parent names
@@ -445,7 +692,7 @@ class OcxGlobalElement:
 
         """
         parents = []
-        for tag in self._parents:
+        for tag in self._details()._parents:
             parents.append(LxmlElement.strip_namespace_tag(tag))
         return parents
 
@@ -456,7 +703,7 @@ class OcxGlobalElement:
             Assertion tests in a list
 
         """
-        return self._assertions
+        return self._details()._assertions
 
     def put_child(self, tag: str, child: OcxChildElement):
         """Add a child element of type ``OCxChildElement``
@@ -471,14 +718,37 @@ class OcxGlobalElement:
         """
         self._children[tag] = child
 
-    def get_children(self) -> List:
+    def put_content_model(self, model: Union[OcxContentParticle, None]):
+        """Set the effective content model. The children are the flattened elements of the content model.
+
+        Arguments:
+            model: The content model shared with all elements of the same type, None if the element has no
+                element content
+
+        Returns:
+            None
+
+        """
+        self._content_model = model
+        self._children = () if model is None else model.get_elements()
+
+    def get_content_model(self) -> Union[OcxContentParticle, None]:
+        """The effective content model including the content of all base types
+
+        Returns:
+            The root particle of the content model, None if the element has no element content
+
+        """
+        return self._details()._content_model
+
+    def get_children(self) -> Sequence[OcxChildElement]:
         """Get all my children xsd types
 
         Returns:
             Return all children as a dict of key-value pairs ``(tag, OCXChildElement)``
 
         """
-        return self._children
+        return self._details()._children
 
     def get_namespace(self) -> str:
         """The element _namespace
@@ -489,14 +759,15 @@ class OcxGlobalElement:
         """
         return self._namespace
 
-    def get_attributes(self) -> List:
+    def get_attributes(self) -> Sequence[OcxAttribute]:
         """The global element attributes including also parent attributes
 
         Returns:
-            A dict of all attributes including also parent attributes
+            All attributes including also parent attributes. The sequence may be shared with other elements
+            and must not be modified.
 
         """
-        return self._attributes
+        return self._details()._attributes
 
     def get_name(self) -> str:
         """The global element name
@@ -505,6 +776,8 @@ class OcxGlobalElement:
             The name of the global schema element as a str
 
         """
+        if self._element is None:
+            return self._properties.name
         return LxmlElement.get_name(self._element)
 
     def get_annotation(self) -> str:
@@ -514,6 +787,8 @@ class OcxGlobalElement:
             The annotation string of the element
 
         """
+        if self._element is None:
+            return self._properties.annotation
         annotation = LxmlElement.find_child_with_name(self._element, "annotation")
         if annotation is not None:
             return LxmlElement.get_element_text(annotation)
@@ -525,6 +800,8 @@ class OcxGlobalElement:
             The type of the global schema element as a str
 
         """
+        if self._element is None:
+            return self._properties.schema_type
         return SchemaHelper.get_type(self._element)
 
     def get_prefix(self) -> str:
@@ -540,15 +817,73 @@ class OcxGlobalElement:
             type = self.get_type()
             return LxmlElement.namespace_prefix(type)
 
-    def get_schema_element(self) -> Element:
+    def get_schema_element(self) -> Union[Element, None]:
         """Get the schema xsd element of the ``OcxSchemeElement`` object
 
         Returns:
-            My xsd schema element
+            My xsd schema element, None if the element is detached
 
         """
         return self._element
 
+    def detach(self):
+        """Snapshot the schema properties into plain values and release all references to the lxml tree.
+        The parents keep their tags, and the children and attributes are detached in place.
+        """
+        if self._element is None:
+            return
+        self._properties = self._capture_properties()
+        self._element = None
+        # The parents may be shared with other elements and are released in place
+        for tag in self._parents:
+            self._parents[tag] = None
+        for child in self._children:
+            child.detach()
+
+    def _capture_properties(self) -> ElementProperties:
+        """The snapshot of the schema properties read from the ``xs:element``"""
+        e = self._element
+        return ElementProperties(
+            name=LxmlElement.get_name(e),
+            schema_type=SchemaHelper.get_type(e),
+            annotation=self.get_annotation(),
+            substitution_group=LxmlElement.get_substitution_group(e),
+            is_reference=LxmlElement.is_reference(e),
+            is_mandatory=LxmlElement.is_mandatory(e),
+            is_choice=LxmlElement.is_choice(e),
+            is_abstract=LxmlElement.is_abstract(e),
+        )
+
+    def __getstate__(self):
+        """The pickled state captures the schema properties, such that the element can be unpickled detached"""
+        state = {slot: getattr(self, slot) for slot in self.__slots__}
+        if self._element is not None:
+            state["_properties"] = self._capture_properties()
+        return None, state
+
+    def rebind(self, nodes: Dict[Element, Element]):
+        """Replace the references to the lxml tree by the equal nodes of a schema document parsed again.
+        The parents may be shared with other elements and are rebound in place, like the children.
+
+        Args:
+            nodes: Hash table with the old node as key and the new node as value. Nodes not in the table are kept.
+
+        """
+        self._element = nodes.get(self._element, self._element)
+        for tag, element in self._parents.items():
+            self._parents[tag] = nodes.get(element, element)
+        for child in self._children:
+            child.rebind(nodes)
+
+    def is_detached(self) -> bool:
+        """Whether the element is detached from the lxml tree
+
+        Returns:
+            True if the properties are a snapshot, False if they are read from the schema element
+
+        """
+        return self._element is None
+
     def put_cardinality(self, element: Element):
         """Override the cardinality of the OcxGlobalElement
 
@@ -556,7 +891,7 @@ class OcxGlobalElement:
             element: the etree.Element node
 
         """
-        self._cardinality = LxmlElement.cardinality(element)
+        self._cardinality = _cardinality(element)
 
     def get_reference(self) -> str:
         """Get the reference to a global element
@@ -574,7 +909,7 @@ class OcxGlobalElement:
             tag: The unique tag to the global referenced element
 
         """
-        self._reference = tag
+        self._reference = _intern(tag)
 
     def get_cardinality(self) -> str:
         """Get the cardinality of the OcxGlobalElement
@@ -595,6 +930,8 @@ class OcxGlobalElement:
             is_reference : True if the element has a reference, False otherwise
 
         """
+        if self._element is None:
+            return self._properties.is_reference
         return LxmlElement.is_reference(self._element)
 
     def is_mandatory(self) -> bool:
@@ -604,6 +941,8 @@ class OcxGlobalElement:
             Returns True if the element is mandatory, False otherwise
 
         """
+        if self._element is None:
+            return self._properties.is_mandatory
         return LxmlElement.is_mandatory(self._element)
 
     def is_choice(self) -> bool:
@@ -613,6 +952,8 @@ class OcxGlobalElement:
             True if the element is a choice, False otherwise
 
         """
+        if self._element is None:
+            return self._properties.is_choice
         return LxmlElement.is_choice(self._element)
 
     def is_substitution_group(self) -> bool:
@@ -622,6 +963,8 @@ class OcxGlobalElement:
             True if the element is a substitutionGroup, False otherwise
 
         """
+        if self._element is None:
+            return self._properties.substitution_group is not None
         return LxmlElement.is_substitution_group(self._element)
 
     def is_abstract(self) -> bool:
@@ -631,6 +974,8 @@ class OcxGlobalElement:
             True if the element is abstract, False otherwise
 
         """
+        if self._element is None:
+            return self._properties.is_abstract
         return LxmlElement.is_abstract(self._element)
 
     def get_substitution_group(self) -> Union[str, None]:
@@ -640,6 +985,8 @@ class OcxGlobalElement:
             The name of the ``substitutionGroup``, None otherwise
 
         """
+        if self._element is None:
+            return self._properties.substitution_group
         return LxmlElement.get_substitution_group(self._element)
 
     def get_tag(self) -> str:
@@ -706,7 +1053,7 @@ class OcxGlobalElement:
 
         """
         table = defaultdict(list)
-        for attr in self._attributes:
+        for attr in self._details()._attributes:
             attributes = attr.attributes_to_dict()
             for a in attributes:
                 table[a].append(attributes[a])
@@ -729,7 +1076,7 @@ class OcxGlobalElement:
 
         """
         table = defaultdict(list)
-        for child in self._children:
+        for child in self._details()._children:
             attributes = child.attributes_to_dict()
             for a in attributes:
                 table[a].append(attributes[a])
@@ -2,11 +2,12 @@
 
 import re
 from dataclasses import asdict
-from typing import Dict, List, Union
+from typing import Dict, Iterator, List, Tuple, Union
 
-from lxml.etree import Element, ElementTextIterator
+from lxml.etree import Element, ElementTextIterator, QName
 
 from ocx_tools.schema.data_classes import SchemaChange
+from ocx_tools.schema.namespaces import NamespaceRegistry
 from ocx_tools.schema_xml.element import LxmlElement
 
 
@@ -99,6 +100,26 @@ class SchemaHelper:
         #     schemaType = "untyped"
         return schema_type
 
+    @classmethod
+    def get_type_tag(
+        cls, element: Element, namespaces: NamespaceRegistry, location: str = None
+    ) -> Union[str, None]:
+        """The unique tag of the element type
+
+        Args:
+            element: The schema element
+            namespaces: The registry resolving the prefix of the type
+            location: The schema location of the document declaring the element, scoping the prefix
+
+        Returns:
+            The type on the form ``{namespace}name``, None if the element has no type or the prefix is unknown
+
+        """
+        schema_type = cls.get_type(element)
+        if schema_type is None:
+            return None
+        return namespaces.resolve(schema_type, location)
+
     @staticmethod
     def unique_tag(name: str, namespace: str) -> str:
         """A unique global tag from the element name and namespace
@@ -115,6 +136,28 @@ class SchemaHelper:
         tag = "{" + namespace + "}" + name
         return tag
 
+    @staticmethod
+    def global_declarations(
+        root: Element, schema_types: List[str]
+    ) -> Iterator[Tuple[str, str, Element]]:
+        """Iterate over the named global declarations of a schema in document order.
+        Only the direct children of the schema root are global declarations, nested local declarations are skipped.
+
+        Args:
+            root: The root element of the schema
+            schema_types: The xsd types to include, for example ``element`` or ``complexType``
+
+        Returns:
+            An iterator of tuples ``(schema_type, name, element)``
+
+        """
+        namespace = QName(root).namespace
+        tags = {f"{{{namespace}}}{schema_type}": schema_type for schema_type in schema_types}
+        for e in root.iterchildren(*tags):
+            name = e.get("name")
+            if name is not None:
+                yield tags[e.tag], name, e
+
     @staticmethod
     def get_schema_version(root: Element) -> str:
         """Get the current OCX schema version
@@ -0,0 +1,165 @@
+#  Copyright (c) 2023.  OCX Consortium https://3docx.org. See the LICENSE
+
+import threading
+from typing import Dict, List, Tuple
+
+from .data_classes import ImportNode
+
+
+class ImportGraph:
+    """The graph of the schema imports (the xs:import tags).
+
+    Each schema location is a single node of the graph, regardless of how many schemas import it.
+    An edge points from the importing schema to the imported schema. The nodes are added concurrently by the
+    threads fetching and parsing the schemas.
+
+    Args:
+        root: The location of the root schema
+
+    Attributes:
+        _root: The location of the root schema
+        _nodes: Hash table with the schema location as key and the ``ImportNode`` as value
+        _edges: Hash table with the schema location as key and the list of imported schema locations as value
+        _lock: Serializes the updates from concurrent threads
+
+    """
+
+    def __init__(self, root: str):
+        self._root = str(root)
+        self._nodes = {}
+        self._edges = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        """The pickled state holds the nodes and edges but not the lock"""
+        state = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get_root(self) -> str:
+        """The location of the root schema"""
+        return self._root
+
+    def add_node(self, url: str, file: str, parse_time: float = 0.0) -> bool:
+        """Add a schema to the graph
+
+        Args:
+            url: The schema location
+            file: The local copy of the schema
+            parse_time: The time spent fetching and parsing the schema
+
+        Returns:
+            True if the schema is new to the graph, False if the schema is already a node of the graph
+
+        """
+        with self._lock:
+            if url in self._nodes:
+                return False
+            self._nodes[url] = ImportNode(url, file, parse_time)
+            self._edges.setdefault(url, [])
+            return True
+
+    def add_imports(self, url: str, references: Dict[str, str]):
+        """Add the import edges of a schema
+
+        Args:
+            url: The importing schema location
+            references: Hash table with the imported namespace as key and the schema location as value
+
+        """
+        with self._lock:
+            edges = self._edges.setdefault(url, [])
+            for location in references.values():
+                if location not in edges:
+                    edges.append(location)
+            if url in self._nodes:
+                self._nodes[url].imports = len(edges)
+
+    def sort(self):
+        """Order the nodes in the depth-first order of the imports from the root schema, each schema followed by
+        its imports in declaration order. The nodes are added in the order the concurrent threads complete,
+        so sorting makes the graph independent of the thread timing. Nodes not reachable from the root
+        follow in location order.
+        """
+        with self._lock:
+            order = {}
+            stack = [self._root]
+            while stack:
+                url = stack.pop()
+                if url in order or url not in self._nodes:
+                    continue
+                order[url] = None
+                stack.extend(reversed(self._edges.get(url, [])))
+            order.update(dict.fromkeys(sorted(url for url in self._nodes if url not in order)))
+            self._nodes = {url: self._nodes[url] for url in order}
+            self._edges = {url: self._edges[url] for url in order if url in self._edges}
+
+    def get_nodes(self) -> Dict[str, ImportNode]:
+        """The schemas of the graph
+
+        Returns:
+            Hash table with the schema location as key and the ``ImportNode`` as value
+
+        """
+        return self._nodes
+
+    def get_edges(self) -> List[Tuple[str, str]]:
+        """The imports of the graph
+
+        Returns:
+            The list of ``(importing schema, imported schema)`` tuples
+
+        """
+        return [(url, target) for url, targets in self._edges.items() for target in targets]
+
+    def get_imports(self, url: str) -> List[str]:
+        """The schemas imported by a schema
+
+        Args:
+            url: The schema location
+
+        Returns:
+            The imported schema locations in document order
+
+        """
+        return list(self._edges.get(url, []))
+
+    def find_cycles(self) -> List[List[str]]:
+        """Find the cyclic imports reachable from the root schema
+
+        Returns:
+            The list of cycles. Each cycle is the list of schema locations starting and ending with the same location.
+
+        """
+        cycles = []
+        visited = set()
+        path = []
+        on_path = set()
+        # Iterative depth-first search, the stack holds the node and the iterator over its imports
+        stack = [(self._root, iter(self._edges.get(self._root, [])))]
+        path.append(self._root)
+        on_path.add(self._root)
+        visited.add(self._root)
+        while stack:
+            url, targets = stack[-1]
+            for target in targets:
+                if target in on_path:
+                    cycles.append(path[path.index(target):] + [target])
+                elif target not in visited:
+                    visited.add(target)
+                    path.append(target)
+                    on_path.add(target)
+                    stack.append((target, iter(self._edges.get(target, []))))
+                    break
+            else:
+                stack.pop()
+                on_path.discard(path.pop())
+        return cycles
+
+    def has_cycles(self) -> bool:
+        """Whether the schema imports are cyclic"""
+        return len(self.find_cycles()) > 0
@@ -0,0 +1,151 @@
+#  Copyright (c) 2023.  OCX Consortium https://3docx.org. See the LICENSE
+
+from logging import Logger
+from typing import Dict, Tuple, Union
+
+from ocx_tools.schema_xml.element import LxmlElement
+
+# The reserved prefix xml. See https://www.w3.org/TR/xml-names/#sec-namespaces
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+
+
+class NamespaceRegistry:
+    """Bidirectional registry of the namespace prefixes of the parsed schemas.
+
+    The prefixes of all parsed schema documents are merged into one global scope. A prefix is bound to the
+    namespace of the first document declaring it, later declarations of the same prefix are dropped from the
+    global scope but kept in the scope of the declaring document. A namespace maps back to the last prefix
+    bound to it. Qualified names on the form ``prefix:name`` are resolved once to their unique tag and cached.
+    Since a bound prefix is never rebound, only resolved names are cached and the cache is never invalidated.
+
+    Args:
+        logger: The main python logger
+
+    Attributes:
+        _namespaces: Hash table with the prefix as key and the namespace as value, in the order of registration
+        _prefixes: Hash table with the namespace as key and the prefix as value
+        _scopes: Hash table with the schema location as key and the prefixes declared by the document as value
+        _qnames: Hash table with the tuple ``(schema location or None, prefix:name)`` as key and the tuple
+            ``(namespace, unique tag)`` as value
+
+    """
+
+    def __init__(self, logger: Logger):
+        self.log = logger
+        self._namespaces = {"xml": XML_NAMESPACE}
+        self._prefixes = {XML_NAMESPACE: "xml"}
+        self._scopes = {}
+        self._qnames = {}
+
+    def __len__(self) -> int:
+        return len(self._namespaces)
+
+    def add(self, namespaces: Dict[Union[str, None], str], location: str = None) -> int:
+        """Register the prefixes declared by a schema document
+
+        Args:
+            namespaces: Hash table with the prefix as key and the namespace as value. The default namespace has
+                the prefix None.
+            location: The schema location of the declaring document
+
+        Returns:
+            The number of new prefixes in the global scope
+
+        """
+        if location is not None:
+            self._scopes[location] = dict(namespaces)
+        n = 0
+        for prefix, namespace in namespaces.items():
+            existing = self._namespaces.get(prefix)
+            if existing is not None:
+                if existing != namespace:
+                    self.log.debug(
+                        f'The _namespace prefix "{prefix}" already exists. '
+                        f"Dropping new _namespace {namespace} from the _namespace table"
+                    )
+                continue
+            self._namespaces[prefix] = namespace
+            self._prefixes[namespace] = prefix
+            n += 1
+        return n
+
+    def get_namespace(self, prefix: Union[str, None]) -> Union[str, None]:
+        """The namespace bound to a prefix in the global scope, None if the prefix is unknown"""
+        return self._namespaces.get(prefix)
+
+    def get_prefix(self, namespace: str) -> Union[str, None]:
+        """The prefix bound to a namespace in the global scope, None if the namespace is unknown"""
+        return self._prefixes.get(namespace)
+
+    def has_namespace(self, namespace: str) -> bool:
+        """Whether a namespace is bound to any prefix in the global scope"""
+        return namespace in self._prefixes
+
+    def get_namespaces(self) -> Dict[Union[str, None], str]:
+        """The global scope
+
+        Returns:
+            Hash table with the prefix as key and the namespace as value, in the order of registration.
+            The table is shared and must not be modified.
+
+        """
+        return self._namespaces
+
+    def get_scope(self, location: str) -> Dict[Union[str, None], str]:
+        """The prefixes declared by a schema document
+
+        Args:
+            location: The schema location
+
+        Returns:
+            Hash table with the prefix as key and the namespace as value, empty if the document is not registered
+
+        """
+        return dict(self._scopes.get(location, {}))
+
+    def get_scopes(self) -> Dict[str, Dict[Union[str, None], str]]:
+        """The prefixes declared by each registered schema document in registration order"""
+        return {location: dict(scope) for location, scope in self._scopes.items()}
+
+    def resolve_qname(
+        self, name: str, location: str = None
+    ) -> Union[Tuple[str, str], None]:
+        """Resolve a qualified name to its namespace and unique tag
+
+        Args:
+            name: The name on the form ``prefix:name`` or an unprefixed name in the default namespace
+            location: The schema location of the document scoping the prefix. The global scope is used if None
+                or if the prefix is not declared by the document.
+
+        Returns:
+            The tuple ``(namespace, unique tag)``, None if the prefix is unknown
+
+        """
+        key = (location, name)
+        qname = self._qnames.get(key)
+        if qname is None:
+            prefix = LxmlElement.namespace_prefix(name)
+            namespace = self._scopes.get(location, {}).get(prefix)
+            if namespace is None:
+                namespace = self._namespaces.get(prefix)
+                if namespace is None:
+                    return None
+            name = LxmlElement.strip_namespace_prefix(name)
+            qname = (namespace, LxmlElement.namespaces_decorate(namespace) + name)
+            if location is None or location in self._scopes:
+                self._qnames[key] = qname
+        return qname
+
+    def resolve(self, name: str, location: str = None) -> Union[str, None]:
+        """The unique tag of a qualified name
+
+        Args:
+            name: The name on the form ``prefix:name``
+            location: The schema location of the document scoping the prefix
+
+        Returns:
+            The unique tag on the form ``{namespace}name``, None if the prefix is unknown
+
+        """
+        qname = self.resolve_qname(name, location)
+        return None if qname is None else qname[1]
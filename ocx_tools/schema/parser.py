@@ -1,28 +1,59 @@
 #  Copyright (c) 3-2023.  OCX Consortium https://3docx.org. See the LICENSE
 
-from collections import defaultdict
+import asyncio
+import copy
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from logging import Logger
 from pathlib import Path
-from typing import Any, Dict, List, Tuple, Union
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple, Union
 
-import requests
+from lxml import etree
 from lxml.etree import Element, QName
-from requests import HTTPError
 
 from ocx_tools.schema import (
     DEFAULT_SCHEMA,
     SCHEMA_FOLDER,
     W3C_SCHEMA_BUILT_IN_TYPES,
     PROCESS_SCHEMA_TYPES,
+    USE_SCHEMA_CACHE,
+    CACHE_FOLDER,
+    IMPORT_WORKERS,
+    SCHEMA_CATALOG,
+    CATALOG_STRICT,
+    LAZY_IMPORTS,
+    DETACHED_MODEL,
+    LAZY_ELEMENTS,
+    MATERIALIZED_ELEMENTS,
 )
-from .data_classes import SchemaSummary, SchemaType
+from .bundle import SchemaBundle
+from .cache import SchemaCache
+from .download import SchemaDownloader
+from .data_classes import CacheStatistics, SchemaDelta, SchemaSummary, SchemaType
+from .import_graph import ImportGraph
+from .namespaces import NamespaceRegistry
+from .substitution import SubstitutionGroupIndex
+from .symbols import SymbolTable
+from .type_hierarchy import TypeHierarchy
+from .where_used import WhereUsedIndex
 from .elements import (
     OcxAttribute,
     OcxChildElement,
+    OcxContentParticle,
     OcxGlobalElement,
 )
 from .helpers import SchemaHelper
-from ocx_tools.schema_xml.parse import LxmlElement, LxmlParser
+from ocx_tools.schema_xml.catalog import XmlCatalog
+from ocx_tools.schema_xml.parse import LxmlElement, LxmlParser, is_tar_archive
+
+
+# The particles of a content model
+MODEL_GROUPS = ("{*}sequence", "{*}choice", "{*}all", "{*}group")
+PARTICLES = MODEL_GROUPS + ("{*}element", "{*}any")
+# The content model resolved for a cyclic type or model group reference
+EMPTY_PARTICLE = OcxContentParticle("sequence", (1, 1), ())
 
 
 class OcxSchema:
@@ -30,316 +61,1906 @@ class OcxSchema:
 
     Args:
         logger: The main python logger
+        local_folder: The local folder where any external schemas will be downloaded
+        use_cache: Load the processed schema from the persistent schema cache if the schema files are unchanged.
+            The cache is pickled, so only enable it for a trusted schema folder. A model loaded from the cache is
+            detached from the schema trees, as the schema files are not parsed.
+        lazy: Parse an imported schema only when a tag in its namespace is first looked up
+        detached: Snapshot the processed model into plain values and release the parsed schema trees.
+            Ignored in lazy mode and lazy element mode.
+        lazy_elements: Resolve the parents, attributes and children of a global element on first access
+
+    Attributes:
+        _namespaces: The registry of all namespaces on the form (prefix, namespace) key-value pairs resulting from
+            parsing all schema files, `W3C <https://www.w3.org/TR/xml-names/#sec-namespaces>`_, with the prefixes
+            declared by each schema document.
+        _ocx_global_elements: Hash table as key-value pairs `(tag, OcxSchemaElement)` for all parsed schema elements
+        _is_parsed: True if a schema has been parsed, False otherwise
+        _schema_version: The version of the parsed schema
+        _local_folder: The local folder where any external schemas will be downloaded
+        _schema_changes: A list of all schema changes described by the tag SchemaChange contained in the xsd file.
+        _schema_types: The list of xsd types to be parsed. Only these types will be stored.
+        _default_schema: The default schema to be parsed
+        _builtin_xs_types: W3C primitive data types.
+            `www.w3.org <https://www.w3.org/TR/xmlschema-2/#built-in-primitive-datatypes>`_. Defined in ``config.yaml``
+        _parsed_files: The list of parsed schemas as ``(url, local file)`` tuples in parse order
+        _documents: The root elements of the parsed schema documents in parse order
+        _use_cache: True if the persistent schema cache is used
+        _cache: The persistent schema cache
+        _downloader: Conditional download of remote schemas to the local folder
+        _max_workers: The maximum number of schemas fetched and parsed concurrently
+        _timings: Hash table with the processing stage as key and the accumulated time in seconds as value
+        _import_graph: The graph of the imported schemas of the last processed schema
+        _schema_documents: Hash table with the schema location as key and the tuple ``(local file, parser)``
+            of the parsed schema documents as value
+        _fingerprints: Hash table with the schema location as key and the content hash of the local file as value
+        _declared_in: Hash table with the tag of each global declaration as key and the declaring schema location
+            as value
+        _locations: Hash table with the root element of each merged schema document as key and the schema location
+            as value. The prefixes of a qualified name are resolved in the scope of the document containing it.
+        _dependencies: Hash table with the tag of each global element as key and the set of tags looked up
+            when building the ``OcxGlobalElement`` as value
+        _recording: Thread local holding the tags looked up and the fragments resolved while building a global
+            element
+        _symbols: The symbol table interning the tags indexed by the where-used index to integer identifiers
+        _substitution_groups: The substitution group heads and their transitive members
+        _where_used: The reverse look-up tables of the types, elements and attributes used by the global elements
+        _type_hierarchy: The derivation hierarchy of the global declarations with the memoized ancestors
+        _type_lookups: Hash table with the tag as key and the tags looked up resolving its parent type as value
+        _resolved: Hash table with the memoized schema fragments shared by the global elements, such as the
+            flattened attributes of each type, with the key ``(kind, tag)`` and the tuple
+            ``(fragment, tags looked up resolving it)`` as value
+        _lazy: True if the imported schemas are parsed on first lookup
+        _pending_imports: Hash table with the namespace as key and the schema location as value of the
+            imported schemas not yet parsed in lazy mode
+        _loading: The namespaces being loaded in lazy mode
+        _lock: Serializes the lazy loading of imported schemas and global elements, and the readers of several
+            look-up tables against the publication of a newly processed model
+        _processing: Serializes the processing of the schema, such that a watcher reprocessing the schema
+            in the background and an explicit ``process_schema`` never build a model at the same time
+        _detached: True if the model is detached from the parsed schema trees after processing
+        _is_detached: True if the current model is detached
+        _schema_type_rows: Hash table with the tag as key and the precomputed ``SchemaType`` of the global
+            declaration as value. Only set for a detached model.
+        _lazy_elements: True if the details of the global elements are materialized on first access
+        _materialized: The least recently used ordered hash table with the tag as key and the materialized
+            ``OcxGlobalElement`` as value
+        _max_materialized: The maximum number of materialized global elements kept
+        _element_fragments: Hash table with the tag of each materialized global element as key and the keys of
+            the resolved fragments it was built from as value
+        _fragment_users: Hash table with the key of a resolved fragment as key and the number of materialized
+            global elements built from it as value. A fragment without users is released.
+        _unindexed: The tags of the global elements not yet added to the where-used index
+        _catalog: The XML catalog resolving remote schema locations to local copies, None if no catalog is loaded
+        _resolver: The ``lxml`` resolver of the XML catalog
+        _bundles: Hash table with the archive file as key and the opened ``SchemaBundle`` as value
+        _reuse: Hash table with the schema location as key and the tuple ``(content hash, (local file, parser))``
+            of the previously parsed documents as value. Only set during an incremental reprocess.
+
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        local_folder: str = SCHEMA_FOLDER,
+        use_cache: bool = USE_SCHEMA_CACHE,
+        lazy: bool = LAZY_IMPORTS,
+        detached: bool = DETACHED_MODEL,
+        lazy_elements: bool = LAZY_ELEMENTS,
+    ):
+        self._parser = LxmlParser(logger)
+        self.log = logger
+        # The namespace registry holds the reserved prefix xml. See https://www.w3.org/TR/xml-names/#sec-namespaces
+        self._namespaces = NamespaceRegistry(logger)
+        Path(SCHEMA_FOLDER).mkdir(parents=True, exist_ok=True)
+        self._is_parsed = False
+        self._local_folder = local_folder
+        self._default_schema = DEFAULT_SCHEMA
+        self._all_schema_elements = (
+            {}
+        )  # Hash table with tag as key schema_elements[tag] = lxml.etree.Element
+        self._ocx_global_elements = (
+            {}
+        )  # Hash table with tag as key, value pairs(tag, OcxGlobalElement)
+        self._all_types = defaultdict(
+            list
+        )  # Hash table with tag as key: all_types[tag] = lxml.etree.Element
+        self._schema_types = PROCESS_SCHEMA_TYPES
+        self._schema_version = None
+        self._schema_changes = defaultdict(list)
+        # w3c primitive data types ref https://www.w3.org/TR/xmlschema-2/#built-in-primitive-datatypes
+        self._builtin_xs_types = W3C_SCHEMA_BUILT_IN_TYPES
+        self._parsed_files = []
+        self._documents = []
+        self._use_cache = use_cache
+        self._cache = None
+        self._downloader = None
+        self._max_workers = IMPORT_WORKERS
+        self._timings = defaultdict(float)
+        self._import_graph = ImportGraph(self._default_schema)
+        self._schema_documents = {}
+        self._fingerprints = {}
+        self._declared_in = {}
+        self._locations = {}
+        self._dependencies = {}
+        self._reuse = {}
+        self._recording = threading.local()
+        self._type_hierarchy = TypeHierarchy(logger, self._get_type_parent)
+        self._symbols = SymbolTable()
+        self._where_used = WhereUsedIndex(logger, self._symbols, self._type_content_model)
+        self._substitution_groups = SubstitutionGroupIndex(logger)
+        self._type_lookups = {}
+        self._resolved = {}
+        self._lazy = lazy
+        self._pending_imports = {}
+        self._loading = set()
+        self._lock = threading.RLock()
+        self._processing = threading.Lock()
+        if detached and (lazy or lazy_elements):
+            logger.warning("The detached model mode is ignored in lazy mode")
+        self._detached = detached and not lazy and not lazy_elements
+        self._lazy_elements = lazy_elements
+        self._materialized = OrderedDict()
+        self._max_materialized = MATERIALIZED_ELEMENTS
+        self._element_fragments = {}
+        self._fragment_users = {}
+        self._unindexed = []
+        self._is_detached = False
+        self._schema_type_rows = {}
+        self._bundles = {}
+        self._catalog = None
+        self._resolver = None
+        if SCHEMA_CATALOG:
+            self.load_catalog(SCHEMA_CATALOG, CATALOG_STRICT)
+
+    def _add_global_ocx_element(self, tag: str, element: OcxGlobalElement):
+        """Add a global OCX element to the hash table
+
+        Args:
+            tag: The hash key
+            element: The global OCX element to add
+
+        """
+        #  self.log.debug(f'(Added schema element with tag {tag}')
+        self._ocx_global_elements[tag] = element
+        if self._lazy_elements:
+            # Indexing would materialize the element, defer it until the index is used
+            self._unindexed.append(tag)
+        else:
+            self._where_used.add(element)
+        head = element.get_substitution_group()
+        self._substitution_groups.add(
+            tag,
+            None if head is None else self._qualified_tag(head, self._declared_in.get(tag)),
+            element.is_abstract(),
+        )
+
+    def _qualified_tag(self, name: str, location: str = None) -> Union[str, None]:
+        """The unique tag of a qualified name
+
+        Args:
+            name: The name on the form ``prefix:name``
+            location: The schema location of the document scoping the prefix. The global scope is used if None.
+
+        Returns:
+            The unique tag on the form ``{namespace}name``, None if the prefix is unknown
+
+        """
+        return self._namespaces.resolve(name, location)
+
+    def _location_of(self, schema_element: Element) -> Union[str, None]:
+        """The schema location of the document containing a schema element
+
+        Args:
+            schema_element: The schema element
+
+        Returns:
+            The schema location, None if the document is not merged into the look-up tables
+
+        """
+        return self._locations.get(schema_element.getroottree().getroot())
+
+    def _add_schema_element(self, tag: str, element: Element):
+        """Add a new schema element to the hash table
+
+        Args:
+            tag: The hash key
+            element: The schema ``Element`` to add
+
+        """
+        #  self.log.debug(f'(Added schema element with tag {tag}')
+        self._all_schema_elements[tag] = element
+
+    def _add_schema_type(self, schema_type: str, tag: str):
+        """Add a new schema type to the hash table
+
+        Args:
+            tag: The hash key
+            schema_type: The schema type
+
+        """
+        #  self.log.debug(f'(Added schema element with type {schema_type} and tag {tag}')
+        self._all_types[schema_type].append(tag)
+
+    def _reset_model(self):
+        """Clear the look-up tables before a schema is processed"""
+        self._namespaces = NamespaceRegistry(self.log)
+        self._all_schema_elements = {}
+        self._ocx_global_elements = {}
+        self._all_types = defaultdict(list)
+        self._schema_version = None
+        self._schema_changes = defaultdict(list)
+        self._declared_in = {}
+        self._locations = {}
+        self._dependencies = {}
+        self._parsed_files = []
+        self._documents = []
+        self._schema_documents = {}
+        self._pending_imports = {}
+        self._type_hierarchy = TypeHierarchy(self.log, self._get_type_parent)
+        self._symbols = SymbolTable()
+        self._where_used = WhereUsedIndex(self.log, self._symbols, self._type_content_model)
+        self._substitution_groups = SubstitutionGroupIndex(self.log)
+        self._type_lookups = {}
+        self._resolved = {}
+        self._is_detached = False
+        self._schema_type_rows = {}
+        self._materialized = OrderedDict()
+        self._element_fragments = {}
+        self._fragment_users = {}
+        self._unindexed = []
+
+    def _add_timing(self, stage: str, seconds: float):
+        """Accumulate the time spent in a processing stage
+
+        Args:
+            stage: The processing stage
+            seconds: The elapsed time
+
+        """
+        self._timings[stage] += seconds
+
+    def get_timings(self) -> Dict[str, float]:
+        """The time spent in each stage of the last processed schema
+
+        Returns:
+            Hash table with the stage (``cache``, ``parse``, ``index``, ``process``, ``lazy``) as key and the time
+            in seconds as value. The ``index`` stage is included in the ``parse`` stage. The ``lazy`` stage is
+            the time spent loading imported schemas on first lookup in lazy mode, and is included in the
+            stage triggering the lookup.
+
+        """
+        return dict(self._timings)
+
+    def process_schema(self, schema_url: str = DEFAULT_SCHEMA) -> bool:
+        """Process the XSD schema file and create all hash tables of global elements.
+
+        The processed model is loaded from the schema cache if the schema and all its imported schemas
+        are unchanged since the model was stored. The model loaded from the cache is detached. In lazy mode
+        only the root schema is parsed and processed, and the partially loaded model is not stored in the cache.
+        In lazy element mode the details of the global elements are resolved on first access, and the model is
+        not stored in the cache.
+
+        Returns:
+            True of processed OK, False otherwise.
+
+        """
+        with self._processing:
+            work = self._build_aside()
+            processed = work._process_schema(schema_url)
+            self._publish(work)
+            return processed
+
+    def _build_aside(self) -> "OcxSchema":
+        """A shallow copy of this instance to build a new model aside while the current model is read
+
+        Returns:
+            The copy sharing the configuration, the locks and the opened bundles of this instance
+
+        """
+        work = copy.copy(self)
+        work._fingerprints = dict(self._fingerprints)
+        work._timings = defaultdict(float)
+        return work
+
+    def _publish(self, work: "OcxSchema"):
+        """Replace the current model by the model built aside by a single reference assignment.
+        The instance and the copy share the state afterwards, so the callbacks bound to the copy while
+        building the model see the published model.
+
+        Args:
+            work: The copy holding the new model
+
+        """
+        with self._lock:
+            self.__dict__ = work.__dict__
+
+    def _process_schema(self, schema_url: str) -> bool:
+        """Process the XSD schema file into the look-up tables of this instance
+
+        Args:
+            schema_url: the path or URL to the xsd file
+
+        Returns:
+            True of processed OK, False otherwise.
+
+        """
+        self._reset_model()
+        self._timings.clear()
+        # The bundles of a previous run must not claim the import locations of this run
+        self._bundles = {}
+        schema_url = self._open_bundle(schema_url)
+        if schema_url is None:
+            return False
+        start = time.perf_counter()
+        if self._use_cache and self._load_from_cache(schema_url):
+            self._add_timing("cache", time.perf_counter() - start)
+            return True
+        start = time.perf_counter()
+        if self._parse_schema(schema_url):
+            self._add_timing("parse", time.perf_counter() - start)
+            start = time.perf_counter()
+            self._process_ocx_elements()
+            self._add_timing("process", time.perf_counter() - start)
+            if self._use_cache and not self._lazy and not self._lazy_elements:
+                self._store_in_cache(schema_url)
+            if self._detached:
+                self._detach_model()
+            # Sort the hash table
+            # self._sort_schema_elements() ToDo: This function changes the dict to a list. Fix it!
+            return True
+        else:
+            return False
+
+    async def aprocess_schema(self, schema_url: str = DEFAULT_SCHEMA) -> bool:
+        """Process the XSD schema file and create all hash tables of global elements without blocking the event loop.
+
+        The schema and its imported schemas are fetched and traversed concurrently, while the blocking
+        downloads, the lxml parsing and the processing of the global elements run in the default executor.
+        On success the instance is populated exactly as by ``process_schema``.
+
+        Args:
+            schema_url: the path or URL to the xsd file
+
+        Returns:
+            True of processed OK, False otherwise.
+
+        """
+        acquire = asyncio.ensure_future(asyncio.to_thread(self._processing.acquire))
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # Release the lock once the pending acquisition completes
+            acquire.add_done_callback(lambda done: self._processing.release())
+            raise
+        try:
+            work = self._build_aside()
+            processed = await work._aprocess_schema(schema_url)
+            self._publish(work)
+            return processed
+        finally:
+            self._processing.release()
+
+    async def _aprocess_schema(self, schema_url: str) -> bool:
+        """Process the XSD schema file into the look-up tables of this instance without blocking the event loop
+
+        Args:
+            schema_url: the path or URL to the xsd file
+
+        Returns:
+            True of processed OK, False otherwise.
+
+        """
+        self._reset_model()
+        self._timings.clear()
+        # The bundles of a previous run must not claim the import locations of this run
+        self._bundles = {}
+        schema_url = self._open_bundle(schema_url)
+        if schema_url is None:
+            return False
+        start = time.perf_counter()
+        if self._use_cache and await asyncio.to_thread(
+            self._load_from_cache, schema_url
+        ):
+            self._add_timing("cache", time.perf_counter() - start)
+            return True
+        start = time.perf_counter()
+        if self._lazy:
+            if not await asyncio.to_thread(self._parse_schema, schema_url):
+                return False
+            self._add_timing("parse", time.perf_counter() - start)
+            start = time.perf_counter()
+            await asyncio.to_thread(self._process_ocx_elements)
+            self._add_timing("process", time.perf_counter() - start)
+            return True
+        documents = await self._aresolve_imports(schema_url)
+        if documents is None:
+            self._is_parsed = False
+            return False
+        self._parser = documents[str(schema_url)][1]
+        self._is_parsed = await asyncio.to_thread(
+            self._merge_schema, str(schema_url), documents, set()
+        )
+        self._schema_documents = documents
+        if not self._is_parsed:
+            return False
+        self._add_timing("parse", time.perf_counter() - start)
+        start = time.perf_counter()
+        await asyncio.to_thread(self._process_ocx_elements)
+        self._add_timing("process", time.perf_counter() - start)
+        if self._use_cache and not self._lazy_elements:
+            await asyncio.to_thread(self._store_in_cache, schema_url)
+        if self._detached:
+            await asyncio.to_thread(self._detach_model)
+        return True
+
+    def get_schema_folder(self) -> str:
+        """Return the local folder where the schemas are stored. The local folder is relative to the project root.
+
+        Returns:
+            The relative path to the local schema folder.
+
+        """
+        return self._local_folder
+
+    def put_schema_folder(self, local_folder: str):
+        """Set the local folder where the schemas are stored. The local folder is relative to the project root."""
+        self._local_folder = local_folder
+
+    def put_default_schema(self, schema_url: str):
+        """Return the default schema to be parsed.
+
+        Args:
+            schema_url: The location of the schema
+
+        """
+        self._default_schema = schema_url
+
+    def get_default_schema(self) -> str:
+        """Return the default schema to be parsed.
+
+        Returns:
+            The default schema url.
+
+        """
+        return self._default_schema
+
+    def load_catalog(self, file: str, strict: bool = False) -> bool:
+        """Load an OASIS XML catalog used to resolve the schema locations to local copies.
+
+        Args:
+            file: The path to the catalog file
+            strict: If True, a remote schema not in the catalog fails the processing instead of being downloaded
+
+        Returns:
+            True if the catalog was loaded, False otherwise
+
+        """
+        catalog = XmlCatalog(self.log, strict)
+        if not catalog.load(file):
+            return False
+        self._catalog = catalog
+        self._resolver = catalog.resolver()
+        return True
+
+    def get_catalog(self) -> Union[XmlCatalog, None]:
+        """The XML catalog in use
+
+        Returns:
+            The ``XmlCatalog``, None if no catalog is loaded
+
+        """
+        return self._catalog
+
+    def _get_cache(self) -> SchemaCache:
+        """The schema cache located in the current schema folder
+
+        Returns:
+            The ``SchemaCache`` instance
+
+        """
+        folder = str(Path(self._local_folder) / CACHE_FOLDER)
+        if self._cache is None or self._cache.get_folder() != folder:
+            self._cache = SchemaCache(self.log, folder)
+        return self._cache
+
+    def _get_downloader(self) -> SchemaDownloader:
+        """The downloader of remote schemas to the current schema folder
+
+        Returns:
+            The ``SchemaDownloader`` instance
+
+        """
+        if self._downloader is None or self._downloader.get_folder() != str(
+            Path(self._local_folder)
+        ):
+            self._downloader = SchemaDownloader(self.log, self._local_folder)
+        return self._downloader
+
+    def get_parsed_files(self) -> List[Tuple[str, str]]:
+        """The schema files of the last processed schema
+
+        Returns:
+            The list of ``(url, local file)`` tuples in parse order
+
+        """
+        return list(self._parsed_files)
+
+    def get_import_graph(self) -> ImportGraph:
+        """The import graph of the last processed schema
+
+        Returns:
+            The ``ImportGraph`` with a node for each parsed schema
+
+        """
+        return self._import_graph
+
+    def get_where_used(self) -> WhereUsedIndex:
+        """The where-used index of the last processed schema. In lazy element mode the global elements are
+        indexed on first use. The elements are built for the index only and are not kept as materialized.
+
+        Returns:
+            The reverse look-up tables of the types, elements and attributes used by the global elements
+
+        """
+        with self._lock:
+            if self._unindexed:
+                outer = getattr(self._recording, "fragments", None)
+                self._recording.fragments = set()
+                try:
+                    for tag in self._unindexed:
+                        self._where_used.add(self._build_ocx_element(tag))
+                    fragments = self._recording.fragments
+                finally:
+                    self._recording.fragments = outer
+                self._unindexed = []
+                # The fragments resolved for the index only are not kept
+                self._release_fragments(fragments)
+            return self._where_used
+
+    def get_symbols(self) -> SymbolTable:
+        """The symbol table of the where-used index of the last processed schema
+
+        Returns:
+            The ``SymbolTable`` interning the tags and attribute names indexed by the where-used index
+
+        """
+        return self._symbols
+
+    def get_substitution_groups(self) -> SubstitutionGroupIndex:
+        """The substitution groups of the last processed schema
+
+        Returns:
+            The index of the substitution group heads and their transitive members
+
+        """
+        return self._substitution_groups
+
+    def where_used(self, name: str, derived: bool = False) -> Dict[str, List[str]]:
+        """Where a type, global element or attribute is used
+
+        Args:
+            name: The name on the form ``prefix:name``. Attributes are looked up by the name without prefix.
+            derived: If True, the elements of types derived from the type are included
+
+        Returns:
+            Hash table with the usage ``type``, ``content``, ``substitution`` and ``attribute`` as key and the
+            tags of the using global elements and types as value. The ``substitution`` usage are the content
+            models referencing any substitution group head the element can substitute.
+
+        """
+        local_name = LxmlElement.strip_namespace_prefix(name)
+        with self._lock:
+            tag = self._qualified_tag(name)
+            index = self.get_where_used()
+            usage = {"type": [], "content": [], "substitution": []}
+            if tag is not None:
+                usage["type"] = index.get_elements_of_type(tag, derived)
+                usage["content"] = index.get_referencing(tag)
+                usage["substitution"] = list(
+                    dict.fromkeys(
+                        user
+                        for head in self._substitution_groups.get_heads(tag)
+                        for user in index.get_referencing(head)
+                    )
+                )
+            usage["attribute"] = index.get_elements_with_attribute(local_name)
+        return usage
+
+    def get_type_hierarchy(self) -> TypeHierarchy:
+        """The derivation hierarchy of the global declarations of the last processed schema
+
+        Returns:
+            The ``TypeHierarchy`` of the schema types
+
+        """
+        return self._type_hierarchy
+
+    def is_subtype(self, tag: str, base: str) -> bool:
+        """Whether a global declaration is derived from a schema type
+
+        Args:
+            tag: The unique tag of the global element or type
+            base: The unique tag of the schema type
+
+        Returns:
+            True if ``base`` is ``tag`` or any of its ancestor types, False otherwise
+
+        """
+        with self._lock:
+            return self._type_hierarchy.is_subtype(tag, base)
+
+    def _check_import_cycles(self):
+        """Log any cyclic imports of the import graph. Each schema is parsed once, so the cycles are harmless."""
+        for cycle in self._import_graph.find_cycles():
+            self.log.warning(f'Cyclic schema import: {" -> ".join(cycle)}')
+
+    def get_cache_statistics(self) -> CacheStatistics:
+        """The schema cache hits and misses
+
+        Returns:
+            The ``CacheStatistics`` of the schema cache in use
+
+        """
+        return self._get_cache().get_statistics()
+
+    def _model_state(self) -> Dict:
+        """The processed model as stored in the schema cache. The ``lxml`` elements are dropped when pickled,
+        so the state holds everything a detached model reads: the ``SchemaType`` rows, the type hierarchy,
+        the indexes and the content models of the types.
+        """
+        return {
+            "namespaces": self._namespaces,
+            "all_types": self._all_types,
+            "ocx_global_elements": self._ocx_global_elements,
+            "symbols": self._symbols,
+            "where_used": self._where_used,
+            "substitution_groups": self._substitution_groups,
+            "schema_version": self._schema_version,
+            "schema_changes": self._schema_changes,
+            "declared_in": self._declared_in,
+            "dependencies": self._dependencies,
+            "schema_type_rows": self._get_schema_type_rows(),
+            "type_hierarchy": self._type_hierarchy,
+            "content_models": {
+                key: entry for key, entry in self._resolved.items() if key[0] == "content_model"
+            },
+            "import_graph": self._import_graph,
+        }
+
+    def _load_from_cache(self, schema_url: str) -> bool:
+        """Load the processed model from the schema cache. The schema files are fetched to check that they are
+        unchanged, but not parsed. The loaded model is detached from the schema trees.
+
+        Args:
+            schema_url: the path or URL to the xsd file
+
+        Returns:
+            True if the model was loaded from the cache, False otherwise
+
+        """
+        cache = self._get_cache()
+        urls = cache.get_manifest(schema_url)
+        if urls is None:
+            cache.miss(schema_url)
+            return False
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            located = list(executor.map(self._locate_document, urls))
+        if None in located:
+            return False
+        digests = [digest for file, location, digest in located]
+        key = cache.lookup(schema_url, digests)
+        if key is None:
+            return False
+        model = cache.load(key, self)
+        if model is None:
+            return False
+        self._import_graph = model["import_graph"]
+        self._check_import_cycles()
+        self._namespaces = model["namespaces"]
+        self._all_types = model["all_types"]
+        self._declared_in = model["declared_in"]
+        self._dependencies = model["dependencies"]
+        self._schema_type_rows = model["schema_type_rows"]
+        self._type_hierarchy = model["type_hierarchy"]
+        self._resolved = model["content_models"]
+        self._ocx_global_elements = model["ocx_global_elements"]
+        self._symbols = model["symbols"]
+        self._where_used = model["where_used"]
+        self._substitution_groups = model["substitution_groups"]
+        self._schema_version = model["schema_version"]
+        self._schema_changes = model["schema_changes"]
+        self._fingerprints.update(zip(urls, digests))
+        self._parsed_files = [(url, file) for url, (file, location, digest) in zip(urls, located)]
+        self._is_detached = True
+        self._is_parsed = True
+        return True
+
+    def _store_in_cache(self, schema_url: str) -> bool:
+        """Store the processed model in the schema cache
+
+        Args:
+            schema_url: the path or URL to the xsd file
+
+        Returns:
+            True if the model was stored, False otherwise
+
+        """
+        urls = [url for url, file in self._parsed_files]
+        digests = [self._fingerprints[url] for url in urls]
+        return self._get_cache().store(schema_url, urls, digests, self._model_state())
+
+    def _open_bundle(self, schema_url: str) -> Union[str, None]:
+        """Open the schema bundle if the schema location is a zip archive or a gzip compressed xsd file
+
+        Args:
+            schema_url: the path or URL to the xsd file or schema bundle
+
+        Returns:
+            The location of the root schema, None if the bundle could not be opened
+
+        """
+        if is_tar_archive(schema_url):
+            self.log.error(
+                f'The schema bundle "{schema_url}" is a tar archive, which is not supported. Use a zip archive'
+            )
+            return None
+        if not SchemaBundle.is_bundle(schema_url):
+            return schema_url
+        bundle = SchemaBundle(self.log, schema_url)
+        if not bundle.open():
+            return None
+        self._bundles[bundle.get_file()] = bundle
+        return bundle.get_root()
+
+    def _get_bundle(self, schema_url: str) -> Union[SchemaBundle, None]:
+        """The opened schema bundle containing the schema
+
+        Returns:
+            The ``SchemaBundle``, None if the schema is not in a bundle
+
+        """
+        for bundle in self._bundles.values():
+            if bundle.contains(schema_url):
+                return bundle
+        return None
+
+    def _get_imports(self, schema_url: str, parser: LxmlParser) -> Dict[str, str]:
+        """The resolved locations of the schemas imported by a parsed schema.
+        The imports of a schema in a bundle are resolved to the bundle members.
+
+        Args:
+            schema_url: the path or URL to the xsd file
+            parser: The parser holding the schema document
+
+        Returns:
+            Hash table with the imported namespace as key and the schema location as value
+
+        """
+        references = parser.get_referenced_files()
+        bundle = self._get_bundle(schema_url)
+        if bundle is not None:
+            for ns, location in references.items():
+                member = bundle.resolve(location)
+                if member is not None:
+                    references[ns] = member
+        return references
+
+    @staticmethod
+    def _is_remote(schema_url: str) -> bool:
+        """Whether the schema location is a remote URL
+
+        Returns:
+            True if the schema is accessed over http(s), False if it is a local file
+
+        """
+        return str(schema_url).startswith(("http://", "https://"))
+
+    def _fetch_schema(self, schema_url: str) -> Union[Path, None]:
+        """Return the local copy of a schema. A schema location in the XML catalog is first mapped to its
+        catalog entry. A remote schema is downloaded to the local schema folder unless the local copy is still
+        up-to-date.
+
+        Args:
+            schema_url: the path or URL to the xsd file
+
+        Returns:
+            The path to the local schema file, None if the schema is not accessible
+
+        """
+        if self._catalog is not None:
+            location = self._catalog.resolve(schema_url)
+            if location is not None:
+                self.log.debug(f'Resolved "{schema_url}" to "{location}" by the XML catalog')
+                schema_url = location
+            elif self._catalog.is_strict() and self._is_remote(schema_url):
+                self.log.error(
+                    f'The schema "{schema_url}" is not in the XML catalog {self._catalog.get_files()}'
+                )
+                return None
+        if not self._is_remote(schema_url):
+            if not Path(schema_url).exists():
+                self.log.error(f"The xsd file {schema_url} does not exist")
+                return None
+            return Path(schema_url)
+        return self._get_downloader().fetch(str(schema_url))
+
+    def _locate_document(self, schema_url: str) -> Union[Tuple[str, str, str], None]:
+        """Fetch a single schema document without parsing it
+
+        Args:
+            schema_url: the path or URL to the xsd file
+
+        Returns:
+            The tuple ``(local file, parse location, content hash)``, None if the schema could not be fetched
+
+        """
+        bundle = self._get_bundle(schema_url)
+        if bundle is not None:
+            # Parse straight from the archive
+            return bundle.get_file(), str(schema_url), bundle.fingerprint(schema_url)
+        file = self._fetch_schema(schema_url)
+        if file is None:
+            return None
+        try:
+            return str(file), str(file), SchemaCache.file_digest(str(file))
+        except OSError as e:
+            self.log.error(f'Failed to read the xsd file "{file}": {e}')
+            return None
+
+    def _load_document(self, schema_url: str) -> Union[Tuple[str, LxmlParser], None]:
+        """Fetch and parse a single schema document
+
+        Args:
+            schema_url: the path or URL to the xsd file
+
+        Returns:
+            The tuple ``(local file, parser)``, None if the schema could not be fetched or parsed
+
+        """
+        start = time.perf_counter()
+        located = self._locate_document(schema_url)
+        if located is None:
+            return None
+        file, location, digest = located
+        self._fingerprints[str(schema_url)] = digest
+        previous = self._reuse.get(str(schema_url))
+        if previous is not None and previous[0] == digest:
+            # The schema is unchanged since it was last parsed
+            self._import_graph.add_node(
+                str(schema_url), str(file), time.perf_counter() - start
+            )
+            return previous[1]
+        parser = LxmlParser(self.log, self._resolver)
+        # Keep the original location as base url such that relative imports resolve against it
+        base_url = str(schema_url) if self._is_remote(schema_url) else None
+        try:
+            if not parser.parse(location, base_url=base_url):
+                return None
+        except BaseException as e:
+            self.log.error(e.with_traceback)
+            return None
+        self.log.debug(f'Successfully parsed xsd schema with location "{file}"')
+        self._import_graph.add_node(
+            str(schema_url), str(file), time.perf_counter() - start
+        )
+        return str(file), parser
+
+    def _resolve_imports(
+        self, schema_url: str
+    ) -> Union[Dict[str, Tuple[str, LxmlParser]], None]:
+        """Fetch and parse the schema and all its transitively imported schemas (the xs:import tags).
+        The schemas are resolved concurrently by a bounded thread pool. Each distinct schema location
+        is fetched and parsed once and recorded as a node of the import graph. The nodes are sorted in the
+        depth-first order of the imports once all schemas are resolved.
+
+        Args:
+            schema_url: the path or URL to the root xsd file
+
+        Returns:
+            Hash table with the schema location as key and the tuple ``(local file, parser)`` as value.
+            None if any of the schemas could not be fetched or parsed.
+
+        """
+        documents = {}
+        self._import_graph = ImportGraph(str(schema_url))
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            pending = {
+                executor.submit(self._load_document, schema_url): str(schema_url)
+            }
+            while pending:
+                done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = pending.pop(future)
+                    document = future.result()
+                    if document is None:
+                        for future in not_done:
+                            future.cancel()
+                        return None
+                    for ref in self._add_document(url, document, documents, pending.values()):
+                        pending[executor.submit(self._load_document, ref)] = ref
+        self._import_graph.sort()
+        self._check_import_cycles()
+        return documents
+
+    async def _aresolve_imports(
+        self, schema_url: str
+    ) -> Union[Dict[str, Tuple[str, LxmlParser]], None]:
+        """Fetch and parse the schema and all its transitively imported schemas from the event loop.
+        The asyncio counterpart of ``_resolve_imports``, bounded by the same number of workers.
+
+        Args:
+            schema_url: the path or URL to the root xsd file
+
+        Returns:
+            Hash table with the schema location as key and the tuple ``(local file, parser)`` as value.
+            None if any of the schemas could not be fetched or parsed.
+
+        """
+        semaphore = asyncio.Semaphore(self._max_workers)
+
+        async def load(url: str) -> Union[Tuple[str, LxmlParser], None]:
+            async with semaphore:
+                return await asyncio.to_thread(self._load_document, url)
+
+        documents = {}
+        self._import_graph = ImportGraph(str(schema_url))
+        pending = {asyncio.create_task(load(str(schema_url))): str(schema_url)}
+        while pending:
+            done, not_done = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                url = pending.pop(task)
+                document = task.result()
+                if document is None:
+                    for task in not_done:
+                        task.cancel()
+                    return None
+                for ref in self._add_document(url, document, documents, pending.values()):
+                    pending[asyncio.create_task(load(ref))] = ref
+        self._import_graph.sort()
+        self._check_import_cycles()
+        return documents
+
+    def _add_document(
+        self,
+        url: str,
+        document: Tuple[str, LxmlParser],
+        documents: Dict[str, Tuple[str, LxmlParser]],
+        pending: Iterable[str],
+    ) -> List[str]:
+        """Add a loaded schema document to the import traversal shared by ``_resolve_imports`` and
+        ``_aresolve_imports``. The imports of the document are recorded in the import graph.
+
+        Args:
+            url: The schema location of the document
+            document: The tuple ``(local file, parser)`` of the loaded document
+            documents: The loaded documents, updated with the new document
+            pending: The schema locations already scheduled for loading
+
+        Returns:
+            The imported schema locations not yet loaded or scheduled
+
+        """
+        documents[url] = document
+        references = self._get_imports(url, document[1])
+        self._import_graph.add_imports(url, references)
+        scheduled = set(pending)
+        new = []
+        for ref in references.values():
+            if ref not in documents and ref not in scheduled:
+                scheduled.add(ref)
+                new.append(ref)
+        return new
+
+    def _parse_schema(self, schema_url: str = DEFAULT_SCHEMA) -> bool:
+        """Parse the OCX xsd schema. The method will traverse any referenced (using the tag xs:import)
+            schemas and parse these also. If the referenced schema url is not a local file,
+            the method will download the file before the schema is parsed.
+            The schemas are fetched and parsed concurrently, but merged into the look-up tables
+            in the depth-first order of the imports.
+
+        Args:
+            schema_url: the path or URL to the xsd file
+
+        Returns:
+            True if all schemas are parsed successfully, else returns False
+
+        """
+        if self._lazy:
+            return self._parse_root_schema(schema_url)
+        documents = self._resolve_imports(schema_url)
+        if documents is None:
+            self._is_parsed = False
+            return False
+        self._parser = documents[str(schema_url)][1]
+        self._is_parsed = self._merge_schema(str(schema_url), documents, set())
+        self._schema_documents = documents
+        return self._is_parsed
+
+    def _parse_root_schema(self, schema_url: str) -> bool:
+        """Parse only the root schema and defer the parsing of the imported schemas until first looked up
+
+        Args:
+            schema_url: the path or URL to the xsd file
+
+        Returns:
+            True if the root schema is parsed successfully, else returns False
+
+        """
+        self._import_graph = ImportGraph(str(schema_url))
+        document = self._load_document(str(schema_url))
+        if document is None:
+            self._is_parsed = False
+            return False
+        file, parser = document
+        self._parser = parser
+        self._schema_documents = {str(schema_url): document}
+        self._is_parsed = self._merge_document(str(schema_url), file, parser)
+        if self._is_parsed:
+            self._defer_imports(str(schema_url), parser)
+        return self._is_parsed
+
+    def _defer_imports(self, schema_url: str, parser: LxmlParser):
+        """Record the imports of a parsed schema to be loaded on first lookup
+
+        Args:
+            schema_url: the path or URL to the xsd file
+            parser: The parser holding the schema document
+
+        """
+        references = self._get_imports(schema_url, parser)
+        self._import_graph.add_imports(schema_url, references)
+        for ns, location in references.items():
+            if location not in self._schema_documents and ns not in self._pending_imports:
+                self._pending_imports[ns] = location
+
+    def _ensure_namespace(self, namespace: str):
+        """Load the imported schema of a namespace if it is not yet parsed in lazy mode
+
+        Args:
+            namespace: The namespace of a looked up tag
+
+        """
+        if namespace not in self._pending_imports:
+            return
+        with self._lock:
+            location = self._pending_imports.get(namespace)
+            if location is None or namespace in self._loading:
+                return
+            self._loading.add(namespace)
+            try:
+                self._load_import(namespace, location)
+            finally:
+                self._loading.discard(namespace)
+                self._pending_imports.pop(namespace, None)
+
+    def _load_import(self, namespace: str, location: str) -> bool:
+        """Parse an imported schema and merge it into the look-up tables
+
+        Args:
+            namespace: The imported namespace
+            location: The location of the imported schema
+
+        Returns:
+            True if the schema is loaded successfully, else returns False
+
+        """
+        start = time.perf_counter()
+        document = self._load_document(location)
+        if document is None:
+            self.log.error(
+                f'Failed to load the schema "{location}" of the imported namespace "{namespace}"'
+            )
+            return False
+        file, parser = document
+        self._schema_documents[location] = document
+        if not self._merge_document(location, file, parser):
+            return False
+        self._defer_imports(location, parser)
+        self._add_timing("lazy", time.perf_counter() - start)
+        self.log.debug(f'Loaded the schema "{location}" on first lookup')
+        return True
+
+    def get_pending_imports(self) -> Dict[str, str]:
+        """The imported schemas not yet parsed in lazy mode
+
+        Returns:
+            Hash table with the namespace as key and the schema location as value
+
+        """
+        return dict(self._pending_imports)
+
+    def _merge_schema(
+        self,
+        schema_url: str,
+        documents: Dict[str, Tuple[str, LxmlParser]],
+        visited: set,
+    ) -> bool:
+        """Merge a parsed schema and recursively all its imported schemas into the look-up tables
+
+        Args:
+            schema_url: the path or URL to the xsd file
+            documents: The parsed schema documents returned by ``_resolve_imports``
+            visited: The schema locations already merged
+
+        Returns:
+            True if all schemas are merged successfully, else returns False
+
+        """
+        visited.add(schema_url)
+        file, parser = documents[schema_url]
+        if not self._merge_document(schema_url, file, parser):
+            return False
+        # Merge any imported schemas
+        references = self._get_imports(schema_url, parser)
+        for ns in references:
+            url = references[ns]
+            if url in visited:
+                continue
+            if not self._merge_schema(url, documents, visited):
+                return False
+            if not self._namespaces.has_namespace(ns):
+                self.log.error(f'Mismatched _namespace "{ns}" in xsd with url: "{url}"')
+        return True
+
+    def _merge_document(self, schema_url: str, file: str, parser: LxmlParser) -> bool:
+        """Add the namespaces and global types of a parsed schema document to the look-up tables
+
+        Args:
+            schema_url: the path or URL to the xsd file
+            file: The local copy of the xsd file
+            parser: The parser holding the schema document
+
+        Returns:
+            True if the document is merged successfully, else returns False
+
+        """
+        root = parser.get_root()
+        self._parsed_files.append((schema_url, file))
+        self._documents.append(root)
+        self._locations[root] = schema_url
+        ns = parser.get_namespaces()
+        # Add the ns to the global namespace registry
+        n = self._namespaces.add(ns, schema_url)
+        # The target namespace for the current schema
+        target_ns = parser.get_target_namespace()
+        if not self._namespaces.has_namespace(target_ns):
+            self.log.error(
+                f'The target _namespace "{target_ns}" is not registered in the _namespace listing '
+                f"{self._namespaces.get_namespaces()}"
+            )
+            return False
+        # Retrieve the OCX schema version
+        version = SchemaHelper.get_schema_version(root)
+        if version != "Missing":
+            self._schema_version = version
+        self.log.debug(f'Added {n} new namespaces for schema "{file}"')
+        if LxmlElement.has_child_with_name(root, "SchemaChange"):
+            changes = SchemaHelper.find_schema_changes(root)
+            if len(changes) > 0:
+                self._schema_changes = changes
+        # Build the look-up tables for all global element types in a single pass over the global declarations
+        start = time.perf_counter()
+        for schema_type, name, e in SchemaHelper.global_declarations(
+            root, self._schema_types
+        ):
+            tag = SchemaHelper.unique_tag(name, target_ns)
+            self._add_schema_element(tag, e)
+            self._add_schema_type(schema_type, tag)
+            self._declared_in[tag] = schema_url
+        self._add_timing("index", time.perf_counter() - start)
+        return True
+
+    def is_parsed(self) -> bool:
+        return self._is_parsed
+
+    def _process_ocx_elements(self):
+        """Process all parsed elements and build the hash table of OcxSchemaElement"""
+        # All schema elements of type element
+        elements = self._get_schema_element_types()
+        for tag in elements:
+            self._add_global_ocx_element(tag, self._new_ocx_element(tag))
+        self._substitution_groups.build()
+        return
 
-    Attributes:
-        _namespace: The dict of all namespaces on the form (prefix, namespace) key-value pairs resulting from
-            parsing all schema files, `W3C <https://www.w3.org/TR/xml-names/#sec-namespaces>`_.
-        _ocx_global_elements: Hash table as key-value pairs `(tag, OcxSchemaElement)` for all parsed schema elements
-        _is_parsed: True if a schema has been parsed, False otherwise
-        _schema_version: The version of the parsed schema
-        _local_folder: The local folder where any external schemas will be downloaded
-        _schema_changes: A list of all schema changes described by the tag SchemaChange contained in the xsd file.
-        _schema_types: The list of xsd types to be parsed. Only these types will be stored.
-        _default_schema: The default schema to be parsed
-        _builtin_xs_types: W3C primitive data types.
-            `www.w3.org <https://www.w3.org/TR/xmlschema-2/#built-in-primitive-datatypes>`_. Defined in ``config.yaml``
+    def _new_ocx_element(self, tag: str) -> OcxGlobalElement:
+        """A new global element, with the details materialized on first access in lazy element mode
 
-    """
+        Args:
+            tag: The unique tag of the global element
 
-    def __init__(self, logger: Logger, local_folder: str = SCHEMA_FOLDER):
-        self._parser = LxmlParser(logger)
-        self.log = logger
-        # Default namespace map for the reserved prefix xml. See https://www.w3.org/TR/xml-names/#sec-namespaces
-        self._namespace = {"xml": "http://www.w3.org/XML/1998/namespace"}
-        Path(SCHEMA_FOLDER).mkdir(parents=True, exist_ok=True)
-        self._is_parsed = False
-        self._local_folder = local_folder
-        self._default_schema = DEFAULT_SCHEMA
-        self._all_schema_elements = (
-            {}
-        )  # Hash table with tag as key schema_elements[tag] = lxml.etree.Element
-        self._ocx_global_elements = (
-            {}
-        )  # Hash table with tag as key, value pairs(tag, OcxGlobalElement)
-        self._all_types = defaultdict(
-            list
-        )  # Hash table with tag as key: all_types[tag] = lxml.etree.Element
-        self._schema_types = PROCESS_SCHEMA_TYPES
-        self._schema_version = None
-        self._schema_changes = defaultdict(list)
-        # w3c primitive data types ref https://www.w3.org/TR/xmlschema-2/#built-in-primitive-datatypes
-        self._builtin_xs_types = W3C_SCHEMA_BUILT_IN_TYPES
+        Returns:
+            The new ``OcxGlobalElement`` instance
 
-    def _add_global_ocx_element(self, tag: str, element: OcxGlobalElement):
-        """Add a global OCX element to the hash table
+        """
+        if not self._lazy_elements:
+            return self._build_ocx_element(tag)
+        ocx = OcxGlobalElement(self._get_element(tag), tag, self.log)
+        ocx.put_loader(self._materialize)
+        return ocx
+
+    def _materialize(self, tag: str) -> OcxGlobalElement:
+        """The global element with the resolved parents, attributes and children.
+        The materialized elements are kept in least recently used order. When more than the maximum number
+        of elements are materialized, the least recently used element is evicted and resolved again on its next
+        access. The resolved schema fragments shared by the elements of the same type stay memoized as long as
+        a materialized element was built from them, and are released with the last one.
 
         Args:
-            tag: The hash key
-            element: The global OCX element to add
+            tag: The unique tag of the global element
+
+        Returns:
+            The materialized ``OcxGlobalElement`` instance
 
         """
-        #  self.log.debug(f'(Added schema element with tag {tag}')
-        self._ocx_global_elements[tag] = element
+        with self._lock:
+            ocx = self._materialized.get(tag)
+            if ocx is None:
+                outer = getattr(self._recording, "fragments", None)
+                self._recording.fragments = set()
+                try:
+                    ocx = self._build_ocx_element(tag)
+                    fragments = self._recording.fragments
+                finally:
+                    self._recording.fragments = outer
+                self._materialized[tag] = ocx
+                self._element_fragments[tag] = fragments
+                for key in fragments:
+                    self._fragment_users[key] = self._fragment_users.get(key, 0) + 1
+                while len(self._materialized) > self._max_materialized:
+                    evicted, _ = self._materialized.popitem(last=False)
+                    released = []
+                    for key in self._element_fragments.pop(evicted):
+                        self._fragment_users[key] -= 1
+                        if self._fragment_users[key] == 0:
+                            del self._fragment_users[key]
+                            released.append(key)
+                    self._release_fragments(released)
+            else:
+                self._materialized.move_to_end(tag)
+            return ocx
 
-    def _add_schema_element(self, tag: str, element: Element):
-        """Add a new schema element to the hash table
+    def _release_fragments(self, keys: Iterable[Tuple[str, Any]]):
+        """Drop the memoized fragments no materialized global element was built from
 
         Args:
-            tag: The hash key
-            element: The schema ``Element`` to add
+            keys: The keys of the resolved fragments to release
 
         """
-        #  self.log.debug(f'(Added schema element with tag {tag}')
-        self._all_schema_elements[tag] = element
+        for key in keys:
+            if key not in self._fragment_users:
+                self._resolved.pop(key, None)
 
-    def _add_schema_type(self, schema_type: str, tag: str):
-        """Add a new schema type to the hash table
+    def get_materialized(self) -> List[str]:
+        """The global elements with materialized details in lazy element mode
+
+        Returns:
+            The tags of the materialized elements, least recently used first
+
+        """
+        with self._lock:
+            return list(self._materialized)
+
+    def _build_ocx_element(self, tag: str) -> OcxGlobalElement:
+        """Build the global element and record the tags it depends on
 
         Args:
-            tag: The hash key
-            schema_type: The schema type
+            tag: The unique tag of the global element
+
+        Returns:
+            The new ``OcxGlobalElement`` instance
 
         """
-        #  self.log.debug(f'(Added schema element with type {schema_type} and tag {tag}')
-        self._all_types[schema_type].append(tag)
+        outer = getattr(self._recording, "lookups", None)
+        self._recording.lookups = {tag}
+        e = self._get_element(tag)
+        qn = QName(tag)
+        name = qn.localname
+        self.log.debug(f"Adding global element {name}")
+        ocx = OcxGlobalElement(e, tag, self.log)
+        # Find all parents and add them to the instance
+        self._find_all_my_parents(ocx)
+        # Process all xs:attribute elements including all supertypes
+        self._process_attributes(ocx)
+        # Process ald children including super type children
+        self._process_children(ocx)
+        self._dependencies[tag] = frozenset(self._recording.lookups)
+        self._recording.lookups = outer
+        return ocx
 
-    def process_schema(self, schema_url: str = DEFAULT_SCHEMA) -> bool:
-        """Process the XSD schema file and create all hash tables of global elements.
+    def get_dependencies(self, tag: str) -> Set[str]:
+        """The schema files a global element was built from
+
+        Args:
+            tag: The unique tag of the global element
 
         Returns:
-            True of processed OK, False otherwise.
+            The set of schema locations declaring the element or any of the types it depends on
 
         """
-        if self._parse_schema(schema_url):
-            self._process_ocx_elements()
-            # Sort the hash table
-            # self._sort_schema_elements() ToDo: This function changes the dict to a list. Fix it!
-            return True
-        else:
-            return False
+        with self._lock:
+            return {
+                self._declared_in[t]
+                for t in self._dependencies.get(tag, ())
+                if t in self._declared_in
+            }
+
+    def _detach_model(self):
+        """Snapshot the processed model into plain values and release the parsed schema trees.
+        The ``SchemaType`` rows of all global declarations are precomputed, the type hierarchy is labelled and
+        all references to ``lxml`` elements are dropped, such that only the compact model is kept alive.
+        """
+        self._schema_type_rows = self._get_schema_type_rows()
+        for ocx in self._ocx_global_elements.values():
+            ocx.detach()
+        # The content models of the types not used by any global element
+        for (kind, tag), (fragment, lookups) in self._resolved.items():
+            if kind == "content_model" and fragment is not None:
+                for child in fragment.iter_elements():
+                    child.detach()
+        self._type_hierarchy.detach()
+        self._all_schema_elements = {}
+        self._schema_documents = {}
+        self._documents = []
+        self._locations = {}
+        self._parser = LxmlParser(self.log)
+        self._is_detached = True
+
+    def _get_schema_type_rows(self) -> Dict[str, SchemaType]:
+        """The ``SchemaType`` rows of all global declarations
 
-    def get_schema_folder(self) -> str:
-        """Return the local folder where the schemas are stored. The local folder is relative to the project root.
+        Returns:
+            Hash table with the tag as key and the ``SchemaType`` as value
+
+        """
+        return {
+            tag: self._get_schema_type_data_class(tag)
+            for tags in self._all_types.values()
+            for tag in tags
+        }
+
+    def is_detached(self) -> bool:
+        """Whether the processed model is detached from the parsed schema trees
 
         Returns:
-            The relative path to the local schema folder.
+            True if the model holds only plain values, False otherwise
 
         """
-        return self._local_folder
+        return self._is_detached
+
+    def reprocess_schema(self) -> Union[SchemaDelta, None]:
+        """Incrementally reprocess the last processed schema after any of its schema files has changed.
+
+        Only the schema files with a changed content hash are parsed again. Only the global elements that
+        depend on a modified, added or removed declaration are rebuilt, all other ``OcxGlobalElement`` instances
+        are kept and rebound to the equal nodes of the documents parsed again. The resolved schema fragments
+        not depending on a modified declaration are kept likewise.
+        The schema is processed from scratch if no schema has been processed before.
+        The new look-up tables are built aside and replace the current tables in one step when complete,
+        such that the schema can be reprocessed by a background thread. The current tables are kept if the
+        schema could not be processed. The kept elements are shared with the current model while the new model
+        is built, and are rebound back to the current documents if the reprocess fails.
+        Processing the schema is serialized with any concurrent reprocess.
+        A detached model keeps no parsed documents to reuse, so all schema files are parsed again and all global
+        elements are rebuilt.
+        In lazy element mode the materialized details are discarded, and a global element not materialized
+        since the last reprocess is reported as changed if any declaration is modified.
 
-    def put_schema_folder(self, local_folder: str):
-        """Set the local folder where the schemas are stored. The local folder is relative to the project root."""
-        self._local_folder = local_folder
+        Returns:
+            The ``SchemaDelta`` describing the changes, None if the schema could not be processed
 
-    def put_default_schema(self, schema_url: str):
-        """Return the default schema to be parsed.
+        """
+        with self._processing:
+            work = self._build_aside()
+            if not self._is_parsed or len(self._parsed_files) == 0:
+                if not work._process_schema(self._default_schema):
+                    return None
+                self._publish(work)
+                return SchemaDelta(
+                    added=list(work._ocx_global_elements),
+                    rebuilt=len(work._ocx_global_elements),
+                    files=[url for url, file in work._parsed_files],
+                )
+            for bundle in self._bundles.values():
+                bundle.open()
+            delta = work._reprocess_schema(self._parsed_files[0][0])
+            if delta is None:
+                return None
+            if self._use_cache and not self._lazy_elements:
+                work._store_in_cache(work._parsed_files[0][0])
+            # The kept elements are changed in place, in the same step as the model is replaced
+            with self._lock:
+                if self._lazy_elements:
+                    # The kept elements materialize through the published model
+                    for ocx in work._ocx_global_elements.values():
+                        ocx.put_loader(work._materialize)
+                if self._detached:
+                    work._detach_model()
+                self._publish(work)
+            return delta
+
+    def _reprocess_schema(self, schema_url: str) -> Union[SchemaDelta, None]:
+        """Reprocess the schema reusing the unchanged documents and global elements
 
         Args:
-            schema_url: The location of the schema
+            schema_url: the path or URL to the root xsd file
+
+        Returns:
+            The ``SchemaDelta`` describing the changes, None if the schema could not be processed
 
         """
-        self._default_schema = schema_url
+        start = time.perf_counter()
+        old_documents = self._schema_documents
+        old_elements = self._all_schema_elements
+        old_ocx = self._ocx_global_elements
+        old_namespaces = self._namespaces
+        old_declared_in = self._declared_in
+        old_dependencies = self._dependencies
+        # The fragments of a detached model hold no nodes to rebind. In lazy element mode the fragments are
+        # owned by the materialized elements, which are discarded
+        old_resolved = {} if self._is_detached or self._lazy_elements else self._resolved
+        self._reuse = {
+            url: (self._fingerprints.get(url), document)
+            for url, document in old_documents.items()
+        }
+        try:
+            documents = self._resolve_imports(schema_url)
+        finally:
+            self._reuse = {}
+        if documents is None:
+            return None
+        self._reset_model()
+        self._parser = documents[schema_url][1]
+        self._is_parsed = self._merge_schema(schema_url, documents, set())
+        self._schema_documents = documents
+        if not self._is_parsed:
+            return None
+        self._add_timing("parse", time.perf_counter() - start)
+        start = time.perf_counter()
+        # The schema files parsed again or no longer imported
+        files = {
+            url
+            for url, document in documents.items()
+            if old_documents.get(url) is not document
+        }
+        files |= set(old_documents) - set(documents)
+        # All declarations of the changed files are new elements
+        touched = {tag for tag, url in old_declared_in.items() if url in files}
+        touched |= {tag for tag, url in self._declared_in.items() if url in files}
+        # The declarations with a modified content
+        modified = {
+            tag
+            for tag in touched
+            if tag not in old_elements
+            or tag not in self._all_schema_elements
+            or etree.tostring(old_elements[tag])
+            != etree.tostring(self._all_schema_elements[tag])
+        }
+        rebuild_all = (
+            old_namespaces.get_namespaces() != self._namespaces.get_namespaces()
+            or old_namespaces.get_scopes() != self._namespaces.get_scopes()
+        )
+        # The unmodified declarations of the changed files are parsed again into equal nodes
+        nodes = {}
+        for tag in touched - modified:
+            old, new = old_elements.get(tag), self._all_schema_elements.get(tag)
+            if old is not None and new is not None and old is not new:
+                nodes.update(zip(old.iter(), new.iter()))
+        # The kept elements and fragments are shared with the published model until this model replaces it.
+        # They are rebound back to the nodes of the published model if the reprocess fails.
+        rebound = []
+        try:
+            delta = self._rebuild_elements(
+                old_ocx, old_dependencies, old_resolved, files, touched, modified, nodes, rebuild_all, rebound
+            )
+        except BaseException:
+            previous = {new: old for old, new in nodes.items()}
+            for item in rebound:
+                item.rebind(previous)
+            raise
+        self._add_timing("process", time.perf_counter() - start)
+        return delta
+
+    def _rebuild_elements(
+        self,
+        old_ocx: Dict[str, OcxGlobalElement],
+        old_dependencies: Dict[str, Set[str]],
+        old_resolved: Dict[Tuple[str, Any], Tuple[Any, frozenset]],
+        files: Set[str],
+        touched: Set[str],
+        modified: Set[str],
+        nodes: Dict[Element, Element],
+        rebuild_all: bool,
+        rebound: List,
+    ) -> SchemaDelta:
+        """Rebuild the global elements depending on a modified declaration and keep all others
 
-    def get_default_schema(self) -> str:
-        """Return the default schema to be parsed.
+        Args:
+            old_ocx: The global elements of the previous model
+            old_dependencies: The dependencies of the global elements of the previous model
+            old_resolved: The resolved fragments of the previous model
+            files: The schema files parsed again or no longer imported
+            touched: The tags of all declarations of the changed files
+            modified: The tags of the modified, added and removed declarations
+            nodes: Hash table with the node of the previous model as key and the equal new node as value
+            rebuild_all: If True, all global elements are rebuilt
+            rebound: The kept elements and child elements rebound to the new nodes, extended in place
 
         Returns:
-            The default schema url.
+            The ``SchemaDelta`` describing the changes
 
         """
-        return self._default_schema
+        if not rebuild_all:
+            rebound.extend(self._reuse_fragments(old_resolved, modified, nodes))
+        ocx_elements = {}
+        delta = SchemaDelta(files=sorted(files))
+        for tag in self._get_schema_element_types():
+            dependencies = old_dependencies.get(tag)
+            if (
+                not rebuild_all
+                and tag in old_ocx
+                and dependencies is not None
+                and dependencies.isdisjoint(modified)
+            ):
+                ocx = old_ocx[tag]
+                rebound.append(ocx)
+                ocx.rebind(nodes)
+                ocx_elements[tag] = ocx
+                self._dependencies[tag] = dependencies
+                continue
+            ocx_elements[tag] = self._new_ocx_element(tag)
+            delta.rebuilt += 1
+            if tag not in old_ocx:
+                delta.added.append(tag)
+            elif rebuild_all or not (
+                # The dependencies of a lazy element are unknown until it is materialized
+                self._dependencies.get(tag, touched).isdisjoint(modified)
+                and (dependencies is None or dependencies.isdisjoint(modified))
+            ):
+                delta.changed.append(tag)
+        delta.removed = [tag for tag in old_ocx if tag not in ocx_elements]
+        self._ocx_global_elements = {}
+        for tag, ocx in ocx_elements.items():
+            self._add_global_ocx_element(tag, ocx)
+        self._substitution_groups.build()
+        return delta
 
-    def _parse_schema(self, schema_url: str = DEFAULT_SCHEMA) -> bool:
-        """Parse the OCX xsd schema. The method will traverse any referenced (using the tag xs:import)
-            schemas and parse these also. If the referenced schema url is not a local file,
-            the method will download the file before the schema is parsed.
+    def _reuse_fragments(
+        self,
+        resolved: Dict[Tuple[str, Any], Tuple[Any, frozenset]],
+        modified: Set[str],
+        nodes: Dict[Element, Element],
+    ) -> List[OcxChildElement]:
+        """Keep the resolved schema fragments of the previous model not depending on a modified declaration
 
         Args:
-            schema_url: the path or URL to the xsd file
+            resolved: The resolved fragments of the previous model
+            modified: The tags of the modified, added and removed declarations
+            nodes: Hash table with the node of the previous model as key and the equal new node as value
 
         Returns:
-            True if all schemas are parsed successfully, else returns False
+            The child elements of the kept content models, rebound to the new nodes
 
         """
+        rebound = []
+        for key, entry in resolved.items():
+            kind, tags = key
+            fragment, lookups = entry
+            if not lookups.isdisjoint(modified):
+                continue
+            if not modified.isdisjoint(tags if isinstance(tags, tuple) else (tags,)):
+                continue
+            if isinstance(fragment, OcxContentParticle):
+                for child in fragment.get_elements():
+                    rebound.append(child)
+                    child.rebind(nodes)
+            self._resolved[key] = entry
+        return rebound
+
+    def _resolve(
+        self, kind: str, key: Any, build: Callable[[], Any], cyclic: Any = None
+    ) -> Any:
+        """Memoize a resolved schema fragment shared by the global elements.
+        The tags looked up resolving the fragment are replayed on each use, such that the recorded dependencies
+        of the global elements are complete. A fragment referenced again while it is being resolved is a cyclic
+        reference, which is logged and resolved to ``cyclic`` to stop the recursion.
 
-        if "http" not in schema_url:
-            if not Path(schema_url).exists():
-                self.log.error(f"The xsd file {schema_url} does not exist")
-                return False
-        else:
+        Args:
+            kind: The kind of fragment
+            key: The unique tag, or tuple of tags, of the schema types the fragment is resolved from
+            build: Resolves the fragment
+            cyclic: The fragment used for a cyclic reference
+
+        Returns:
+            The memoized fragment
+
+        """
+        key = (kind, key)
+        entry = self._resolved.get(key)
+        if entry is None:
+            # The fragments being resolved by the calling thread, in resolution order
+            in_progress = getattr(self._recording, "in_progress", None)
+            if in_progress is None:
+                in_progress = self._recording.in_progress = {}
+            if key in in_progress:
+                chain = list(in_progress)
+                cycle = [str(k[1]) for k in chain[chain.index(key):]] + [str(key[1])]
+                self.log.warning(f'Cyclic {kind} reference: {" -> ".join(cycle)}')
+                return cyclic
+            in_progress[key] = None
+            outer = getattr(self._recording, "lookups", None)
+            self._recording.lookups = set()
             try:
-                remote_file = Path(schema_url).name
-                file = Path(self._local_folder) / remote_file
-                r = requests.get(schema_url)
-                with open(file, "wb") as f:
-                    f.write(r.content)
-                self.log.debug(
-                    f'Successfully downloaded remote schema "{schema_url}" '
-                    f'to local folder "{self._local_folder}"'
-                )
-                schema_url = file
-            except HTTPError as e:
-                self.log.error(f'Failed to access schema from "{schema_url}: {e}""')
-                return False
-        try:
-            self._is_parsed = self._parser.parse(schema_url)
-        except BaseException as e:
-            self.log.error(e.with_traceback)
-            return False
-        if self._is_parsed:
-            self.log.debug(
-                f'Successfully parsed xsd schema with location "{schema_url}"'
+                fragment = build()
+            finally:
+                lookups = self._recording.lookups
+                self._recording.lookups = outer
+                del in_progress[key]
+            entry = (fragment, frozenset(lookups))
+            self._resolved[key] = entry
+        lookups = getattr(self._recording, "lookups", None)
+        if lookups is not None:
+            lookups.update(entry[1])
+        fragments = getattr(self._recording, "fragments", None)
+        if fragments is not None:
+            fragments.add(key)
+        return entry[0]
+
+    def _own_attributes(self, schema_element: Element) -> Tuple[OcxAttribute, ...]:
+        """The ``xs:attribute`` elements declared by a schema element"""
+        return tuple(
+            self._process_attribute(a)
+            for a in LxmlElement.find_attributes(schema_element)
+        )
+
+    def _group_attributes(self, ref: str, context: Element) -> Tuple[OcxAttribute, ...]:
+        """The attributes of an ``xs:attributeGroup`` referenced by the schema element ``context``"""
+        tag, at_group = self._get_element_from_type(ref, context)
+        if at_group is None:
+            self.log.error(
+                f"Attribute group {ref} is not found in the global look-up table"
             )
-            root = self._parser.get_root()
-            ns = self._parser.get_namespaces()
-            # Add the ns to the global namespace dict
-            n = self._add_namespace(ns)
-            # The target namespace for the current schema
-            target_ns = self._parser.get_target_namespace()
-            if target_ns not in self._namespace.values():
-                self.log.error(
-                    f'The target _namespace "{target_ns}" is not registered in the _namespace listing {self._namespace}'
-                )
-                self._is_parsed = False
-                return False
-            # Retrieve the OCX schema version
-            version = SchemaHelper.get_schema_version(root)
-            if version != "Missing":
-                self._schema_version = version
-            self.log.debug(f'Added {n} new namespaces for schema "{schema_url}"')
-            if LxmlElement.has_child_with_name(root, "SchemaChange"):
-                changes = SchemaHelper.find_schema_changes(root)
-                if len(changes) > 0:
-                    self._schema_changes = changes
-            # Build the look-up tables for all global element types
-            for (
-                schema_type
-            ) in self._schema_types:  # Only search for selected element types
-                types = LxmlElement.find_all_children_with_name_and_attribute(
-                    root, schema_type, "name"
-                )
-                for e in types:
-                    # Add element to look-up table
-                    name = LxmlElement.get_name(e)
-                    if name is not None:
-                        # add the schema type
-                        tag = SchemaHelper.unique_tag(name, target_ns)
-                        schema_type = LxmlElement.get_localname(e)
-                        # Only process the selected element types and store in hash tables
-                        if schema_type in self._schema_types:
-                            self._add_schema_element(tag, e)
-                            self._add_schema_type(schema_type, tag)
-            # Parse any imported schemas
-            references = self._parser.get_referenced_files()
-            for ns in references:
-                url = references[ns]
-                self._is_parsed = self._parse_schema(url)
-                if self._is_parsed:
-                    if ns not in list(self.get_namespaces().values()):
-                        self.log.error(
-                            f'Mismatched _namespace "{ns}" in xsd with url: "{url}"'
-                        )
-                else:
-                    break
-        return self._is_parsed
+            return ()
+        return self._resolve(
+            "attribute_group", tag, lambda: self._own_attributes(at_group)
+        )
 
-    def is_parsed(self) -> bool:
-        return self._is_parsed
+    def _own_attribute_groups(
+        self, schema_element: Element
+    ) -> Tuple[OcxAttribute, ...]:
+        """The attributes of all ``xs:attributeGroup`` elements referenced by a schema element"""
+        attributes = ()
+        for group in LxmlElement.find_attribute_groups(schema_element):
+            # Get the reference
+            ref = LxmlElement.get_reference(group)
+            if ref is not None:
+                attributes += self._group_attributes(ref, group)
+        return attributes
 
-    def _process_ocx_elements(self):
-        """Process all parsed elements and build the hash table of OcxSchemaElement"""
-        # All schema elements of type element
-        elements = self._get_schema_element_types()
-        for tag in elements:
-            e = self._get_element(tag)
-            qn = QName(tag)
-            name = qn.localname
-            self.log.debug(f"Adding global element {name}")
-            ocx = OcxGlobalElement(e, tag, self.log)
-            # store in look-up table
-            self._add_global_ocx_element(tag, ocx)
-            # Find all parents and add them to the instance
-            self._find_all_my_parents(ocx)
-            # Process all xs:attribute elements including all supertypes
-            self._process_attributes(ocx)
-            # Process ald children including super type children
-            self._process_children(ocx)
-        return
+    def _inherited_attributes(self, parents: Dict) -> Tuple[Tuple[OcxAttribute, ...], ...]:
+        """The flattened attributes of all parent types in the order of the parents
+
+        Args:
+            parents: The parents of the global element, nearest first
+
+        Returns:
+            The tuple ``(plain attributes, attribute group attributes, all attributes)`` shared by all global
+            elements with the same parents. All plain attributes precede the attribute group attributes.
+
+        """
+        attributes = ()
+        groups = ()
+        for tag, element in parents.items():
+            attributes += self._resolve(
+                "attributes", tag, lambda: self._own_attributes(element)
+            )
+            groups += self._resolve(
+                "attribute_groups", tag, lambda: self._own_attribute_groups(element)
+            )
+        return attributes, groups, attributes + groups
 
     def _process_attributes(self, ocx: OcxGlobalElement):
-        """Process all xs:attributes of the global element
+        """Process all xs:attributes of the global element including the attributes of all supertypes.
+        The attributes of the supertypes are resolved once per type and shared with all global elements
+        of the same type.
 
         Args:
             ocx: The parent OCX element
 
         """
-
-        # Process all xs:attribute elements including all supertypes
-        attributes = LxmlElement.find_attributes(ocx.get_schema_element())
-        for a in attributes:
-            ocx.add_attribute(self._process_attribute(a))
-        # Iterate over parents
-        parents = ocx.get_parents()
-        for t in parents:
-            attributes = LxmlElement.find_attributes(parents[t])
-            for a in attributes:
-                ocx.add_attribute(self._process_attribute(a))
-        # Process all xs:attributeGroup elements including all supertypes attributeGroups
-        groups = LxmlElement.find_attribute_groups(ocx.get_schema_element())
-        for group in groups:
-            # Get the reference
-            ref = LxmlElement.get_reference(group)
-            if ref is not None:
-                tag, at_group = self._get_element_from_type(ref)
-                if at_group is not None:
-                    attributes = LxmlElement.find_attributes(at_group)
-                    for a in attributes:
-                        ocx.add_attribute(self._process_attribute(a))
-                else:
-                    self.log.error(
-                        f"Attribute group {ref} is not found in the global look-up table"
-                    )
-        # Iterate over parents
         parents = ocx.get_parents()
-        for t in parents:
-            groups = LxmlElement.find_attribute_groups(parents[t])
-            for group in groups:
-                # Get the reference
-                ref = LxmlElement.get_reference(group)
-                if ref is not None:
-                    tag, at_group = self._get_element_from_type(ref)
-                    if at_group is not None:
-                        attributes = LxmlElement.find_attributes(at_group)
-                        for a in attributes:
-                            ocx.add_attribute(self._process_attribute(a))
-                    else:
-                        self.log.error(
-                            f"Attribute group {ref} is not found in the global look-up table"
-                        )
+        inherited_attributes, inherited_groups, inherited = self._resolve(
+            "inherited_attributes",
+            tuple(parents),
+            lambda: self._inherited_attributes(parents),
+        )
+        schema_element = ocx.get_schema_element()
+        attributes = self._own_attributes(schema_element)
+        groups = self._own_attribute_groups(schema_element)
+        if len(attributes) == 0 and len(groups) == 0:
+            ocx.put_attributes(inherited)
+        else:
+            ocx.put_attributes(
+                attributes + inherited_attributes + groups + inherited_groups
+            )
         return
 
     def _process_children(self, ocx: OcxGlobalElement):
-        """Process all xs:element of the global element
+        """Process the effective content model of the global element.
+        The children are the elements of the content model including the content of all base types.
 
         Args:
             ocx: The parent OCX element
 
         """
-
-        # Process all xs:element elements including all supertypes
-        elements = LxmlElement.find_all_children_with_name(
-            ocx.get_schema_element(), "element"
+        ocx.put_content_model(
+            self._content_model(ocx.get_tag(), ocx.get_schema_element())
         )
-        for e in elements:
-            ocx.add_child(self._process_child(e))
-        # Iterate over parents
-        parents = ocx.get_parents()
-        for t in parents:
-            elements = LxmlElement.find_all_children_with_name(parents[t], "element")
-            for e in elements:
-                ocx.add_child(self._process_child(e))
         return
 
+    def get_content_model(self, tag: str) -> Union[OcxContentParticle, None]:
+        """The effective content model of a global element or complex type
+
+        Args:
+            tag: The unique tag of the global element or complex type
+
+        Returns:
+            The root particle of the content model shared by all elements of the type,
+            None if the declaration has no element content
+
+        """
+        with self._lock:
+            if self._is_detached:
+                entry = self._resolved.get(("content_model", tag))
+                return None if entry is None else entry[0]
+            e = self._get_element(tag)
+            if e is None:
+                return None
+            return self._content_model(tag, e)
+
+    def _type_content_model(
+        self, tag: str, schema_element: Element
+    ) -> Union[OcxContentParticle, None]:
+        """The content model of a parent type indexed by the where-used index.
+        The look-ups are not recorded as dependencies of a global element being built.
+        """
+        outer = getattr(self._recording, "lookups", None)
+        self._recording.lookups = None
+        try:
+            return self._content_model(tag, schema_element)
+        finally:
+            self._recording.lookups = outer
+
+    def _content_model(
+        self, tag: str, schema_element: Element
+    ) -> Union[OcxContentParticle, None]:
+        """The memoized content model of a global declaration"""
+        return self._resolve(
+            "content_model",
+            tag,
+            lambda: self._compile_content_model(schema_element),
+            EMPTY_PARTICLE,
+        )
+
+    def _compile_content_model(
+        self, schema_element: Element
+    ) -> Union[OcxContentParticle, None]:
+        """Compile the effective content model of an element or complex type.
+        The content model of a type derived by extension is the sequence of the content model of the base type
+        followed by the particles of the extension. A restriction replaces the content model of the base type.
+
+        Args:
+            schema_element: The ``xs:element`` or ``xs:complexType``
+
+        Returns:
+            The root particle of the content model, None if the declaration has no element content
+
+        """
+        kind = QName(schema_element).localname
+        if kind == "element":
+            inline = next(schema_element.iterchildren("{*}complexType"), None)
+            if inline is not None:
+                return self._compile_content_model(inline)
+            schema_type = schema_element.get("type")
+            if schema_type is None:
+                return None
+            tag, type_element = self._get_element_from_type(schema_type, schema_element)
+            if type_element is None:
+                return None
+            return self._content_model(tag, type_element)
+        if kind != "complexType":
+            return None
+        content = next(schema_element.iterchildren("{*}complexContent"), None)
+        if content is None:
+            return self._compile_particle(self._model_group(schema_element))
+        derivation = next(content.iterchildren("{*}extension", "{*}restriction"), None)
+        if derivation is None:
+            return None
+        own = self._compile_particle(self._model_group(derivation))
+        if QName(derivation).localname == "restriction":
+            return own
+        tag, base = self._get_element_from_type(derivation.get("base"), derivation)
+        base_model = None if base is None else self._content_model(tag, base)
+        if base_model is None:
+            return own
+        if own is None:
+            return base_model
+        return OcxContentParticle("sequence", (1, 1), (base_model, own))
+
+    @staticmethod
+    def _model_group(schema_element: Element) -> Union[Element, None]:
+        """The top level model group or model group reference of a complex type or derivation"""
+        return next(
+            schema_element.iterchildren(*MODEL_GROUPS),
+            None,
+        )
+
+    @staticmethod
+    def _occurs(schema_element: Element) -> Tuple[int, Union[int, str]]:
+        """The ``(minOccurs, maxOccurs)`` of a particle"""
+        upper = schema_element.get("maxOccurs", "1")
+        return (
+            int(schema_element.get("minOccurs", "1")),
+            upper if upper == "unbounded" else int(upper),
+        )
+
+    def _compile_particle(
+        self, schema_element: Union[Element, None]
+    ) -> Union[OcxContentParticle, None]:
+        """Compile a particle and all its nested particles
+
+        Args:
+            schema_element: The ``xs:sequence``, ``xs:choice``, ``xs:all``, ``xs:group``, ``xs:element``
+                or ``xs:any``
+
+        Returns:
+            The particle, None if the model group is empty or an unresolved reference
+
+        """
+        if schema_element is None:
+            return None
+        kind = QName(schema_element).localname
+        cardinality = self._occurs(schema_element)
+        if kind == "element":
+            return OcxContentParticle(
+                kind, cardinality, element=self._process_child(schema_element)
+            )
+        if kind == "any":
+            return OcxContentParticle(kind, cardinality)
+        if kind == "group":
+            ref = LxmlElement.get_reference(schema_element)
+            tag, group = self._get_element_from_type(ref, schema_element)
+            if group is None:
+                self.log.error(
+                    f"Model group {ref} is not found in the global look-up table"
+                )
+                return None
+            particle = self._resolve(
+                "model_group",
+                tag,
+                lambda: self._compile_particle(self._model_group(group)),
+                EMPTY_PARTICLE,
+            )
+            if particle is None:
+                return None
+            # The occurrence of the group reference applies to the model group
+            return OcxContentParticle(
+                particle.get_kind(), cardinality, particle.get_particles()
+            )
+        particles = tuple(
+            particle
+            for particle in (
+                self._compile_particle(child)
+                for child in schema_element.iterchildren(*PARTICLES)
+            )
+            if particle is not None
+        )
+        if len(particles) == 0:
+            return None
+        return OcxContentParticle(kind, cardinality, particles)
+
     def _process_attribute(self, xs_attribute: Element) -> OcxAttribute:
         """Process an xs:attribute element
 
@@ -351,7 +1972,7 @@ class OcxSchema:
         reference = LxmlElement.get_reference(xs_attribute)
         if reference is not None:
             # Get the referenced element
-            tag, a = self._get_element_from_type(reference)
+            tag, a = self._get_element_from_type(reference, xs_attribute)
             attribute.put_name(LxmlElement.get_name(a))
             if attribute.get_description() == "":
                 attribute.put_description(LxmlElement.get_element_text(a))
@@ -369,7 +1990,7 @@ class OcxSchema:
         reference = LxmlElement.get_reference(xs_element)
         if reference is not None:
             # Get the referenced element
-            tag, a = self._get_element_from_type(reference)
+            tag, a = self._get_element_from_type(reference, xs_element)
             child.put_name(LxmlElement.get_name(a))
             if child.get_description() == "":
                 child.put_description(LxmlElement.get_element_text(a))
@@ -389,66 +2010,83 @@ class OcxSchema:
                 f"{__class__}: The tag {tag} is a built-in type {self._builtin_xs_types[tag]}"
             )
             return None
+        if self._pending_imports:
+            self._ensure_namespace(QName(tag).namespace)
+        lookups = getattr(self._recording, "lookups", None)
+        if lookups is not None:
+            lookups.add(tag)
         if tag not in self._all_schema_elements.keys():
             self.log.debug(f"{__class__}: The tag {tag} is not in the look-up table")
         return self._all_schema_elements.get(tag)
 
-    def _get_element_from_type(self, schema_type: str) -> Tuple[Any, Any]:
+    def _get_element_from_type(
+        self, schema_type: str, context: Element = None
+    ) -> Tuple[Any, Any]:
         """Private method to retrieve the schema element ``etree.Element`` with the key 'type'
 
+        Args:
+            schema_type: The type on the form ``prefix:name``
+            context: The schema element referencing the type. The prefix is resolved in the scope of its document.
+
         Returns:
             A tuple of the element unique tag and the element (tag, Element)
 
         """
-        name = LxmlElement.strip_namespace_prefix(schema_type)
-        if LxmlElement.namespace_prefix(schema_type) in self._namespace:
-            namespace = self._namespace[LxmlElement.namespace_prefix(schema_type)]
-        else:
+        location = None if context is None else self._location_of(context)
+        qname = self._namespaces.resolve_qname(schema_type, location)
+        if qname is None:
             self.log.debug(f"The type {schema_type} has an unknown _namespace prefix")
             return None, None
-        tag = SchemaHelper.unique_tag(name, namespace)
+        namespace, tag = qname
         if tag in self._builtin_xs_types:
             self.log.debug(
                 f"The tag {tag} is a built-in type {self._builtin_xs_types[tag]}"
             )
             return None, None
+        if self._pending_imports:
+            self._ensure_namespace(namespace)
+        lookups = getattr(self._recording, "lookups", None)
+        if lookups is not None:
+            lookups.add(tag)
         if tag not in self._all_schema_elements:
             self.log.debug(f"{__class__}: The tag {tag} is not in the look-up table")
             return None, None
         else:
             return tag, self._all_schema_elements.get(tag)
 
-    def _find_parents(self, child_tag: str, ocx: OcxGlobalElement):
-        """Recursively find all ancestors of the global element ``OxcGlobalElement``
+    def _get_type_parent(self, tag: str) -> Union[Tuple[str, Element], None]:
+        """Resolve the parent type of a global declaration
 
         Args:
-            child_tag: The unique tag of a child
-            ocx: The global element (the root to start the search from)
+            tag: The unique tag of the declaration
+
+        Returns:
+            The tuple ``(parent tag, parent element)``, None if the declaration has no parent type
 
         """
-        # Look up the xsd element
-        ocx.get_name()
-        e = self._get_element(child_tag)
-        if e is not None:
+        outer = getattr(self._recording, "lookups", None)
+        self._recording.lookups = set()
+        try:
+            # Look up the xsd element
+            e = self._get_element(tag)
+            if e is None:
+                return None
             # The element's type is the parent
-            schema_type = SchemaHelper.get_type(e)
-            if schema_type is not None:
-                # Look up the parent xsd element from its type
-                parent_tag, parent_element = self._get_element_from_type(schema_type)
-                # Add the parent to the global ocx
-                if parent_tag is not None:
-                    ocx.put_parent(parent_tag, parent_element)
-                    assertion = LxmlElement.find_assertion(parent_element)
-                    if assertion is not None:
-                        ocx.add_assertion(assertion)
-                    self._find_parents(parent_tag, ocx)
-            else:
-                return
-        return
+            parent_tag = SchemaHelper.get_type_tag(
+                e, self._namespaces, self._declared_in.get(tag)
+            )
+            if parent_tag is None:
+                return None
+            # Look up the parent xsd element from its type
+            parent_element = self._get_element(parent_tag)
+            return None if parent_element is None else (parent_tag, parent_element)
+        finally:
+            self._type_lookups[tag] = frozenset(self._recording.lookups)
+            self._recording.lookups = outer
 
     def _find_all_my_parents(self, ocx: OcxGlobalElement):
-        """Recursively find all the xsd schema parents of a global xsd element(parent, grandparent ...)
-        The parents found is added to the ocx instance (child)
+        """Find all the xsd schema parents of a global xsd element(parent, grandparent ...)
+        The parents are read from the type hierarchy and shared with all elements of the same type.
 
         Args:
             ocx: The global ocx instance to search from
@@ -456,40 +2094,70 @@ class OcxSchema:
         """
         # Get the unique tag of the global element
         tag = ocx.get_tag()
-        # Find my parents
-        self._find_parents(tag, ocx)
+        hierarchy = self._type_hierarchy
+        parents = hierarchy.get_ancestors(tag)
+        ocx.put_parents(parents)
+        for parent_tag, parent_element in parents.items():
+            assertion = hierarchy.get_assertion(parent_tag, parent_element)
+            if assertion is not None:
+                ocx.add_assertion(assertion)
+        # Record the look-ups of the shared ancestors for the incremental reprocess
+        lookups = getattr(self._recording, "lookups", None)
+        if lookups is not None:
+            lookups.add(tag)
+            for t in (tag, *parents):
+                lookups.update(self._type_lookups.get(t, ()))
 
     def get_ocx_element_from_type(
-        self, schema_type: str
+        self, schema_type: str, location: str = None
     ) -> Union[OcxGlobalElement, None]:
         """Method to retrieve the schema ``element etree.Element`` with the key 'type'
 
         Args:
             schema_type: the ocx type on the form ``prefix:name``
+            location: The schema location of the document scoping the prefix. The global scope is used if None.
 
         Returns:
             The ``OcxGlobalElement`` instance
 
         """
-        nsprefix = LxmlElement.namespace_prefix(schema_type)
-        name = LxmlElement.strip_namespace_prefix(schema_type)
-        if nsprefix not in self._namespace.values():
-            for prefix in self._namespace:
-                if prefix == LxmlElement.namespace_prefix(schema_type):
-                    namespace = self._namespace[prefix]
-                    tag = SchemaHelper.unique_tag(name, namespace)
-                    if tag not in self._all_schema_elements:
-                        self.log.debug(
-                            f"{__class__}: The tag {tag} is not in the look-up table"
-                        )
-                        return None
-                    else:
-                        return self._ocx_global_elements[tag]
-        else:
-            self.log.debug(
-                f'{__class__}: The _namespace prefix  "{nsprefix}" is not defined'
-            )
-            return None
+        with self._lock:
+            qname = self._namespaces.resolve_qname(schema_type, location)
+            if qname is None:
+                self.log.debug(
+                    f'{__class__}: The _namespace prefix  "{LxmlElement.namespace_prefix(schema_type)}" '
+                    f"is not defined"
+                )
+                return None
+            namespace, tag = qname
+            self._ensure_namespace(namespace)
+            if tag not in self._all_schema_elements and tag not in self._ocx_global_elements:
+                self.log.debug(f"{__class__}: The tag {tag} is not in the look-up table")
+                return None
+            return self._get_ocx_element(tag)
+
+    def _get_ocx_element(self, tag: str) -> OcxGlobalElement:
+        """The global element with the unique tag. In lazy mode, the global elements of lazily loaded schemas
+        are built on first access.
+
+        Args:
+            tag: The unique tag of the global element
+
+        Returns:
+            The ``OcxGlobalElement`` instance
+
+        """
+        ocx = self._ocx_global_elements.get(tag)
+        if ocx is None and self._lazy:
+            with self._lock:
+                ocx = self._ocx_global_elements.get(tag)
+                e = self._all_schema_elements.get(tag)
+                if ocx is None and e is not None and QName(e).localname == "element":
+                    ocx = self._new_ocx_element(tag)
+                    self._add_global_ocx_element(tag, ocx)
+        if ocx is None:
+            raise KeyError(tag)
+        return ocx
 
     def _get_prefix_from_namespace(self, namespace: str) -> str:
         """Return the namespace prefix
@@ -498,46 +2166,30 @@ class OcxSchema:
             the namespace prefix
 
         """
-        prefix = "None"
-        if namespace not in list(self._namespace.values()):
+        if not self._namespaces.has_namespace(namespace):
             self.log.debug(
                 f"The _namespace {namespace} is not in the global _namespace dict"
             )
-        for item in self._namespace:
-            if namespace == self._namespace[item]:
-                prefix = item
-        return prefix
+            return "None"
+        return self._namespaces.get_prefix(namespace)
 
-    def _add_namespace(self, namespace: dict) -> int:
-        """Add new namespaces to the global namespace dict'
+    def get_namespaces(self) -> Dict:
+        """The parsed namespaces'
 
         Returns:
-            The number of new namespaces added
+            The dict of namespaces as (namespace,prefix) key-value pairs
 
         """
-        ns = self._namespace
-        # Check if any keys exists
-        for prefix in ns:
-            if prefix in namespace.keys():
-                self.log.debug(
-                    f'The _namespace prefix "{prefix}" already exists. '
-                    f"Dropping new _namespace {namespace[prefix]} from the _namespace table"
-                )
-                self.log.debug(
-                    f'The existing _namespace with prefix "{prefix}" is: {self._namespace[prefix]}'
-                )
-                del namespace[prefix]
-        self._namespace = {**self._namespace, **namespace}
-        return len(self._namespace) - len(ns)
+        return self._namespaces.get_namespaces()
 
-    def get_namespaces(self) -> Dict:
-        """The parsed namespaces'
+    def get_namespace_registry(self) -> NamespaceRegistry:
+        """The namespace registry of the last processed schema
 
         Returns:
-            The dict of namespaces as (namespace,prefix) key-value pairs
+            The ``NamespaceRegistry`` with the prefixes of all parsed schema documents
 
         """
-        return self._namespace
+        return self._namespaces
 
     def _get_all_schema_elements(self) -> Dict:
         """All ``lxml.etree.Element`` schema elements
@@ -644,12 +2296,14 @@ class OcxSchema:
             The schema summary
         """
 
-        schema_version = [("Schema Version", self.get_schema_version())]
-        schema_types = [
-            (schema_type, len(self._all_types[schema_type]))
-            for schema_type in self._all_types
-        ]
-        namespaces = [(ns, self._namespace[ns]) for ns in self._namespace]
+        with self._lock:
+            schema_version = [("Schema Version", self.get_schema_version())]
+            schema_types = [
+                (schema_type, len(self._all_types[schema_type]))
+                for schema_type in self._schema_types
+                if schema_type in self._all_types
+            ]
+            namespaces = list(self._namespaces.get_namespaces().items())
         return SchemaSummary(schema_version, schema_types, namespaces)
 
     def tbl_attribute_groups(self) -> Dict:
@@ -661,9 +2315,10 @@ class OcxSchema:
         """
 
         table = {}
-        elements = self._get_schema_attribute_group_types()
-        for tag in elements:
-            table[tag] = self._get_schema_type_data_class(tag).to_dict()
+        with self._lock:
+            elements = self._get_schema_attribute_group_types()
+            for tag in elements:
+                table[tag] = self._get_schema_type_data_class(tag).to_dict()
         return table
 
     def tbl_simple_types(self) -> Dict:
@@ -676,9 +2331,10 @@ class OcxSchema:
         """
 
         table = {}
-        elements = self._get_schema_simple_types()
-        for tag in elements:
-            table[tag] = self._get_schema_type_data_class(tag).to_dict()
+        with self._lock:
+            elements = self._get_schema_simple_types()
+            for tag in elements:
+                table[tag] = self._get_schema_type_data_class(tag).to_dict()
         return table
 
     def tbl_attribute_types(self) -> Dict:
@@ -690,9 +2346,10 @@ class OcxSchema:
         """
 
         table = {}
-        elements = self._get_schema_attribute_tyepes()
-        for tag in elements:
-            table[tag] = self._get_schema_type_data_class(tag).to_dict()
+        with self._lock:
+            elements = self._get_schema_attribute_tyepes()
+            for tag in elements:
+                table[tag] = self._get_schema_type_data_class(tag).to_dict()
         return table
 
     def tbl_element_types(self) -> Dict:
@@ -704,9 +2361,10 @@ class OcxSchema:
         """
 
         table = {}
-        elements = self._get_schema_element_types()
-        for tag in elements:
-            table[tag] = self._get_schema_type_data_class(tag).to_dict()
+        with self._lock:
+            elements = self._get_schema_element_types()
+            for tag in elements:
+                table[tag] = self._get_schema_type_data_class(tag).to_dict()
         return table
 
     def tbl_complex_types(self) -> Dict:
@@ -718,9 +2376,10 @@ class OcxSchema:
         """
 
         table = {}
-        elements = self._get_schema_complex_types()
-        for tag in elements:
-            table[tag] = self._get_schema_type_data_class(tag).to_dict()
+        with self._lock:
+            elements = self._get_schema_complex_types()
+            for tag in elements:
+                table[tag] = self._get_schema_type_data_class(tag).to_dict()
         return table
 
     def _get_schema_type_data_class(self, tag: str) -> SchemaType:
@@ -732,7 +2391,9 @@ class OcxSchema:
 
                 A ``dataclass`` with the attributes of the element with the ``tag``
         '"""
-
+        row = self._schema_type_rows.get(tag)
+        if row is not None:
+            return row
         e = self._get_element(tag)
         qn = QName(tag)
         prefix = self._get_prefix_from_namespace(qn.namespace)
@@ -0,0 +1,135 @@
+#  Copyright (c) 2023.  OCX Consortium https://3docx.org. See the LICENSE
+
+from collections import defaultdict
+from logging import Logger
+from typing import Dict, List, Union
+
+
+class SubstitutionGroupIndex:
+    """The substitution groups of the processed schema.
+
+    Each global element with a ``substitutionGroup`` attribute is a direct member of the group of its head.
+    The members of a member are transitive members of the head. The transitive members of each head are resolved
+    once on first use and kept until a new element is added.
+
+    Args:
+        logger: The main python logger
+
+    Attributes:
+        _heads: Hash table with the element tag as key and the tag of its substitution group head as value
+        _direct: Hash table with the head tag as key and the tags of its direct members as value
+        _abstract: The tags of the abstract elements
+        _members: Hash table with the head tag as key and the resolved tags of all its transitive members as value
+
+    """
+
+    def __init__(self, logger: Logger):
+        self.log = logger
+        self._heads = {}
+        self._direct = defaultdict(list)
+        self._abstract = set()
+        self._members = {}
+
+    def add(self, tag: str, head: Union[str, None], abstract: bool):
+        """Add a global element to the index
+
+        Args:
+            tag: The unique tag of the global element
+            head: The unique tag of the substitution group head, None if the element is not a member of a group
+            abstract: Whether the element is abstract
+
+        """
+        if abstract:
+            self._abstract.add(tag)
+        if head is not None:
+            self._heads[tag] = head
+            self._direct[head].append(tag)
+            self._members = {}
+
+    def build(self):
+        """Resolve the transitive members of all substitution group heads"""
+        for head in self._direct:
+            self.get_members(head)
+
+    def get_head(self, tag: str) -> Union[str, None]:
+        """The head of the substitution group of an element
+
+        Args:
+            tag: The unique tag of the global element
+
+        Returns:
+            The unique tag of the head, None if the element is not a member of a substitution group
+
+        """
+        return self._heads.get(tag)
+
+    def get_heads(self, tag: str) -> List[str]:
+        """All heads the element can substitute, directly or through the head of its head
+
+        Args:
+            tag: The unique tag of the global element
+
+        Returns:
+            The tags of the heads, nearest first
+
+        """
+        heads = []
+        head = self._heads.get(tag)
+        while head is not None and head not in heads and head != tag:
+            heads.append(head)
+            head = self._heads.get(head)
+        return heads
+
+    def get_members(self, head: str, transitive: bool = True) -> List[str]:
+        """The members of a substitution group
+
+        Args:
+            head: The unique tag of the substitution group head
+            transitive: If True, the members of the member groups are included
+
+        Returns:
+            The tags of the members in processing order, depth first
+
+        """
+        if not transitive:
+            return list(self._direct.get(head, ()))
+        members = self._members.get(head)
+        if members is None:
+            members = []
+            seen = {head}
+            stack = list(reversed(self._direct.get(head, ())))
+            while stack:
+                tag = stack.pop()
+                if tag in seen:
+                    self.log.warning(f"Cyclic substitution group of {tag}")
+                    continue
+                seen.add(tag)
+                members.append(tag)
+                stack.extend(reversed(self._direct.get(tag, ())))
+            self._members[head] = members
+        return list(members)
+
+    def get_concrete_members(self, head: str) -> List[str]:
+        """The members of a substitution group that are not abstract and may appear in a document
+
+        Args:
+            head: The unique tag of the substitution group head
+
+        Returns:
+            The tags of the concrete transitive members
+
+        """
+        return [tag for tag in self.get_members(head) if tag not in self._abstract]
+
+    def is_abstract(self, tag: str) -> bool:
+        """Whether the global element is abstract"""
+        return tag in self._abstract
+
+    def get_groups(self) -> Dict[str, List[str]]:
+        """All substitution groups
+
+        Returns:
+            Hash table with the head tag as key and the tags of its transitive members as value
+
+        """
+        return {head: self.get_members(head) for head in self._direct}
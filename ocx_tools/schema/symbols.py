@@ -0,0 +1,171 @@
+#  Copyright (c) 2023.  OCX Consortium https://3docx.org. See the LICENSE
+
+import sys
+from array import array
+from typing import Iterable, List, Tuple, Union
+
+
+class SymbolTable:
+    """Interns unique tags to dense integer identifiers.
+
+    The identifiers are assigned in the order the tags are first interned, starting from zero.
+    The tags are stored as interned python strings. The schema reader interns the tags and attribute names
+    indexed by the ``WhereUsedIndex`` only. The look-up tables of the global declarations, the parents of the
+    global elements, the references of the child elements and the ``TypeHierarchy`` are keyed by the tags
+    themselves.
+
+    Attributes:
+        _ids: Hash table with the tag as key and the identifier as value
+        _tags: The interned tags indexed by identifier
+
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._tags = []
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self._ids
+
+    def intern(self, tag: str) -> int:
+        """The identifier of a tag, assigning the next identifier to a new tag
+
+        Args:
+            tag: The unique tag on the form ``{namespace}name`` or a plain name
+
+        Returns:
+            The integer identifier of the tag
+
+        """
+        symbol = self._ids.get(tag)
+        if symbol is None:
+            symbol = len(self._tags)
+            tag = sys.intern(tag)
+            self._ids[tag] = symbol
+            self._tags.append(tag)
+        return symbol
+
+    def get_id(self, tag: str) -> Union[int, None]:
+        """The identifier of an interned tag, None if the tag is not interned"""
+        return self._ids.get(tag)
+
+    def get_tag(self, symbol: int) -> str:
+        """The tag of an identifier"""
+        return self._tags[symbol]
+
+    def get_tags(self, symbols: Iterable[int]) -> List[str]:
+        """The tags of the identifiers in the same order"""
+        tags = self._tags
+        return [tags[symbol] for symbol in symbols]
+
+    def get_name(self, symbol: int) -> str:
+        """The local name of the tag of an identifier"""
+        return self._tags[symbol].rpartition("}")[2]
+
+    def get_namespace(self, symbol: int) -> str:
+        """The namespace of the tag of an identifier, an empty string for a plain name"""
+        tag = self._tags[symbol]
+        return tag[1:].partition("}")[0] if tag.startswith("{") else ""
+
+
+class RelationTable:
+    """A directed relation between interned symbols stored in compact integer arrays.
+
+    The pairs are appended to two parallel arrays. On the first query the pairs are indexed by source and by
+    target in compressed sparse row layout, such that the targets of a source and the sources of a target
+    are contiguous slices. The index is rebuilt on the next query after new pairs are added.
+    Repeated pairs are dropped when indexing and the pairs of each source or target keep the order they were
+    first added in. The table suits a relation that is filled before it is queried, such as the where-used
+    index. A relation queried between additions, such as the parents resolved on demand by the ``TypeHierarchy``,
+    would rebuild the index on every query.
+
+    Attributes:
+        _sources: The source symbols of the pairs
+        _targets: The target symbols of the pairs
+        _forward: The tuple ``(offsets, targets)`` indexed by source, None if not indexed
+        _backward: The tuple ``(offsets, sources)`` indexed by target, None if not indexed
+
+    """
+
+    def __init__(self):
+        self._sources = array("I")
+        self._targets = array("I")
+        self._forward = None
+        self._backward = None
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    def add(self, source: int, target: int):
+        """Add the pair ``(source, target)`` to the relation"""
+        self._sources.append(source)
+        self._targets.append(target)
+        self._forward = None
+        self._backward = None
+
+    @staticmethod
+    def _index(keys: array, values: array) -> Tuple[array, array]:
+        """Index the unique values by key with a stable counting sort
+
+        Returns:
+            The tuple ``(offsets, values)``. The values of a key are ``values[offsets[key]:offsets[key + 1]]``.
+
+        """
+        size = max(keys) + 2 if len(keys) > 0 else 1
+        offsets = array("I", bytes(4 * size))
+        for key in keys:
+            offsets[key + 1] += 1
+        for i in range(1, size):
+            offsets[i] += offsets[i - 1]
+        position = array("I", offsets)
+        ordered = array("I", bytes(4 * len(values)))
+        for key, value in zip(keys, values):
+            ordered[position[key]] = value
+            position[key] += 1
+        # Drop the repeated values of each key
+        unique = array("I")
+        start = 0
+        for key in range(size - 1):
+            end = offsets[key + 1]
+            unique.extend(dict.fromkeys(ordered[start:end]))
+            start = end
+            offsets[key + 1] = len(unique)
+        return offsets, unique
+
+    @staticmethod
+    def _slice(index: Tuple[array, array], key: int) -> array:
+        offsets, values = index
+        if key + 1 >= len(offsets):
+            return array("I")
+        return values[offsets[key] : offsets[key + 1]]
+
+    def get_targets(self, source: int) -> array:
+        """The targets related to a source
+
+        Args:
+            source: The source symbol
+
+        Returns:
+            The target symbols in the order they were added
+
+        """
+        if self._forward is None:
+            self._forward = self._index(self._sources, self._targets)
+        return self._slice(self._forward, source)
+
+    def get_sources(self, target: int) -> array:
+        """The sources related to a target
+
+        Args:
+            target: The target symbol
+
+        Returns:
+            The source symbols in the order they were added
+
+        """
+        if self._backward is None:
+            self._backward = self._index(self._targets, self._sources)
+        return self._slice(self._backward, target)
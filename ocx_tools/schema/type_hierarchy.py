@@ -0,0 +1,212 @@
+#  Copyright (c) 2023.  OCX Consortium https://3docx.org. See the LICENSE
+
+from logging import Logger
+from typing import Callable, Dict, Iterable, List, Tuple, Union
+
+from lxml.etree import Element
+
+from ocx_tools.schema_xml.element import LxmlElement
+
+
+class TypeHierarchy:
+    """The derivation hierarchy of the global schema declarations.
+
+    The parent of a global declaration is the global type referenced by its ``type`` attribute or by the
+    ``base`` of its extension or restriction. Each declaration has at most one parent, so the hierarchy is a forest.
+    The parent of each declaration is resolved once and the ancestors of a type are memoized and shared by
+    all declarations derived from it. Cyclic type references are reported and cut.
+    The forest is labelled with nested intervals such that ``is_subtype`` is a constant time check. A tag resolved
+    after the labelling is checked against its memoized ancestors instead of labelling the forest again.
+
+    Args:
+        logger: The main python logger
+        parent_of: Resolves the tuple ``(parent tag, parent element)`` of a tag, None if the tag has no parent
+
+    Attributes:
+        _parents: Hash table with the tag as key and the resolved parent tuple or None as value
+        _lineage: Hash table with the tag as key and the memoized hash table of the type and all its ancestors
+            as value, nearest first
+        _assertions: Hash table with the tag as key and the assertion test of the type as value
+        _intervals: Hash table with the tag as key and the tuple ``(enter, exit)`` of the interval label as value
+        _cycles: The detected cyclic type references
+
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        parent_of: Callable[[str], Union[Tuple[str, Element], None]],
+    ):
+        self.log = logger
+        self._parent_of = parent_of
+        self._parents = {}
+        self._lineage = {}
+        self._assertions = {}
+        self._intervals = {}
+        self._cycles = []
+
+    def get_parent(self, tag: str) -> Union[Tuple[str, Element], None]:
+        """The parent type of a global declaration
+
+        Args:
+            tag: The unique tag of the declaration
+
+        Returns:
+            The tuple ``(parent tag, parent element)``, None if the declaration has no parent type
+
+        """
+        if tag not in self._parents:
+            self._parents[tag] = self._parent_of(tag)
+        return self._parents[tag]
+
+    def _get_lineage(self, tag: str, element: Element) -> Dict[str, Element]:
+        """The memoized lineage of a type, resolving the ancestors not seen before
+
+        Args:
+            tag: The unique tag of the type
+            element: The schema element of the type
+
+        Returns:
+            Hash table with the tag as key and the schema element as value of the type and all its ancestors
+
+        """
+        chain = []
+        seen = set()
+        current = (tag, element)
+        tail = {}
+        while current is not None:
+            current_tag = current[0]
+            if current_tag in self._lineage:
+                tail = self._lineage[current_tag]
+                break
+            if current_tag in seen:
+                cycle = [t for t, e in chain]
+                cycle = cycle[cycle.index(current_tag):] + [current_tag]
+                self._cycles.append(cycle)
+                self.log.warning(f'Cyclic type reference: {" -> ".join(cycle)}')
+                break
+            seen.add(current_tag)
+            chain.append(current)
+            current = self.get_parent(current_tag)
+        for current_tag, current_element in reversed(chain):
+            tail = {current_tag: current_element, **tail}
+            self._lineage[current_tag] = tail
+        return self._lineage[tag]
+
+    def get_ancestors(self, tag: str) -> Dict[str, Element]:
+        """All ancestor types of a global declaration
+
+        Args:
+            tag: The unique tag of the declaration
+
+        Returns:
+            Hash table with the ancestor tag as key and the schema element as value, nearest first.
+            The hash table is shared by all declarations with the same parent and must not be modified.
+
+        """
+        parent = self.get_parent(tag)
+        if parent is None:
+            return {}
+        ancestors = self._get_lineage(*parent)
+        if tag in ancestors:
+            # A cyclic reference back to the declaration itself
+            return {t: e for t, e in ancestors.items() if t != tag}
+        return ancestors
+
+    def get_assertion(self, tag: str, element: Element) -> Union[str, None]:
+        """The memoized assertion test of a type
+
+        Args:
+            tag: The unique tag of the type
+            element: The schema element of the type
+
+        Returns:
+            The assertion test, None if the type has no assertion
+
+        """
+        if tag not in self._assertions:
+            self._assertions[tag] = LxmlElement.find_assertion(element)
+        return self._assertions[tag]
+
+    def get_cycles(self) -> List[List[str]]:
+        """The cyclic type references detected so far
+
+        Returns:
+            Each cycle as the list of tags, starting and ending with the same tag
+
+        """
+        return [list(cycle) for cycle in self._cycles]
+
+    def has_cycles(self) -> bool:
+        """Whether any cyclic type reference has been detected"""
+        return len(self._cycles) > 0
+
+    def label(self, tags: Iterable[str] = ()):
+        """Label the hierarchy with nested intervals by an iterative depth-first traversal.
+
+        Args:
+            tags: Additional tags to resolve before labelling. All resolved tags are labelled.
+
+        """
+        for tag in tags:
+            self.get_ancestors(tag)
+        children = {}
+        for tag, parent in self._parents.items():
+            if parent is not None:
+                children.setdefault(parent[0], []).append(tag)
+        roots = [tag for tag, parent in self._parents.items() if parent is None]
+        # Parents never resolved themselves are roots, and each cycle is cut at the first reference back
+        roots += [tag for tag in children if tag not in self._parents]
+        roots += [cycle[0] for cycle in self._cycles]
+        intervals = {}
+        counter = 0
+        for root in roots:
+            if root in intervals:
+                continue
+            stack = [(root, False)]
+            while stack:
+                tag, leave = stack.pop()
+                if leave:
+                    intervals[tag] = (intervals[tag][0], counter)
+                    counter += 1
+                elif tag not in intervals:
+                    intervals[tag] = (counter, counter)
+                    counter += 1
+                    stack.append((tag, True))
+                    stack.extend((child, False) for child in children.get(tag, ()))
+        self._intervals = intervals
+
+    def detach(self):
+        """Label the hierarchy and release the schema elements, keeping the tags of all resolved types.
+        The memoized lineages are shared with the global elements and are released in place.
+        """
+        self.label()
+        self._parents = {
+            tag: None if parent is None else (parent[0], None)
+            for tag, parent in self._parents.items()
+        }
+        for lineage in self._lineage.values():
+            for tag in lineage:
+                lineage[tag] = None
+
+    def is_subtype(self, tag: str, base: str) -> bool:
+        """Whether a declaration is derived from a type, directly or through any of its ancestors
+
+        Args:
+            tag: The unique tag of the declaration
+            base: The unique tag of the type
+
+        Returns:
+            True if ``base`` is ``tag`` or one of its ancestors, False otherwise
+
+        """
+        if tag == base:
+            return True
+        if len(self._intervals) == 0:
+            self.label((tag, base))
+        interval = self._intervals.get(tag)
+        base_interval = self._intervals.get(base)
+        if interval is None or base_interval is None:
+            # Not labelled, the ancestors and unknown tags are resolved once and memoized
+            return base in self.get_ancestors(tag)
+        return base_interval[0] < interval[0] and interval[1] < base_interval[1]
@@ -0,0 +1,121 @@
+#  Copyright (c) 2023.  OCX Consortium https://3docx.org. See the LICENSE
+
+import os
+import threading
+from logging import Logger
+from typing import Callable, Dict, Tuple, Union
+
+from ocx_tools.schema import WATCH_INTERVAL
+from .data_classes import SchemaDelta
+from .parser import OcxSchema
+
+
+class SchemaWatcher:
+    """Watch the files of a processed schema and incrementally reprocess the schema when any of them changes.
+
+    The local schema files are polled by modification time and size in a background daemon thread.
+    A change is processed when the files have been stable for one polling interval, such that a file
+    saved in several steps by an editor is only processed once. Remote schemas are watched by their local copy.
+
+    Args:
+        logger: The main python logger
+        schema_reader: The ``OcxSchema`` instance holding the processed schema
+        callback: Called with the ``SchemaDelta`` of each reprocess
+        interval: The polling interval in seconds
+
+    Attributes:
+        _reader: The watched ``OcxSchema`` instance
+        _callback: The change callback
+        _interval: The polling interval in seconds
+        _stop: Signals the polling thread to stop
+        _thread: The polling thread, None if not watching
+
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        schema_reader: OcxSchema,
+        callback: Callable[[SchemaDelta], None] = None,
+        interval: float = WATCH_INTERVAL,
+    ):
+        self.log = logger
+        self._reader = schema_reader
+        self._callback = callback
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def is_watching(self) -> bool:
+        """Whether the polling thread is running"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """Start watching the schema files of the processed schema
+
+        Returns:
+            True if the watch was started, False if no schema is processed or the watch is already running
+
+        """
+        if not self._reader.is_parsed() or self.is_watching():
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._poll, name="SchemaWatcher", daemon=True
+        )
+        self._thread.start()
+        self.log.debug(f"Watching {len(self._reader.get_parsed_files())} schema files")
+        return True
+
+    def stop(self):
+        """Stop watching and wait for the polling thread to finish"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _signature(self) -> Dict[str, Union[Tuple[int, int], None]]:
+        """The modification time and size of each schema file
+
+        Returns:
+            Hash table with the local file as key and the tuple ``(mtime, size)`` as value.
+            The value is None if the file is not accessible.
+
+        """
+        signature = {}
+        for url, file in self._reader.get_parsed_files():
+            try:
+                stat = os.stat(file)
+                signature[file] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                signature[file] = None
+        return signature
+
+    def _poll(self):
+        """Poll the schema files until stopped"""
+        current = self._signature()
+        pending = None
+        while not self._stop.wait(self._interval):
+            signature = self._signature()
+            if signature != current and signature == pending:
+                self._reprocess()
+                current = self._signature()
+                pending = None
+            else:
+                pending = signature if signature != current else None
+
+    def _reprocess(self):
+        """Reprocess the schema and report the changes"""
+        delta = self._reader.reprocess_schema()
+        if delta is None:
+            self.log.error("Failed to reprocess the changed schema")
+            return
+        self.log.info(
+            f"Reprocessed {len(delta.files)} changed schema files: "
+            f"{len(delta.added)} added, {len(delta.removed)} removed and {len(delta.changed)} changed elements"
+        )
+        if self._callback is not None:
+            try:
+                self._callback(delta)
+            except Exception as e:
+                self.log.error(f"The schema watch callback failed: {e}")
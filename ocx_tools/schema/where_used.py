@@ -0,0 +1,141 @@
+#  Copyright (c) 2023.  OCX Consortium https://3docx.org. See the LICENSE
+
+from logging import Logger
+from typing import Callable, Dict, List, Union
+
+from lxml.etree import Element
+
+from .elements import OcxContentParticle, OcxGlobalElement
+from .symbols import RelationTable, SymbolTable
+
+
+class WhereUsedIndex:
+    """Reverse look-up tables of the processed schema answering where a type, element or attribute is used.
+
+    The index is filled while the global elements are processed. The tags are interned in the symbol table
+    and the relations are stored in integer arrays indexed by symbol, such that a look-up is a slice of
+    an array instead of a scan of the model.
+
+    Args:
+        logger: The main python logger
+        symbols: The symbol table interning the tags and attribute names
+        content_of: Resolves the content model of a parent type from its tag and schema element. If None, the
+            parent types are not indexed as users of the elements in their content models.
+
+    Attributes:
+        _symbols: The symbol table
+        _types: Relates each global element to its type or the base of its anonymous type
+        _derived: Relates each global element to all its parent types
+        _content: Relates each global element and parent type to the global elements referenced by its
+            effective content model
+        _attributes: Relates each global element to the names of its attributes
+        _indexed_types: The tags of the indexed parent types
+
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        symbols: SymbolTable,
+        content_of: Callable[[str, Element], Union[OcxContentParticle, None]] = None,
+    ):
+        self.log = logger
+        self._symbols = symbols
+        self._content_of = content_of
+        self._types = RelationTable()
+        self._derived = RelationTable()
+        self._content = RelationTable()
+        self._attributes = RelationTable()
+        self._indexed_types = set()
+
+    def add(self, ocx: OcxGlobalElement):
+        """Index the type, children and attributes of a global element
+
+        Args:
+            ocx: The global element
+
+        """
+        intern = self._symbols.intern
+        tag = intern(ocx.get_tag())
+        parents = [intern(parent) for parent in ocx.get_parents()]
+        if len(parents) > 0:
+            self._types.add(tag, parents[0])
+        for parent in parents:
+            self._derived.add(tag, parent)
+        # The content model of an element with a named type is the content model of the type
+        users = (tag,)
+        if len(parents) > 0 and ocx.get_schema_element().get("type") is not None:
+            users = (tag, parents[0])
+        for child in ocx.get_children():
+            if child.is_global():
+                child_tag = intern(child.get_reference())
+                for user in users:
+                    self._content.add(user, child_tag)
+        for attribute in ocx.get_attributes():
+            self._attributes.add(tag, intern(attribute.get_name()))
+        if self._content_of is not None:
+            self._add_parent_types(ocx.get_parents())
+
+    def _add_parent_types(self, parents: Dict[str, Element]):
+        """Index the content models of the parent types of a global element not indexed before
+
+        Args:
+            parents: Hash table with the parent type tag as key and the schema element as value, nearest first
+
+        """
+        for tag, element in parents.items():
+            if tag in self._indexed_types:
+                # The type and all its ancestors are indexed
+                break
+            self._indexed_types.add(tag)
+            model = None if element is None else self._content_of(tag, element)
+            if model is None:
+                continue
+            symbol = self._symbols.intern(tag)
+            for child in model.get_elements():
+                if child.is_global():
+                    self._content.add(symbol, self._symbols.intern(child.get_reference()))
+
+    def _users(self, relation: RelationTable, tag: str) -> List[str]:
+        """The sources related to a tag in the order they were first added"""
+        symbol = self._symbols.get_id(tag)
+        if symbol is None:
+            return []
+        return self._symbols.get_tags(relation.get_sources(symbol))
+
+    def get_elements_of_type(self, schema_type: str, derived: bool = False) -> List[str]:
+        """The global elements of a type
+
+        Args:
+            schema_type: The unique tag of the type
+            derived: If True, include the elements of all types derived from the type
+
+        Returns:
+            The tags of the global elements in processing order
+
+        """
+        return self._users(self._derived if derived else self._types, schema_type)
+
+    def get_referencing(self, tag: str) -> List[str]:
+        """The global elements and types with a content model referencing a global element
+
+        Args:
+            tag: The unique tag of the referenced global element
+
+        Returns:
+            The tags of the referencing global elements and types in processing order
+
+        """
+        return self._users(self._content, tag)
+
+    def get_elements_with_attribute(self, name: str) -> List[str]:
+        """The global elements carrying an attribute, including the attributes of all supertypes
+
+        Args:
+            name: The attribute name without namespace prefix
+
+        Returns:
+            The tags of the global elements in processing order
+
+        """
+        return self._users(self._attributes, name)
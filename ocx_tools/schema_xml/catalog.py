@@ -0,0 +1,202 @@
+#  Copyright (c) 2023.  OCX Consortium https://3docx.org. See the LICENSE
+
+from logging import Logger
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+from urllib.parse import urljoin, urlparse
+from urllib.request import url2pathname
+
+from lxml import etree
+from lxml.etree import Element, XMLSyntaxError
+
+CATALOG_NAMESPACE = "urn:oasis:names:tc:entity:xmlns:xml:catalog"
+XML_BASE = "{http://www.w3.org/XML/1998/namespace}base"
+
+
+class XmlCatalog:
+    """An `OASIS XML catalog <https://www.oasis-open.org/committees/download.php/14809/xml-catalogs.html>`_
+    mapping remote schema locations to local copies.
+
+    The ``uri``, ``system``, ``rewriteURI``, ``rewriteSystem`` and ``nextCatalog`` entries are supported,
+    including entries in ``group`` elements and ``xml:base`` attributes. Relative entries are resolved against
+    the location of the catalog file.
+
+    Args:
+        logger: The main python logger
+        strict: If True, remote locations not in the catalog must not be accessed
+
+    Attributes:
+        _entries: Hash table with the ``uri`` or ``systemId`` as key and the mapped location as value
+        _rewrites: The list of ``(start string, rewrite prefix)`` tuples of the rewrite entries
+        _files: The loaded catalog files
+
+    """
+
+    def __init__(self, logger: Logger, strict: bool = False):
+        self.log = logger
+        self._strict = strict
+        self._entries = {}
+        self._rewrites = []
+        self._files = []
+
+    def is_strict(self) -> bool:
+        """Whether remote locations not in the catalog must be rejected"""
+        return self._strict
+
+    def get_files(self) -> List[str]:
+        """The loaded catalog files"""
+        return list(self._files)
+
+    def get_entries(self) -> Dict[str, str]:
+        """The exact mappings of the catalog
+
+        Returns:
+            Hash table with the ``uri`` or ``systemId`` as key and the mapped location as value
+
+        """
+        return self._entries
+
+    def get_rewrites(self) -> List[Tuple[str, str]]:
+        """The prefix rewrites of the catalog
+
+        Returns:
+            The list of ``(start string, rewrite prefix)`` tuples
+
+        """
+        return list(self._rewrites)
+
+    def load(self, file: str) -> bool:
+        """Load a catalog file and any catalogs it chains with ``nextCatalog``
+
+        Args:
+            file: The path to the catalog file
+
+        Returns:
+            True if the catalog was loaded, False otherwise
+
+        """
+        path = Path(file).resolve()
+        if str(path) in self._files:
+            return True
+        try:
+            root = etree.parse(str(path)).getroot()
+        except (OSError, XMLSyntaxError) as e:
+            self.log.error(f'Failed to load the XML catalog "{file}": {e}')
+            return False
+        if root.tag != f"{{{CATALOG_NAMESPACE}}}catalog":
+            self.log.error(f'The file "{file}" is not an OASIS XML catalog')
+            return False
+        self._files.append(str(path))
+        return self._load_entries(root, path.as_uri())
+
+    def _load_entries(self, element: Element, base: str) -> bool:
+        """Load the entries of a catalog or group element
+
+        Args:
+            element: The catalog or group element
+            base: The base URI of the element
+
+        Returns:
+            True if all chained catalogs were loaded, False otherwise
+
+        """
+        base = urljoin(base, element.get(XML_BASE, ""))
+        result = True
+        for entry in element.iterchildren(tag=etree.Element):
+            qn = etree.QName(entry)
+            if qn.namespace != CATALOG_NAMESPACE:
+                continue
+            entry_base = urljoin(base, entry.get(XML_BASE, ""))
+            name = qn.localname
+            if name == "group":
+                result = self._load_entries(entry, base) and result
+            elif name == "uri":
+                self._add_entry(entry.get("name"), urljoin(entry_base, entry.get("uri")))
+            elif name == "system":
+                self._add_entry(
+                    entry.get("systemId"), urljoin(entry_base, entry.get("uri"))
+                )
+            elif name == "rewriteURI":
+                self._add_rewrite(
+                    entry.get("uriStartString"),
+                    urljoin(entry_base, entry.get("rewritePrefix")),
+                )
+            elif name == "rewriteSystem":
+                self._add_rewrite(
+                    entry.get("systemIdStartString"),
+                    urljoin(entry_base, entry.get("rewritePrefix")),
+                )
+            elif name == "nextCatalog":
+                catalog = self._to_location(urljoin(entry_base, entry.get("catalog")))
+                result = self.load(catalog) and result
+        return result
+
+    def _add_entry(self, key: str, location: str):
+        if key is not None and key not in self._entries:
+            self._entries[key] = location
+
+    def _add_rewrite(self, start: str, prefix: str):
+        if start is not None:
+            self._rewrites.append((start, prefix))
+            # The longest matching start string takes precedence
+            self._rewrites.sort(key=lambda rewrite: len(rewrite[0]), reverse=True)
+
+    @staticmethod
+    def _to_location(uri: str) -> str:
+        """Convert a ``file:`` URI to a local path. Other URIs are returned unchanged."""
+        parsed = urlparse(uri)
+        if parsed.scheme == "file":
+            return url2pathname(parsed.path)
+        return uri
+
+    def resolve(self, location: str) -> Union[str, None]:
+        """Map a location to its catalog entry
+
+        Args:
+            location: The URI or system identifier
+
+        Returns:
+            The mapped local path or URL, None if the location is not in the catalog
+
+        """
+        if location is None:
+            return None
+        location = str(location)
+        mapped = self._entries.get(location)
+        if mapped is None:
+            for start, prefix in self._rewrites:
+                if location.startswith(start):
+                    mapped = prefix + location[len(start):]
+                    break
+        if mapped is None:
+            return None
+        return self._to_location(mapped)
+
+    def resolver(self) -> "CatalogResolver":
+        """The ``lxml`` resolver of this catalog, for example to resolve the imports when compiling an
+        ``etree.XMLSchema`` from a parsed schema.
+
+        Returns:
+            A new ``CatalogResolver``
+
+        """
+        return CatalogResolver(self)
+
+
+class CatalogResolver(etree.Resolver):
+    """An ``lxml`` resolver looking up all external documents in an XML catalog.
+
+    Args:
+        catalog: The XML catalog
+
+    """
+
+    def __init__(self, catalog: XmlCatalog):
+        super().__init__()
+        self._catalog = catalog
+
+    def resolve(self, system_url, public_id, context):
+        location = self._catalog.resolve(system_url)
+        if location is None:
+            return None
+        return self.resolve_filename(location, context)
@@ -1,57 +1,421 @@
 #  Copyright (c) 2023.  OCX Consortium https://3docx.org. See the LICENSE
 
+import gzip
+import sys
+import threading
+import time
+import zipfile
+from dataclasses import dataclass
 from logging import Logger
-from typing import Dict
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, List, Tuple, Union
+from urllib.parse import urljoin
 
 from lxml import etree
-from lxml.etree import Element, XMLSyntaxError
+from lxml.etree import Element, ElementTree, XMLSyntaxError
 
 from .element import LxmlElement
 
+# The pool of configured parsers, one per thread and configuration
+_parser_pool = threading.local()
+
+# Separates the archive file and the member name in the location of a document in a zip archive
+ARCHIVE_SEPARATOR = "!/"
+
+
+def split_archive_location(location: str) -> Union[Tuple[str, str], None]:
+    """Split the location of a document in a zip archive on the form ``archive.zip!/member``
+
+    Args:
+        location: The document location
+
+    Returns:
+        The tuple ``(archive file, member name)``, None if the location is not a zip archive member
+
+    """
+    archive, separator, member = str(location).partition(ARCHIVE_SEPARATOR)
+    if separator == "" or not archive.lower().endswith(".zip"):
+        return None
+    return archive, member
+
+
+def is_tar_archive(location: str) -> bool:
+    """Whether a location is a tar archive, which is not supported as a schema bundle
+
+    Args:
+        location: The document location
+
+    Returns:
+        True if the location has a tar archive suffix, False otherwise
+
+    """
+    return str(location).lower().endswith((".tar", ".tar.gz", ".tgz"))
+
+
+def archive_root_member(members: List[str], name: str = None) -> Union[str, None]:
+    """The member of a zip archive holding the root schema
+
+    Args:
+        members: The member names in archive order
+        name: The file name of the root schema. If None or not found, the first ``.xsd`` member is the root.
+
+    Returns:
+        The member name, None if the archive holds no schema
+
+    """
+    schemas = [member for member in members if member.lower().endswith(".xsd")]
+    for member in schemas:
+        if PurePosixPath(member).name == name:
+            return member
+    return schemas[0] if len(schemas) > 0 else None
+
+
+@dataclass
+class StreamStatistics:
+    """Class for the statistics of a streamed document
+
+    Args:
+         elements: The number of elements parsed
+         handled: The number of elements passed to a handler
+         seconds: The elapsed time
+         elements_per_second: The parse rate
+         peak_rss: The peak resident set size of the process in bytes. None if not available on the platform
+
+    """
+
+    elements: int
+    handled: int
+    seconds: float
+    elements_per_second: float
+    peak_rss: Union[int, None]
+
+
+def peak_rss() -> Union[int, None]:
+    """The peak resident set size of the current process
+
+    Returns:
+        The peak RSS in bytes, None if the platform does not provide it
+
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class _BufferReader:
+    """A file-like reader over a buffer handing out bounded chunks to the parser instead of copying the buffer.
+
+    Args:
+        buffer: Any object supporting the buffer protocol, for example a ``bytearray`` or a ``memoryview``
+
+    """
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = len(self._view) - self._pos
+        chunk = self._view[self._pos : self._pos + size].tobytes()
+        self._pos += len(chunk)
+        return chunk
+
 
 class LxmlParser:
     """A wrapper of the lxml etree document tree and parser.
 
     Args:
         logger: The instance of the Python logger
+        resolver: Resolver of external documents, for example a ``CatalogResolver``
 
     Attributes:
         _tree : The ``lxml.etree`` DOM
         _log: The Python logger
+        _resolver: The resolver registered with the parser
 
     """
 
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, resolver: etree.Resolver = None):
 
         self._tree: Element = None
         self._log: Logger = logger
+        self._resolver = resolver
 
-    def parse(self, file: str, store_ids: bool = False) -> bool:
+    @staticmethod
+    def get_parser(
+        store_ids: bool = False, resolver: etree.Resolver = None
+    ) -> etree.XMLParser:
+        """The configured XML parser of the calling thread.
+        The ``etree.XMLParser`` instances are not thread safe, so each thread reuses its own parser.
+        A thread keeps one parser with and one without a resolver for each ``store_ids`` setting. A parser
+        registered with another resolver, for example of a reloaded catalog, is replaced and released.
+
+        Args:
+            store_ids: If set to True, the parser will create a hash table of the xml IDs
+            resolver: Resolver of external documents registered with the parser
+
+        Returns:
+            The parser of the calling thread
+
+        """
+        parsers = getattr(_parser_pool, "parsers", None)
+        if parsers is None:
+            parsers = _parser_pool.parsers = {}
+        key = (store_ids, resolver is not None)
+        entry = parsers.get(key)
+        if entry is None or entry[0] is not resolver:
+            parser = etree.XMLParser(
+                remove_comments=False,
+                remove_blank_text=True,
+                ns_clean=True,
+                collect_ids=store_ids,
+            )
+            if resolver is not None:
+                parser.resolvers.add(resolver)
+            entry = parsers[key] = (resolver, parser)
+        return entry[1]
+
+    def parse(self, file: str, store_ids: bool = False, base_url: str = None) -> bool:
         """Parses an XML file
         Args:
             file: The file name of the xml document to be parsed. The parser can only parse from a local file.
+                A gzip compressed file (``.gz``) or a member of a zip archive on the form ``archive.zip!/member``
+                is parsed directly from the decompressed stream. A plain zip archive is parsed as its root
+                schema, the first ``.xsd`` member. Tar archives are not supported.
             store_ids: If set to True, the parser will create a hash table of the xml IDs
+            base_url: The document location used to resolve relative references. Default is the file name.
 
         Returns:
             The return value. True for success, False otherwise.
 
         """
         # Parsing the XML file.
-        parsed = False
+        tree = self._parse_file(file, store_ids, base_url)
+        if tree is None:
+            return False
+        self._tree = tree
+        return True
+
+    def parse_bytes(
+        self, data: bytes, base_url: str = None, store_ids: bool = False
+    ) -> bool:
+        """Parses an XML document held in memory without writing it to disk
+
+        Args:
+            data: The xml document
+            base_url: The document location used to resolve relative references, for example the download URL
+            store_ids: If set to True, the parser will create a hash table of the xml IDs
+
+        Returns:
+            The return value. True for success, False otherwise.
+
+        """
         try:
-            my_parser = etree.XMLParser(
-                remove_comments=False,
-                remove_blank_text=True,
-                ns_clean=True,
-                collect_ids=store_ids,
+            root = etree.fromstring(
+                data, parser=self.get_parser(store_ids, self._resolver), base_url=base_url
             )
-            self._tree = etree.parse(file, parser=my_parser)
-            parsed = True
         except XMLSyntaxError as e:
             self._log.error(e)
+            return False
+        self._tree = root.getroottree()
+        return True
+
+    def parse_buffer(
+        self, buffer, base_url: str = None, store_ids: bool = False
+    ) -> bool:
+        """Parses an XML document from a ``bytes``, ``bytearray`` or ``memoryview`` buffer.
+        Buffers other than ``bytes`` are fed to the parser in chunks and are never copied as a whole.
+        A large local file is parsed with ``parse``, which lets libxml2 read the file without any copy in Python.
+
+        Args:
+            buffer: The buffer holding the xml document
+            base_url: The document location used to resolve relative references
+            store_ids: If set to True, the parser will create a hash table of the xml IDs
+
+        Returns:
+            The return value. True for success, False otherwise.
+
+        """
+        if isinstance(buffer, bytes):
+            return self.parse_bytes(buffer, base_url, store_ids)
+        tree = self._parse_file(_BufferReader(buffer), store_ids, base_url)
+        if tree is None:
+            return False
+        self._tree = tree
+        return True
+
+    def _parse_file(
+        self, file, store_ids: bool, base_url: str = None
+    ) -> Union[ElementTree, None]:
+        """Parse an XML file or file-like object with the parser of the calling thread
+
+        Returns:
+            The document tree, None if the file could not be parsed
+
+        """
+        if isinstance(file, (str, Path)):
+            location = str(file)
+            if is_tar_archive(location):
+                self._log.error(f'Failed to open "{location}": Tar archives are not supported, use a zip archive')
+                return None
+            if location.lower().endswith(".zip"):
+                location = self._archive_root(location)
+                if location is None:
+                    return None
+            archive = split_archive_location(location)
+            if archive is not None or location.lower().endswith(".gz"):
+                return self._parse_archive(location, archive, store_ids, base_url)
+        try:
+            return etree.parse(
+                file, parser=self.get_parser(store_ids, self._resolver), base_url=base_url
+            )
+        except XMLSyntaxError as e:
+            self._log.error(e)
+        except OSError:
+            self._log.error("Failed to open file %s" % file, exc_info=True)
+        return None
+
+    def _archive_root(self, file: str) -> Union[str, None]:
+        """The location ``archive.zip!/member`` of the root schema of a zip archive
+
+        Args:
+            file: The path to the zip archive
+
+        Returns:
+            The location of the first ``.xsd`` member, None if the archive could not be read or holds no schema
+
+        """
+        try:
+            with zipfile.ZipFile(file) as archive:
+                member = archive_root_member(archive.namelist())
+        except (OSError, zipfile.BadZipFile) as e:
+            self._log.error(f'Failed to open "{file}": {e}')
+            return None
+        if member is None:
+            self._log.error(f'The zip archive "{file}" contains no schema')
+            return None
+        return f"{file}{ARCHIVE_SEPARATOR}{member}"
+
+    def _parse_archive(
+        self,
+        location: str,
+        archive: Union[Tuple[str, str], None],
+        store_ids: bool,
+        base_url: str = None,
+    ) -> Union[ElementTree, None]:
+        """Parse a document from the decompressed stream of a zip archive member or a gzip file
+
+        Args:
+            location: The document location
+            archive: The tuple ``(archive file, member name)`` of a zip archive member, None for a gzip file
+            store_ids: If set to True, the parser will create a hash table of the xml IDs
+            base_url: The document location used to resolve relative references. Default is the location.
+
+        Returns:
+            The document tree, None if the document could not be parsed
+
+        """
+        if base_url is None:
+            base_url = location
+        try:
+            if archive is not None:
+                with zipfile.ZipFile(archive[0]) as bundle, bundle.open(
+                    archive[1]
+                ) as stream:
+                    return etree.parse(
+                        stream, parser=self.get_parser(store_ids, self._resolver), base_url=base_url
+                    )
+            with gzip.open(location) as stream:
+                return etree.parse(
+                    stream, parser=self.get_parser(store_ids, self._resolver), base_url=base_url
+                )
+        except XMLSyntaxError as e:
+            self._log.error(e)
+        except (OSError, KeyError, zipfile.BadZipFile) as e:
+            self._log.error(f'Failed to open "{location}": {e}')
+        return None
+
+    def parse_many(
+        self, files: List[str], store_ids: bool = False
+    ) -> List[Union[ElementTree, None]]:
+        """Parse a batch of XML files reusing the parser of the calling thread.
+        The document tree of this instance is not changed.
+
+        Args:
+            files: The file names of the xml documents to be parsed
+            store_ids: If set to True, the parser will create a hash table of the xml IDs
+
+        Returns:
+            The document trees in the order of ``files``. None for a file that could not be parsed.
+
+        """
+        return [self._parse_file(file, store_ids) for file in files]
+
+    def iterparse(
+        self, file, handlers: Dict[str, Callable[[Element], None]]
+    ) -> Union[StreamStatistics, None]:
+        """Stream an XML document with bounded memory instead of building the full document tree.
+
+        Each element with a registered tag is passed to its handler when the end tag is parsed, with its
+        complete subtree. Elements are cleared as soon as they are no longer needed, so the memory use
+        depends on the largest handled subtree and not on the document size.
+        The document tree of this instance is not changed.
+
+        Args:
+            file: The file name or file-like object of the xml document
+            handlers: Hash table with the tag as key and the handler as value. The tag is either a
+                unique tag ``{namespace}name`` or a local name matching any namespace.
+
+        Returns:
+            The ``StreamStatistics`` of the streamed document, None if the document could not be parsed
+
+        """
+        elements = handled = 0
+        # The number of open elements with a handler. Their subtrees are kept until the handler is called
+        open_handled = 0
+        start = time.perf_counter()
+        try:
+            for event, element in etree.iterparse(
+                file,
+                events=("start", "end"),
+                remove_blank_text=True,
+                remove_comments=True,
+                huge_tree=True,
+            ):
+                tag = element.tag
+                handler = handlers.get(tag)
+                if handler is None:
+                    handler = handlers.get(tag.rpartition("}")[2])
+                if event == "start":
+                    if handler is not None:
+                        open_handled += 1
+                    continue
+                elements += 1
+                if handler is not None:
+                    open_handled -= 1
+                    handler(element)
+                    handled += 1
+                if open_handled == 0:
+                    # Release the element and its already processed preceding siblings
+                    element.clear(keep_tail=True)
+                    parent = element.getparent()
+                    if parent is not None:
+                        while element.getprevious() is not None:
+                            del parent[0]
+        except XMLSyntaxError as e:
+            self._log.error(e)
+            return None
         except OSError:
             self._log.error("Failed to open file %s" % file, exc_info=True)
-        return parsed
+            return None
+        seconds = time.perf_counter() - start
+        rate = elements / seconds if seconds > 0 else 0.0
+        return StreamStatistics(elements, handled, seconds, rate, peak_rss())
 
     def get_root(self) -> Element:
         """The XML root
@@ -165,5 +529,22 @@ class LxmlParser:
         for ref in references:
             loc = ref.get("schemaLocation")
             ns = ref.get("namespace")
-            urls[ns] = loc
+            urls[ns] = self.resolve_location(loc)
         return urls
+
+    def resolve_location(self, location: str) -> str:
+        """Resolve a relative ``schemaLocation`` against the location of the document
+
+        Args:
+            location: The location as given in the document
+
+        Returns:
+            The absolute URL or file path of the location. Absolute locations are returned unchanged.
+
+        """
+        base = self.doc_url()
+        if location is None or base is None or "://" in location or Path(location).is_absolute():
+            return location
+        if "://" in base:
+            return urljoin(base, location)
+        return str(Path(base).parent / location)
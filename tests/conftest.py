@@ -4,6 +4,9 @@ import pytest
 import os
 import sys
 import logging
+import hashlib
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 
 # To make sure that the tests import the ocx_schema_reader modules this has to come before the import statements
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -23,6 +26,101 @@ def load_schema_from_file(shared_datadir) -> LxmlParser:
     return parser
 
 
+@pytest.fixture
+def local_schema_folder(shared_datadir) -> str:
+    """The test schemas with all ``xs:import`` locations rewritten to the local copies"""
+    imports = {
+        "OCX_Schema.xsd": (
+            "https://3docx.org/fileadmin/ocx_schema/unitsml/unitsmlSchema_lite-0.9.18.xsd",
+            "unitsmlSchema_lite-0.9.18.xsd",
+        ),
+        "unitsmlSchema_lite-0.9.18.xsd": (
+            "https://www.w3.org/2009/01/xml.xsd",
+            "xml.xsd",
+        ),
+    }
+    for file, (url, local) in imports.items():
+        schema = shared_datadir / file
+        text = schema.read_text(encoding="utf-8")
+        local_path = (shared_datadir / local).resolve().as_posix()
+        schema.write_text(text.replace(url, local_path), encoding="utf-8")
+    return str(shared_datadir.resolve())
+
+
+class SchemaRequestHandler(SimpleHTTPRequestHandler):
+    """Serve the test schemas with ``ETag`` validation and record all requests"""
+
+    protocol_version = "HTTP/1.1"
+
+    def send_head(self):
+        self.server.clients.add(self.client_address)
+        if self.server.failures.get(self.path, 0) > 0:
+            self.server.failures[self.path] -= 1
+            self.server.requests.append((self.path, 503))
+            self.send_error(503)
+            return None
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                etag = f'"{hashlib.sha1(f.read()).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.server.requests.append((self.path, 304))
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return None
+            self.server.etags[self.path] = etag
+        self.server.requests.append((self.path, 200))
+        return super().send_head()
+
+    def end_headers(self):
+        etag = self.server.etags.pop(self.path, None)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def schema_server(shared_datadir):
+    """A local stand-in HTTP server for the test schemas with all ``xs:import`` locations pointing to the server"""
+    served = shared_datadir / "served"
+    served.mkdir()
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0),
+        lambda *args: SchemaRequestHandler(*args, directory=str(served)),
+    )
+    server.requests = []
+    server.etags = {}
+    server.failures = {}
+    server.clients = set()
+    server.served = served
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    imports = {
+        "OCX_Schema.xsd": (
+            "https://3docx.org/fileadmin/ocx_schema/unitsml/unitsmlSchema_lite-0.9.18.xsd",
+            "unitsmlSchema_lite-0.9.18.xsd",
+        ),
+        "unitsmlSchema_lite-0.9.18.xsd": (
+            "https://www.w3.org/2009/01/xml.xsd",
+            "xml.xsd",
+        ),
+        "xml.xsd": ("", ""),
+    }
+    for file, (url, local) in imports.items():
+        text = (shared_datadir / file).read_text(encoding="utf-8")
+        if url:
+            text = text.replace(url, f"{server.url}/{local}")
+        (served / file).write_text(text, encoding="utf-8")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
 @pytest.fixture
 def process_schema(shared_datadir, load_schema_from_file) -> OcxSchema:
     test_data = shared_datadir / "OCX_Schema.xsd"
@@ -30,6 +128,8 @@ def process_schema(shared_datadir, load_schema_from_file) -> OcxSchema:
     schema_folder = shared_datadir
     folder = str(schema_folder.resolve())
     schema_reader = OcxSchema(logger, folder)
+    # Resolve the imports to the local copies
+    assert schema_reader.load_catalog(str(shared_datadir / "catalog.xml"), strict=True)
     result = schema_reader.process_schema(url)
     assert result is True
     return schema_reader
@@ -0,0 +1,69 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+import logging
+
+from ocx_tools.schema import PROCESS_SCHEMA_TYPES
+from ocx_tools.schema.parser import OcxSchema
+
+OCX = "{https://3docx.org/fileadmin//ocx_schema//V287//OCX_Schema.xsd}"
+
+
+class TestContentModel:
+    def test_extension(self, process_schema: OcxSchema):
+        plate = process_schema.get_ocx_element_from_type("ocx:Plate")
+        model = plate.get_content_model()
+        assert model.get_kind() == "sequence"
+        base, own = model.get_particles()
+        # The base type particles precede the particles of the extension
+        assert base is process_schema.get_content_model(f"{OCX}StructurePart_T")
+        assert own.get_kind() == "choice"
+        assert [p.get_element().get_name() for p in own.get_particles()][:2] == [
+            "PlateMaterial",
+            "Offset",
+        ]
+        assert own.get_particles()[1].get_cardinality() == (0, 1)
+        names = [c.get_name() for c in plate.get_children()]
+        assert names[0] == "Description"
+        assert names[-1] == "CutBy"
+
+    def test_restriction(self, process_schema: OcxSchema):
+        positions = process_schema.get_ocx_element_from_type("ocx:Positions")
+        assert positions.get_content_model().to_notation() == "(Point3D[3, 3])"
+        assert [c.get_name() for c in positions.get_children()] == ["Point3D"]
+
+    def test_shared(self, process_schema: OcxSchema):
+        plate = process_schema.get_ocx_element_from_type("ocx:Plate")
+        plate_type = process_schema.get_content_model(f"{OCX}Plate_T")
+        assert plate.get_content_model() is plate_type
+        assert plate.get_children() is plate_type.get_elements()
+        assert process_schema.get_content_model(f"{OCX}ReferencePlane") is None
+
+    def test_notation(self, process_schema: OcxSchema):
+        vessel = process_schema.get_ocx_element_from_type("ocx:Vessel")
+        notation = vessel.get_content_model().to_notation()
+        assert "DesignView[0, ∞]" in notation
+        assert "(Arrangement | ReferenceSurfaces" in notation
+
+    def test_cyclic_references(self, tmp_path, caplog):
+        schema = tmp_path / "cyclic.xsd"
+        schema.write_text(
+            '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" targetNamespace="urn:c" xmlns:c="urn:c">'
+            '<xs:complexType name="A_T"><xs:complexContent><xs:extension base="c:B_T">'
+            '<xs:sequence><xs:element name="a" type="xs:string"/></xs:sequence>'
+            "</xs:extension></xs:complexContent></xs:complexType>"
+            '<xs:complexType name="B_T"><xs:complexContent><xs:extension base="c:A_T">'
+            '<xs:sequence><xs:element name="b" type="xs:string"/></xs:sequence>'
+            "</xs:extension></xs:complexContent></xs:complexType>"
+            '<xs:group name="G"><xs:sequence><xs:element name="g" type="xs:string"/>'
+            '<xs:group ref="c:G" minOccurs="0"/></xs:sequence></xs:group>'
+            '<xs:complexType name="G_T"><xs:group ref="c:G"/></xs:complexType>'
+            "</xs:schema>"
+        )
+        schema_reader = OcxSchema(logging.getLogger("test_cyclic_references"), str(tmp_path))
+        schema_reader._schema_types = PROCESS_SCHEMA_TYPES + ["group"]
+        assert schema_reader.process_schema(str(schema)) is True
+        model = schema_reader.get_content_model("{urn:c}A_T")
+        assert [c.get_name() for c in model.get_elements()] == ["b", "a"]
+        assert "Cyclic content_model reference: {urn:c}A_T -> {urn:c}B_T -> {urn:c}A_T" in caplog.text
+        group = schema_reader.get_content_model("{urn:c}G_T")
+        assert [c.get_name() for c in group.get_elements()] == ["g"]
+        assert "Cyclic model_group reference: {urn:c}G -> {urn:c}G" in caplog.text
@@ -0,0 +1,84 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+import logging
+
+from ocx_tools.schema.helpers import SchemaHelper
+from ocx_tools.schema.namespaces import XML_NAMESPACE, NamespaceRegistry
+from ocx_tools.schema.parser import OcxSchema
+
+logger = logging.Logger(__name__)
+
+OCX = "{https://3docx.org/fileadmin//ocx_schema//V287//OCX_Schema.xsd}"
+UNITSML = "urn:oasis:names:tc:unitsml:schema:xsd:UnitsMLSchema_lite-0.9.18"
+
+
+class TestNamespaceRegistry:
+    def test_add(self):
+        registry = NamespaceRegistry(logger)
+        assert registry.get_prefix(XML_NAMESPACE) == "xml"
+        assert registry.add({"a": "urn:a", None: "urn:b"}, "a.xsd") == 2
+        # The first binding of a prefix wins in the global scope
+        assert registry.add({"a": "urn:c", "b": "urn:b"}, "c.xsd") == 1
+        assert registry.get_namespace("a") == "urn:a"
+        assert registry.get_prefix("urn:b") == "b"
+        assert not registry.has_namespace("urn:c")
+        assert registry.get_scope("c.xsd") == {"a": "urn:c", "b": "urn:b"}
+        assert list(registry.get_scopes()) == ["a.xsd", "c.xsd"]
+
+    def test_resolve(self):
+        registry = NamespaceRegistry(logger)
+        registry.add({"a": "urn:a", None: "urn:b"}, "a.xsd")
+        registry.add({"a": "urn:c"}, "c.xsd")
+        assert registry.resolve("a:Name") == "{urn:a}Name"
+        assert registry.resolve("Name") == "{urn:b}Name"
+        assert registry.resolve("a:Name", "c.xsd") == "{urn:c}Name"
+        assert registry.resolve_qname("a:Name") == ("urn:a", "{urn:a}Name")
+        assert registry.resolve("x:Name") is None
+        # An unknown prefix is resolved once it is registered
+        registry.add({"x": "urn:x"})
+        assert registry.resolve("x:Name") == "{urn:x}Name"
+
+
+class TestSchemaNamespaces:
+    def test_shared_registry(self, process_schema: OcxSchema):
+        registry = process_schema.get_namespace_registry()
+        assert process_schema.get_namespaces() is registry.get_namespaces()
+        assert registry.get_prefix(OCX[1:-1]) == "ocx"
+        plate = process_schema.get_ocx_element_from_type("ocx:Plate")
+        element = plate.get_schema_element()
+        assert SchemaHelper.get_type_tag(element, registry) == f"{OCX}Plate_T"
+
+    def test_unknown_prefix(self, process_schema: OcxSchema):
+        assert process_schema.get_ocx_element_from_type("foo:Plate") is None
+        assert process_schema.get_ocx_element_from_type("ocx:Unknown") is None
+        assert process_schema.get_ocx_element_from_type("unitsml:UnitsML") is not None
+
+    def test_document_scopes(self, tmp_path):
+        # Both documents bind the prefix p to their own target namespace
+        a, b = tmp_path / "a.xsd", tmp_path / "b.xsd"
+        a.write_text(
+            '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" targetNamespace="urn:a" '
+            f'xmlns:p="urn:a" xmlns:q="urn:b"><xs:import namespace="urn:b" schemaLocation="{b}"/>'
+            '<xs:complexType name="A_T"><xs:sequence><xs:element ref="q:B"/></xs:sequence></xs:complexType>'
+            '<xs:element name="A" type="p:A_T"/></xs:schema>'
+        )
+        b.write_text(
+            '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" targetNamespace="urn:b" xmlns:p="urn:b">'
+            '<xs:complexType name="Base_T"><xs:sequence><xs:element ref="p:Item"/></xs:sequence>'
+            "</xs:complexType>"
+            '<xs:complexType name="B_T"><xs:complexContent><xs:extension base="p:Base_T"/>'
+            "</xs:complexContent></xs:complexType>"
+            '<xs:element name="Item" type="xs:string"/><xs:element name="B" type="p:B_T"/></xs:schema>'
+        )
+        schema_reader = OcxSchema(logger, str(tmp_path), use_cache=False)
+        assert schema_reader.process_schema(str(a)) is True
+        assert schema_reader.get_namespaces()["p"] == "urn:a"
+        hierarchy = schema_reader.get_type_hierarchy()
+        assert list(hierarchy.get_ancestors("{urn:a}A")) == ["{urn:a}A_T"]
+        assert list(hierarchy.get_ancestors("{urn:b}B")) == ["{urn:b}B_T", "{urn:b}Base_T"]
+        model = schema_reader.get_content_model("{urn:b}B")
+        assert [c.get_reference() for c in model.get_elements()] == ["{urn:b}Item"]
+        model = schema_reader.get_content_model("{urn:a}A")
+        assert [c.get_reference() for c in model.get_elements()] == ["{urn:b}B"]
+        assert schema_reader.get_ocx_element_from_type("p:B") is None
+        element = schema_reader.get_ocx_element_from_type("p:B", str(b))
+        assert element.get_tag() == "{urn:b}B"
@@ -0,0 +1,44 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+import asyncio
+import logging
+from pathlib import Path
+
+from ocx_tools.schema.parser import OcxSchema
+
+logger = logging.Logger(__name__)
+
+
+class TestAsyncSchema:
+    def test_aprocess_schema(self, local_schema_folder):
+        url = str(Path(local_schema_folder) / "OCX_Schema.xsd")
+        serial = OcxSchema(logger, local_schema_folder, use_cache=False)
+        assert serial.process_schema(url)
+        schema_reader = OcxSchema(logger, local_schema_folder, use_cache=False)
+        assert asyncio.run(schema_reader.aprocess_schema(url)) is True
+        assert schema_reader.is_parsed()
+        assert list(schema_reader.get_namespaces().items()) == list(
+            serial.get_namespaces().items()
+        )
+        assert schema_reader.tbl_summary() == serial.tbl_summary()
+        vessel = schema_reader.get_ocx_element_from_type("ocx:Vessel")
+        assert vessel.attributes_to_dict() == serial.get_ocx_element_from_type(
+            "ocx:Vessel"
+        ).attributes_to_dict()
+
+    def test_concurrent_remote_schemas(self, schema_server, tmp_path):
+        url = f"{schema_server.url}/OCX_Schema.xsd"
+        readers = [
+            OcxSchema(logger, str(tmp_path / str(i)), use_cache=False) for i in range(3)
+        ]
+
+        async def load_all():
+            return await asyncio.gather(*[r.aprocess_schema(url) for r in readers])
+
+        assert asyncio.run(load_all()) == [True, True, True]
+        summaries = [r.tbl_summary() for r in readers]
+        assert summaries[0] == summaries[1] == summaries[2]
+
+    def test_missing_schema(self, tmp_path):
+        schema_reader = OcxSchema(logger, str(tmp_path), use_cache=False)
+        missing = str(tmp_path / "missing.xsd")
+        assert asyncio.run(schema_reader.aprocess_schema(missing)) is False
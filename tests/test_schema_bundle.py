@@ -0,0 +1,102 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+import gzip
+import logging
+import tarfile
+import zipfile
+from pathlib import Path
+
+from ocx_tools.schema.bundle import SchemaBundle
+from ocx_tools.schema.parser import OcxSchema
+from ocx_tools.schema_xml.parse import LxmlParser
+
+logger = logging.Logger(__name__)
+
+SCHEMAS = ["OCX_Schema.xsd", "unitsmlSchema_lite-0.9.18.xsd", "xml.xsd"]
+
+
+def make_bundle(folder: Path, target: Path) -> Path:
+    """Pack the test schemas with their original remote imports in a zip archive"""
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name in SCHEMAS:
+            archive.write(folder / name, f"schemas/{name}")
+    return target
+
+
+class TestSchemaBundle:
+    def test_resolve(self, shared_datadir, tmp_path):
+        bundle = SchemaBundle(logger, make_bundle(shared_datadir, tmp_path / "ocx.zip"))
+        assert bundle.open() is True
+        root = bundle.get_root()
+        assert root == f"{tmp_path / 'ocx.zip'}!/schemas/OCX_Schema.xsd"
+        assert bundle.resolve(
+            "https://www.w3.org/2009/01/xml.xsd"
+        ) == f"{tmp_path / 'ocx.zip'}!/schemas/xml.xsd"
+        assert bundle.resolve("https://3docx.org/missing.xsd") is None
+        assert bundle.fingerprint(root) is not None
+
+    def test_process_zip(self, shared_datadir, tmp_path, local_schema_folder):
+        folder = tmp_path / "bundle"
+        folder.mkdir()
+        bundle = make_bundle(shared_datadir, folder / "ocx.zip")
+        schema_reader = OcxSchema(logger, str(folder), use_cache=False)
+        assert schema_reader.process_schema(str(bundle)) is True
+        assert len(schema_reader.get_parsed_files()) == 3
+        assert all(file == str(bundle) for url, file in schema_reader.get_parsed_files())
+        # Nothing is extracted or downloaded
+        assert [p.name for p in folder.iterdir()] == ["ocx.zip"]
+        local = OcxSchema(logger, local_schema_folder, use_cache=False)
+        assert local.process_schema(str(Path(local_schema_folder) / "OCX_Schema.xsd"))
+        assert list(schema_reader._ocx_global_elements) == list(
+            local._ocx_global_elements
+        )
+        assert schema_reader.tbl_summary() == local.tbl_summary()
+
+    def test_process_zip_cached(self, shared_datadir, tmp_path):
+        bundle = make_bundle(shared_datadir, tmp_path / "ocx.zip")
+        schema_reader = OcxSchema(logger, str(tmp_path / "schemas"), use_cache=True)
+        assert schema_reader.process_schema(str(bundle)) is True
+        assert schema_reader.process_schema(str(bundle)) is True
+        assert schema_reader.get_cache_statistics().hits == 1
+
+    def test_process_gzip(self, shared_datadir, tmp_path):
+        bundle = tmp_path / "xml.xsd.gz"
+        bundle.write_bytes(gzip.compress((shared_datadir / "xml.xsd").read_bytes()))
+        schema_reader = OcxSchema(logger, str(tmp_path), use_cache=False)
+        assert schema_reader.process_schema(str(bundle)) is True
+        assert schema_reader.get_parsed_files() == [(str(bundle), str(bundle))]
+        assert len(schema_reader._get_schema_attribute_tyepes()) == 4
+
+    def test_bad_bundle(self, tmp_path):
+        bundle = tmp_path / "broken.zip"
+        bundle.write_bytes(b"not a zip archive")
+        schema_reader = OcxSchema(logger, str(tmp_path), use_cache=False)
+        assert schema_reader.process_schema(str(bundle)) is False
+
+    def test_tar_archive(self, shared_datadir, tmp_path):
+        bundle = tmp_path / "ocx.tar.gz"
+        with tarfile.open(bundle, "w:gz") as archive:
+            archive.add(shared_datadir / "xml.xsd", "xml.xsd")
+        assert SchemaBundle.is_bundle(str(bundle)) is False
+        assert SchemaBundle.is_bundle(str(tmp_path / "xml.xsd.gz")) is True
+        schema_reader = OcxSchema(logger, str(tmp_path), use_cache=False)
+        assert schema_reader.process_schema(str(bundle)) is False
+        assert LxmlParser(logger).parse(str(bundle)) is False
+
+    def test_bundles_reset(self, shared_datadir, tmp_path, local_schema_folder):
+        bundle = make_bundle(shared_datadir, tmp_path / "ocx.zip")
+        schema_reader = OcxSchema(logger, local_schema_folder, use_cache=False)
+        assert schema_reader.process_schema(str(bundle)) is True
+        url = str(Path(local_schema_folder) / "OCX_Schema.xsd")
+        assert schema_reader.process_schema(url) is True
+        assert schema_reader._bundles == {}
+        assert all(file != str(bundle) for url, file in schema_reader.get_parsed_files())
+
+    def test_parse_plain_zip(self, shared_datadir, tmp_path):
+        bundle = make_bundle(shared_datadir, tmp_path / "ocx.zip")
+        parser = LxmlParser(logger)
+        assert parser.parse(str(bundle)) is True
+        assert parser.doc_url() == f"{bundle}!/schemas/OCX_Schema.xsd"
+        empty = tmp_path / "empty.zip"
+        with zipfile.ZipFile(empty, "w") as archive:
+            archive.writestr("readme.txt", "no schema")
+        assert parser.parse(str(empty)) is False
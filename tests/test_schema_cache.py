@@ -0,0 +1,83 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+import logging
+from pathlib import Path
+
+from ocx_tools.schema import CACHE_FOLDER
+from ocx_tools.schema.parser import OcxSchema
+from ocx_tools.schema_xml.parse import LxmlParser
+
+logger = logging.Logger(__name__)
+
+OCX = "{https://3docx.org/fileadmin//ocx_schema//V287//OCX_Schema.xsd}"
+
+
+def process(folder: str) -> OcxSchema:
+    schema_reader = OcxSchema(logger, folder, use_cache=True)
+    assert schema_reader.process_schema(str(Path(folder) / "OCX_Schema.xsd")) is True
+    return schema_reader
+
+
+class TestSchemaCache:
+    def test_cache_miss_and_hit(self, local_schema_folder):
+        cold = process(local_schema_folder)
+        assert cold.get_cache_statistics().misses == 1
+        assert cold.get_cache_statistics().stores == 1
+        warm = process(local_schema_folder)
+        assert warm.get_cache_statistics().hits == 1
+        assert warm.tbl_summary() == cold.tbl_summary()
+        assert warm.tbl_complex_types() == cold.tbl_complex_types()
+
+    def test_cached_elements(self, local_schema_folder):
+        cold = process(local_schema_folder).get_ocx_element_from_type("ocx:Vessel")
+        warm = process(local_schema_folder).get_ocx_element_from_type("ocx:Vessel")
+        assert warm.get_annotation() == cold.get_annotation()
+        assert list(warm.get_parents()) == list(cold.get_parents())
+        assert warm.attributes_to_dict() == cold.attributes_to_dict()
+        assert warm.children_to_dict() == cold.children_to_dict()
+
+    def test_warm_start_not_parsed(self, local_schema_folder, monkeypatch):
+        cold = process(local_schema_folder)
+        parsed = []
+        parse = LxmlParser.parse
+
+        def counted(parser, *args, **kwargs):
+            parsed.append(args[0])
+            return parse(parser, *args, **kwargs)
+
+        monkeypatch.setattr(LxmlParser, "parse", counted)
+        warm = process(local_schema_folder)
+        assert parsed == []
+        assert warm.is_detached()
+        assert warm.get_parsed_files() == cold.get_parsed_files()
+        assert warm.get_import_graph().get_edges() == cold.get_import_graph().get_edges()
+        plate = warm.get_ocx_element_from_type("ocx:Plate")
+        assert warm.is_subtype(plate.get_tag(), f"{OCX}StructurePart_T")
+        assert warm.get_content_model(f"{OCX}Plate_T") is plate.get_content_model()
+        assert warm.where_used("ocx:Plate") == cold.where_used("ocx:Plate")
+        assert warm.where_used("ocx:Plate_T", derived=True) == cold.where_used("ocx:Plate_T", derived=True)
+
+    def test_changed_import_invalidates(self, local_schema_folder):
+        process(local_schema_folder)
+        xml = Path(local_schema_folder) / "xml.xsd"
+        xml.write_text(xml.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+        schema_reader = process(local_schema_folder)
+        statistics = schema_reader.get_cache_statistics()
+        assert statistics.hits == 0
+        assert statistics.misses == 1
+        # The stale entry is replaced
+        entries = list((Path(local_schema_folder) / CACHE_FOLDER).glob("*.pickle"))
+        assert len(entries) == 1
+
+    def test_no_cache(self, local_schema_folder):
+        schema_reader = OcxSchema(logger, local_schema_folder, use_cache=False)
+        assert schema_reader.process_schema(
+            str(Path(local_schema_folder) / "OCX_Schema.xsd")
+        )
+        assert not (Path(local_schema_folder) / CACHE_FOLDER).exists()
+
+    def test_disabled_by_default(self, local_schema_folder):
+        schema_reader = OcxSchema(logger, local_schema_folder)
+        assert schema_reader.process_schema(
+            str(Path(local_schema_folder) / "OCX_Schema.xsd")
+        )
+        assert not (Path(local_schema_folder) / CACHE_FOLDER).exists()
@@ -13,3 +13,33 @@ def test_schema_parse():
     runner = CliRunner()
     result = runner.invoke(cli,['schema','parse'])
     assert result.exit_code == 0
+
+def test_schema_cache():
+    runner = CliRunner()
+    result = runner.invoke(cli, ['schema', 'cache'])
+    assert result.exit_code == 0
+
+def test_schema_imports():
+    runner = CliRunner()
+    result = runner.invoke(cli, ['schema', 'imports'])
+    assert result.exit_code == 0
+
+def test_schema_watch():
+    runner = CliRunner()
+    result = runner.invoke(cli, ['schema', 'watch', '--stop'])
+    assert result.exit_code == 0
+
+def test_schema_assign_catalog(shared_datadir):
+    runner = CliRunner()
+    result = runner.invoke(cli, ['schema', 'assign-catalog', '-f', str(shared_datadir / 'catalog.xml')])
+    assert result.exit_code == 0
+
+def test_schema_where_used():
+    runner = CliRunner()
+    result = runner.invoke(cli, ['schema', 'where-used', 'ocx:Plate_T'])
+    assert result.exit_code == 0
+
+def test_schema_namespace():
+    runner = CliRunner()
+    result = runner.invoke(cli, ['schema', 'namespace', '--documents'])
+    assert result.exit_code == 0
@@ -0,0 +1,54 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+import logging
+from pathlib import Path
+
+from ocx_tools.schema.parser import OcxSchema
+
+logger = logging.Logger(__name__)
+
+OCX = "{https://3docx.org/fileadmin//ocx_schema//V287//OCX_Schema.xsd}"
+
+
+def process(folder: str, detached: bool, use_cache: bool = False) -> OcxSchema:
+    schema_reader = OcxSchema(logger, folder, use_cache=use_cache, detached=detached)
+    assert schema_reader.process_schema(str(Path(folder) / "OCX_Schema.xsd")) is True
+    return schema_reader
+
+
+class TestDetachedModel:
+    def test_same_model(self, local_schema_folder):
+        detached = process(local_schema_folder, detached=True)
+        attached = process(local_schema_folder, detached=False)
+        assert detached.is_detached() and not attached.is_detached()
+        assert detached._get_all_schema_elements() == {}
+        assert detached.tbl_complex_types() == attached.tbl_complex_types()
+        assert detached.tbl_element_types() == attached.tbl_element_types()
+        for tag, ocx in attached._ocx_global_elements.items():
+            other = detached._ocx_global_elements[tag]
+            assert other.is_detached()
+            assert other.get_schema_element() is None
+            assert other.get_properties() == ocx.get_properties()
+            assert other.children_to_dict() == ocx.children_to_dict()
+            assert list(other.get_parents()) == list(ocx.get_parents())
+            assert other.is_abstract() == ocx.is_abstract()
+            assert other.is_choice() == ocx.is_choice()
+            assert other.get_substitution_group() == ocx.get_substitution_group()
+
+    def test_no_schema_elements(self, local_schema_folder):
+        schema_reader = process(local_schema_folder, detached=True)
+        plate = schema_reader.get_ocx_element_from_type("ocx:Plate")
+        assert all(parent is None for parent in plate.get_parents().values())
+        assert all(child._element is None for child in plate.get_children())
+        assert schema_reader.is_subtype(plate.get_tag(), f"{OCX}StructurePart_T")
+        assert schema_reader.get_content_model(f"{OCX}Plate_T") is plate.get_content_model()
+        assert schema_reader.get_ocx_element_from_type("ocx:Plate_T") is None
+
+    def test_cache_and_reprocess(self, local_schema_folder):
+        process(local_schema_folder, detached=False, use_cache=True)
+        schema_reader = process(local_schema_folder, detached=True, use_cache=True)
+        assert "cache" in schema_reader.get_timings()
+        assert schema_reader.is_detached()
+        delta = schema_reader.reprocess_schema()
+        assert delta is not None
+        assert schema_reader.is_detached()
+        assert schema_reader.get_ocx_element_from_type("ocx:Plate").is_detached()
@@ -0,0 +1,87 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+import logging
+import time
+
+from requests.adapters import HTTPAdapter
+
+from ocx_tools.schema import DOWNLOAD_BACKOFF, DOWNLOAD_RETRIES, IMPORT_WORKERS
+from ocx_tools.schema.download import SchemaDownloader, shared_session
+from ocx_tools.schema.parser import OcxSchema
+
+logger = logging.Logger(__name__)
+
+
+class TestSchemaDownloader:
+    def test_conditional_download(self, schema_server, tmp_path):
+        downloader = SchemaDownloader(logger, str(tmp_path))
+        url = f"{schema_server.url}/xml.xsd"
+        first = downloader.fetch(url)
+        second = downloader.fetch(url)
+        assert first == second
+        assert first.read_bytes() == (tmp_path / first.name).read_bytes()
+        assert schema_server.requests == [("/xml.xsd", 200), ("/xml.xsd", 304)]
+        assert downloader.get_index()[url]["etag"] is not None
+
+    def test_index_is_persistent(self, schema_server, tmp_path):
+        url = f"{schema_server.url}/xml.xsd"
+        SchemaDownloader(logger, str(tmp_path)).fetch(url)
+        SchemaDownloader(logger, str(tmp_path)).fetch(url)
+        assert [status for path, status in schema_server.requests] == [200, 304]
+
+    def test_missing_schema(self, schema_server, tmp_path):
+        downloader = SchemaDownloader(logger, str(tmp_path))
+        assert downloader.fetch(f"{schema_server.url}/missing.xsd") is None
+
+    def test_lru_eviction(self, schema_server, tmp_path):
+        downloader = SchemaDownloader(logger, str(tmp_path), size_limit=390000)
+        xml = downloader.fetch(f"{schema_server.url}/xml.xsd")
+        time.sleep(0.01)
+        unitsml = downloader.fetch(f"{schema_server.url}/unitsmlSchema_lite-0.9.18.xsd")
+        time.sleep(0.01)
+        # Touch xml.xsd to make unitsml the least recently used download
+        downloader.fetch(f"{schema_server.url}/xml.xsd")
+        ocx = downloader.fetch(f"{schema_server.url}/OCX_Schema.xsd")
+        assert ocx.exists()
+        assert xml.exists()
+        assert not unitsml.exists()
+
+    def test_process_remote_schema(self, schema_server, tmp_path):
+        schema_reader = OcxSchema(logger, str(tmp_path), use_cache=False)
+        assert schema_reader.process_schema(f"{schema_server.url}/OCX_Schema.xsd")
+        assert schema_reader.get_ocx_element_from_type("ocx:Vessel") is not None
+        schema_server.requests.clear()
+        assert schema_reader.process_schema(f"{schema_server.url}/OCX_Schema.xsd")
+        assert {status for path, status in schema_server.requests} == {304}
+
+    def test_retry_with_backoff(self, schema_server, tmp_path):
+        downloader = SchemaDownloader(logger, str(tmp_path))
+        schema_server.failures["/xml.xsd"] = 2
+        file = downloader.fetch(f"{schema_server.url}/xml.xsd")
+        assert file is not None
+        assert [status for path, status in schema_server.requests] == [503, 503, 200]
+
+    def test_streamed_atomic_download(self, schema_server, tmp_path):
+        downloader = SchemaDownloader(logger, str(tmp_path))
+        file = downloader.fetch(f"{schema_server.url}/OCX_Schema.xsd")
+        served = (schema_server.served / "OCX_Schema.xsd").read_bytes()
+        assert file.read_bytes() == served
+        assert downloader.get_index()[f"{schema_server.url}/OCX_Schema.xsd"]["size"] == len(served)
+        assert list(tmp_path.glob(".tmp-*")) == []
+
+    def test_pooled_connections(self, schema_server, tmp_path):
+        session = shared_session()
+        assert shared_session() is session
+        for scheme in ["http://", "https://"]:
+            adapter = session.get_adapter(scheme)
+            assert isinstance(adapter, HTTPAdapter)
+            assert adapter._pool_maxsize == IMPORT_WORKERS
+            retry = adapter.max_retries
+            assert retry.total == DOWNLOAD_RETRIES
+            assert retry.backoff_factor == DOWNLOAD_BACKOFF
+            assert 503 in retry.status_forcelist
+            assert retry.allowed_methods == frozenset(["GET", "HEAD"])
+        assert "gzip" in session.headers["Accept-Encoding"]
+        downloader = SchemaDownloader(logger, str(tmp_path))
+        for file in ["xml.xsd", "unitsmlSchema_lite-0.9.18.xsd", "OCX_Schema.xsd"]:
+            downloader.fetch(f"{schema_server.url}/{file}")
+        assert len(schema_server.clients) == 1
@@ -1,6 +1,10 @@
 #  Copyright (c) 2022. OCX Consortium https://3docx.org. See the LICENSE
 
+from lxml import etree
+from lxml.etree import QName
+
 from ocx_tools.schema.helpers import SchemaHelper
+from ocx_tools.schema_xml.element import LxmlElement
 
 
 class TestSchemaHelpers:
@@ -25,3 +29,49 @@ class TestSchemaHelpers:
         root = load_schema_from_file.get_root()
         data = SchemaHelper.schema_changes_data_grid(root)
         data_regression.check(data)
+
+    def test_global_declarations(self, load_schema_from_file):
+        """Test that only the direct children of the schema root are indexed
+
+        Args:
+            load_schema_from_file: Shared test data provided by @pytest.fixture in ``conftest.py``
+        """
+        root = load_schema_from_file.get_root()
+        types = ["element", "attribute", "complexType", "simpleType", "attributeGroup"]
+        declarations = list(SchemaHelper.global_declarations(root, types))
+        assert all(e.getparent() is root for schema_type, name, e in declarations)
+        elements = [name for schema_type, name, e in declarations if schema_type == "element"]
+        assert "Vessel" in elements
+        assert len(elements) == len(set(elements))
+
+    def test_global_declarations_single_pass(self, load_schema_from_file):
+        """Compare the single pass against one descendant scan per schema type
+
+        Args:
+            load_schema_from_file: Shared test data provided by @pytest.fixture in ``conftest.py``
+        """
+        root = load_schema_from_file.get_root()
+        types = ["element", "attribute", "complexType", "simpleType", "attributeGroup"]
+
+        def scans():
+            return [
+                e
+                for schema_type in types
+                for e in LxmlElement.find_all_children_with_name_and_attribute(root, schema_type, "name")
+            ]
+
+        def single_pass():
+            return [e for schema_type, name, e in SchemaHelper.global_declarations(root, types)]
+
+        # The scans visit every descendant once per type, the single pass only the children of the root
+        visited_by_scans = len(types) * sum(1 for e in root.iterdescendants())
+        assert visited_by_scans > 20 * len(root)
+        declarations = single_pass()
+        assert set(declarations) == {e for e in scans() if e.getparent() is root}
+        # Each global declaration is collected once, in document order
+        named = [
+            e
+            for e in root.iterchildren(tag=etree.Element)
+            if QName(e).localname in types and e.get("name") is not None
+        ]
+        assert declarations == named
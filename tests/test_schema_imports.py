@@ -0,0 +1,106 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+import logging
+from pathlib import Path
+
+from ocx_tools.schema.import_graph import ImportGraph
+from ocx_tools.schema.parser import OcxSchema
+
+logger = logging.Logger(__name__)
+
+
+def process(url: str, folder: str, max_workers: int) -> OcxSchema:
+    schema_reader = OcxSchema(logger, folder, use_cache=False)
+    schema_reader._max_workers = max_workers
+    assert schema_reader.process_schema(url) is True
+    return schema_reader
+
+
+class TestSchemaImports:
+    def test_parallel_equals_serial(self, local_schema_folder):
+        url = str(Path(local_schema_folder) / "OCX_Schema.xsd")
+        serial = process(url, local_schema_folder, 1)
+        parallel = process(url, local_schema_folder, 8)
+        assert list(parallel.get_namespaces().items()) == list(
+            serial.get_namespaces().items()
+        )
+        assert list(parallel._get_all_schema_elements()) == list(
+            serial._get_all_schema_elements()
+        )
+        assert parallel.tbl_summary() == serial.tbl_summary()
+        assert [e.get_tag() for e in parallel.get_ocx_elements()] == [
+            e.get_tag() for e in serial.get_ocx_elements()
+        ]
+
+    def test_fetch_each_location_once(self, schema_server, tmp_path):
+        process(f"{schema_server.url}/OCX_Schema.xsd", str(tmp_path), 8)
+        paths = [path for path, status in schema_server.requests]
+        assert sorted(paths) == sorted(set(paths))
+        assert len(paths) == 3
+
+    def test_import_graph(self, local_schema_folder):
+        url = str(Path(local_schema_folder) / "OCX_Schema.xsd")
+        schema_reader = process(url, local_schema_folder, 8)
+        graph = schema_reader.get_import_graph()
+        assert graph.get_root() == url
+        assert set(graph.get_nodes()) == {u for u, f in schema_reader._parsed_files}
+        folder = Path(local_schema_folder)
+        unitsml = str(folder / "unitsmlSchema_lite-0.9.18.xsd")
+        assert graph.get_edges() == [
+            (url, unitsml),
+            (unitsml, str(folder / "xml.xsd")),
+        ]
+        assert graph.get_nodes()[url].imports == 1
+        assert all(node.parse_time > 0 for node in graph.get_nodes().values())
+        assert graph.has_cycles() is False
+        assert list(graph.get_nodes()) == [url, unitsml, str(folder / "xml.xsd")]
+
+    def test_import_graph_sorted(self):
+        graph = ImportGraph("root.xsd")
+        # Added in the order the threads complete
+        for url in ("c.xsd", "orphan.xsd", "b.xsd", "a.xsd", "root.xsd"):
+            graph.add_node(url, url)
+        graph.add_imports("root.xsd", {"urn:a": "a.xsd", "urn:b": "b.xsd"})
+        graph.add_imports("b.xsd", {"urn:c": "c.xsd"})
+        graph.add_imports("a.xsd", {"urn:c": "c.xsd"})
+        graph.sort()
+        assert list(graph.get_nodes()) == ["root.xsd", "a.xsd", "c.xsd", "b.xsd", "orphan.xsd"]
+        assert graph.get_edges() == [
+            ("root.xsd", "a.xsd"),
+            ("root.xsd", "b.xsd"),
+            ("a.xsd", "c.xsd"),
+            ("b.xsd", "c.xsd"),
+        ]
+
+    def test_cyclic_imports(self, tmp_path):
+        schema = (
+            '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" xmlns:{other}="urn:{other}" '
+            'targetNamespace="urn:{name}" xmlns:{name}="urn:{name}">'
+            '<xs:import namespace="urn:{other}" schemaLocation="{location}"/>'
+            '<xs:element name="{name}" type="xs:string"/></xs:schema>'
+        )
+        a, b = tmp_path / "a.xsd", tmp_path / "b.xsd"
+        a.write_text(schema.format(name="a", other="b", location=b))
+        b.write_text(schema.format(name="b", other="a", location=a))
+        schema_reader = process(str(a), str(tmp_path), 8)
+        graph = schema_reader.get_import_graph()
+        assert len(graph.get_nodes()) == 2
+        assert graph.find_cycles() == [[str(a), str(b), str(a)]]
+        assert len(schema_reader._parsed_files) == 2
+
+    def test_cyclic_imports_from_cache(self, tmp_path, caplog):
+        schema = (
+            '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" xmlns:{other}="urn:{other}" '
+            'targetNamespace="urn:{name}" xmlns:{name}="urn:{name}">'
+            '<xs:import namespace="urn:{other}" schemaLocation="{location}"/>'
+            '<xs:element name="{name}" type="xs:string"/></xs:schema>'
+        )
+        a, b = tmp_path / "a.xsd", tmp_path / "b.xsd"
+        a.write_text(schema.format(name="a", other="b", location=b))
+        b.write_text(schema.format(name="b", other="a", location=a))
+        cycle_logger = logging.getLogger("test_cyclic_imports_from_cache")
+        for warm in (False, True):
+            schema_reader = OcxSchema(cycle_logger, str(tmp_path), use_cache=True)
+            caplog.clear()
+            assert schema_reader.process_schema(str(a)) is True
+            assert ("cache" in schema_reader.get_timings()) is warm
+            assert "Cyclic schema import" in caplog.text
@@ -0,0 +1,140 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+import logging
+import threading
+from pathlib import Path
+
+from ocx_tools.schema.parser import OcxSchema
+
+logger = logging.Logger(__name__)
+
+XML = "http://www.w3.org/XML/1998/namespace"
+OCX = "{https://3docx.org/fileadmin//ocx_schema//V287//OCX_Schema.xsd}"
+
+
+def process(folder: str, lazy: bool) -> OcxSchema:
+    schema_reader = OcxSchema(logger, folder, use_cache=False, lazy=lazy)
+    assert schema_reader.process_schema(str(Path(folder) / "OCX_Schema.xsd")) is True
+    return schema_reader
+
+
+class TestLazyImports:
+    def test_defer_imports(self, local_schema_folder):
+        schema_reader = process(local_schema_folder, lazy=True)
+        # The unitsml schema is referenced by the OCX elements, the xml schema is not needed
+        assert len(schema_reader.get_parsed_files()) == 2
+        assert list(schema_reader.get_pending_imports()) == [XML]
+        assert "lazy" in schema_reader.get_timings()
+        assert schema_reader.get_ocx_element_from_type("unitsml:UnitsML") is not None
+        tag, element = schema_reader._get_element_from_type("xml:lang")
+        assert element is not None
+        assert schema_reader.get_pending_imports() == {}
+        assert len(schema_reader.get_parsed_files()) == 3
+
+    def test_same_model(self, local_schema_folder):
+        lazy = process(local_schema_folder, lazy=True)
+        eager = process(local_schema_folder, lazy=False)
+        for tag, ocx in lazy._ocx_global_elements.items():
+            other = eager._ocx_global_elements[tag]
+            assert ocx.attributes_to_dict() == other.attributes_to_dict()
+            assert ocx.children_to_dict() == other.children_to_dict()
+            assert list(ocx.get_parents()) == list(other.get_parents())
+        assert all(
+            tag in lazy._ocx_global_elements
+            for tag in eager._ocx_global_elements
+            if tag.startswith(OCX)
+        )
+
+    def test_concurrent_lookup(self, local_schema_folder):
+        schema_reader = process(local_schema_folder, lazy=True)
+        barrier = threading.Barrier(8)
+        results = []
+
+        def lookup():
+            barrier.wait()
+            results.append(schema_reader._get_element_from_type("xml:lang")[1])
+
+        threads = [threading.Thread(target=lookup) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(results) == 8
+        assert all(element is results[0] and element is not None for element in results)
+        assert len(schema_reader.get_parsed_files()) == 3
+
+
+def process_lazy_elements(folder: str) -> OcxSchema:
+    schema_reader = OcxSchema(logger, folder, use_cache=False, lazy_elements=True)
+    assert schema_reader.process_schema(str(Path(folder) / "OCX_Schema.xsd")) is True
+    return schema_reader
+
+
+class TestLazyElements:
+    def test_same_model(self, local_schema_folder):
+        lazy = process_lazy_elements(local_schema_folder)
+        eager = process(local_schema_folder, lazy=False)
+        assert lazy.get_materialized() == []
+        for tag, ocx in eager._ocx_global_elements.items():
+            other = lazy._ocx_global_elements[tag]
+            assert other.is_lazy()
+            assert other.attributes_to_dict() == ocx.attributes_to_dict()
+            assert other.children_to_dict() == ocx.children_to_dict()
+            assert list(other.get_parents()) == list(ocx.get_parents())
+            assert other.get_assertion_tests() == ocx.get_assertion_tests()
+        assert lazy.where_used("ocx:Plate") == eager.where_used("ocx:Plate")
+
+    def test_where_used_not_materialized(self, local_schema_folder):
+        schema_reader = process_lazy_elements(local_schema_folder)
+        assert f"{OCX}Vessel" in schema_reader.where_used("ocx:Plate")["content"]
+        # Building the index does not fill or evict the materialized elements, nor keep their fragments
+        assert schema_reader.get_materialized() == []
+        assert schema_reader._resolved == {}
+
+    def test_eviction(self, local_schema_folder):
+        schema_reader = process_lazy_elements(local_schema_folder)
+        schema_reader._max_materialized = 2
+        plate = schema_reader.get_ocx_element_from_type("ocx:Plate")
+        vessel = schema_reader.get_ocx_element_from_type("ocx:Vessel")
+        children = plate.get_children()
+        vessel.get_children()
+        plate.get_attributes()
+        assert schema_reader.get_materialized() == [vessel.get_tag(), plate.get_tag()]
+        schema_reader.get_ocx_element_from_type("ocx:Panel").get_children()
+        assert vessel.get_tag() not in schema_reader.get_materialized()
+        assert len(vessel.get_children()) > 0
+        assert plate.get_tag() not in schema_reader.get_materialized()
+        # The fragments only the evicted elements were built from are released
+        content_model = ("content_model", f"{OCX}Plate_T")
+        assert content_model not in schema_reader._resolved
+        assert set(schema_reader._fragment_users) <= set(schema_reader._resolved)
+        assert plate.get_children() is not children
+        assert [c.get_name() for c in plate.get_children()] == [c.get_name() for c in children]
+        assert content_model in schema_reader._resolved
+
+    def test_concurrent_materialize(self, local_schema_folder):
+        schema_reader = process_lazy_elements(local_schema_folder)
+        plate = schema_reader.get_ocx_element_from_type("ocx:Plate")
+        barrier = threading.Barrier(8)
+        results = []
+
+        def materialize():
+            barrier.wait()
+            results.append(plate.get_attributes())
+
+        threads = [threading.Thread(target=materialize) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(results) == 8
+        assert all(attributes is results[0] for attributes in results)
+        assert schema_reader.get_materialized() == [plate.get_tag()]
+
+    def test_reprocess(self, local_schema_folder):
+        schema_reader = process_lazy_elements(local_schema_folder)
+        schema_reader.get_ocx_element_from_type("ocx:Plate").get_children()
+        delta = schema_reader.reprocess_schema()
+        assert delta is not None and delta.changed == []
+        assert schema_reader.get_materialized() == []
+        plate = schema_reader.get_ocx_element_from_type("ocx:Plate")
+        assert [c.get_name() for c in plate.get_children()][0] == "Description"
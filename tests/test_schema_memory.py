@@ -0,0 +1,60 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+import pickle
+import sys
+
+from ocx_tools.schema.parser import OcxSchema
+
+
+class _Plain:
+    """A model object with the attributes in an instance dict, as before the slots"""
+
+
+def plain_size(item) -> int:
+    plain = _Plain()
+    for cls in type(item).__mro__:
+        for slot in getattr(cls, "__slots__", ()):
+            setattr(plain, slot, getattr(item, slot, None))
+    return sys.getsizeof(plain) + sys.getsizeof(plain.__dict__)
+
+
+class TestSlots:
+    def test_no_instance_dict(self, process_schema: OcxSchema):
+        plate = process_schema.get_ocx_element_from_type("ocx:Plate")
+        objects = [plate, plate.get_content_model()]
+        objects += list(plate.get_children()) + list(plate.get_attributes())
+        for item in objects:
+            assert not hasattr(item, "__dict__")
+
+    def test_size(self, process_schema: OcxSchema):
+        objects = {}
+        for e in process_schema.get_ocx_elements():
+            objects[id(e)] = e
+            for item in list(e.get_children()) + list(e.get_attributes()):
+                objects[id(item)] = item
+        slotted = sum(sys.getsizeof(item) for item in objects.values())
+        plain = sum(plain_size(item) for item in objects.values())
+        assert slotted < 0.6 * plain
+
+    def test_interned(self, process_schema: OcxSchema):
+        names = {}
+        for e in process_schema.get_ocx_elements():
+            for attribute in e.get_attributes():
+                name = attribute.get_name()
+                assert names.setdefault(name, name) is name
+
+    def test_cardinality(self, process_schema: OcxSchema):
+        positions = process_schema.get_ocx_element_from_type("ocx:Positions")
+        assert positions.get_content_model().get_particles()[0].get_cardinality() == (
+            3,
+            3,
+        )
+        child = positions.get_children()[0]
+        assert child.get_cardinality() == "[3, 3]"
+        assert child.get_use() == "req."
+
+    def test_pickle(self, process_schema: OcxSchema):
+        plate = process_schema.get_ocx_element_from_type("ocx:Plate")
+        attribute = plate.get_attributes()[0]
+        copy = pickle.loads(pickle.dumps(attribute))
+        assert copy.get_name() == attribute.get_name()
+        assert copy.get_use() == attribute.get_use()
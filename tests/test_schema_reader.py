@@ -29,3 +29,23 @@ class TestOcxSchema:
     def test_attribute_types(self, data_regression, process_schema: OcxSchema):
         result = process_schema.tbl_simple_types()
         data_regression.check(result)
+
+    def test_shared_attributes(self, process_schema: OcxSchema):
+        plate = process_schema.get_ocx_element_from_type("ocx:Plate")
+        names = [a.get_name() for a in plate.get_attributes()]
+        assert isinstance(plate.get_attributes(), tuple)
+        assert len(names) > 0
+        # The attributes of a type are resolved once and shared
+        plate_type = next(iter(plate.get_parents()))
+        plate_type = process_schema._resolved[("attributes", plate_type)][0]
+        assert all(a in plate.get_attributes() for a in plate_type)
+        by_type = {}
+        for e in process_schema.get_ocx_elements():
+            by_type.setdefault(tuple(e.get_parents()), []).append(e)
+        shared = [elements for elements in by_type.values() if len(elements) > 1]
+        assert len(shared) > 0
+        first, second = shared[0][:2]
+        assert first.get_attributes() is second.get_attributes()
+        # Adding an attribute copies the shared attributes
+        first.add_attribute(plate.get_attributes()[0])
+        assert len(first.get_attributes()) == len(second.get_attributes()) + 1
@@ -0,0 +1,151 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+import logging
+import threading
+from pathlib import Path
+
+import pytest
+
+from ocx_tools.schema.parser import OcxSchema
+
+logger = logging.Logger(__name__)
+
+OCX = "{https://3docx.org/fileadmin//ocx_schema//V287//OCX_Schema.xsd}"
+
+
+def process(url: str, folder: str) -> OcxSchema:
+    schema_reader = OcxSchema(logger, folder, use_cache=False)
+    assert schema_reader.process_schema(url) is True
+    return schema_reader
+
+
+def model(schema_reader: OcxSchema) -> list:
+    return [
+        (
+            e.get_tag(),
+            list(e.get_parents()),
+            e.attributes_to_dict(),
+            e.children_to_dict(),
+            e.get_annotation(),
+        )
+        for e in schema_reader.get_ocx_elements()
+    ]
+
+
+class TestReprocessSchema:
+    def test_unchanged(self, local_schema_folder):
+        url = str(Path(local_schema_folder) / "OCX_Schema.xsd")
+        schema_reader = process(url, local_schema_folder)
+        before = dict(schema_reader._ocx_global_elements)
+        delta = schema_reader.reprocess_schema()
+        assert delta.files == []
+        assert delta.rebuilt == 0
+        assert delta.added == delta.removed == delta.changed == []
+        for tag, ocx in schema_reader._ocx_global_elements.items():
+            assert ocx is before[tag]
+
+    def test_changed_file(self, local_schema_folder):
+        url = str(Path(local_schema_folder) / "OCX_Schema.xsd")
+        schema_reader = process(url, local_schema_folder)
+        before = dict(schema_reader._ocx_global_elements)
+        schema = Path(url)
+        text = schema.read_text(encoding="utf-8")
+        text = text.replace(
+            '<xs:element name="Plate" type="ocx:Plate_T">',
+            '<xs:element name="Plate" type="ocx:Plate_T" nillable="false">',
+        )
+        text = text.replace(
+            "</xs:schema>",
+            '<xs:element name="NewPlate" type="ocx:Plate_T"/></xs:schema>',
+        )
+        schema.write_text(text, encoding="utf-8")
+        delta = schema_reader.reprocess_schema()
+        assert delta.files == [url]
+        assert delta.added == [f"{OCX}NewPlate"]
+        assert delta.removed == []
+        assert f"{OCX}Plate" in delta.changed
+        # Only the new element and the elements depending on the modified declaration are rebuilt
+        assert sorted(delta.changed) == [f"{OCX}ComposedOf", f"{OCX}Plate", f"{OCX}Vessel"]
+        assert delta.rebuilt == len(delta.changed) + 1
+        kept = [
+            ocx
+            for tag, ocx in schema_reader._ocx_global_elements.items()
+            if ocx is before.get(tag)
+        ]
+        assert len(kept) == len(schema_reader._ocx_global_elements) - delta.rebuilt
+        # The kept elements are rebound to the documents parsed again
+        roots = schema_reader._documents
+        for ocx in kept:
+            assert ocx.get_schema_element().getroottree().getroot() in roots
+            for child in ocx.get_children():
+                assert child._element.getroottree().getroot() in roots
+        # The result equals a full reprocess
+        assert model(schema_reader) == model(process(url, local_schema_folder))
+        assert schema_reader.tbl_summary() == process(url, local_schema_folder).tbl_summary()
+
+    def test_dependencies(self, local_schema_folder):
+        url = str(Path(local_schema_folder) / "OCX_Schema.xsd")
+        schema_reader = process(url, local_schema_folder)
+        files = schema_reader.get_dependencies(f"{OCX}Plate")
+        assert url in files
+        assert str(Path(local_schema_folder) / "unitsmlSchema_lite-0.9.18.xsd") not in files
+
+    def test_published_in_one_step(self, local_schema_folder, monkeypatch):
+        url = str(Path(local_schema_folder) / "OCX_Schema.xsd")
+        schema_reader = process(url, local_schema_folder)
+        summary = schema_reader.tbl_summary()
+        schema = Path(url)
+        schema.write_text(
+            schema.read_text(encoding="utf-8").replace(
+                "</xs:schema>",
+                '<xs:element name="NewPlate" type="ocx:Plate_T"/></xs:schema>',
+            ),
+            encoding="utf-8",
+        )
+        building = threading.Event()
+        release = threading.Event()
+        reprocess = OcxSchema._reprocess_schema
+
+        def blocked(work, schema_url):
+            building.set()
+            release.wait(10)
+            return reprocess(work, schema_url)
+
+        monkeypatch.setattr(OcxSchema, "_reprocess_schema", blocked)
+        watcher = threading.Thread(target=schema_reader.reprocess_schema)
+        watcher.start()
+        try:
+            assert building.wait(10)
+            # The model is built aside, the readers see the current model
+            assert schema_reader.get_ocx_element_from_type("ocx:NewPlate") is None
+            assert schema_reader.tbl_summary() == summary
+            # Processing the schema waits for the reprocess
+            assert schema_reader._processing.acquire(blocking=False) is False
+        finally:
+            release.set()
+            watcher.join()
+        assert schema_reader.get_ocx_element_from_type("ocx:NewPlate") is not None
+        assert schema_reader.tbl_summary() != summary
+
+    def test_failed_reprocess_rolled_back(self, local_schema_folder):
+        url = str(Path(local_schema_folder) / "OCX_Schema.xsd")
+        schema_reader = process(url, local_schema_folder)
+        before = model(schema_reader)
+        roots = list(schema_reader._documents)
+        schema = Path(url)
+        schema.write_text(
+            schema.read_text(encoding="utf-8").replace(
+                '<xs:element ref="ocx:PlateMaterial"/>',
+                '<xs:element ref="ocx:PlateMaterial"/><xs:element ref="ocx:Missing"/>',
+                1,
+            ),
+            encoding="utf-8",
+        )
+        with pytest.raises(AttributeError):
+            schema_reader.reprocess_schema()
+        # The current model is unchanged and still bound to its documents
+        assert schema_reader._documents == roots
+        for ocx in schema_reader.get_ocx_elements():
+            assert ocx.get_schema_element().getroottree().getroot() in roots
+            for child in ocx.get_children():
+                assert child._element.getroottree().getroot() in roots
+        assert model(schema_reader) == before
@@ -0,0 +1,50 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+import logging
+import threading
+from pathlib import Path
+
+from ocx_tools.schema.parser import OcxSchema
+from ocx_tools.schema.watch import SchemaWatcher
+
+logger = logging.Logger(__name__)
+
+OCX = "{https://3docx.org/fileadmin//ocx_schema//V287//OCX_Schema.xsd}"
+
+
+class TestSchemaWatcher:
+    def test_reprocess_on_change(self, local_schema_folder):
+        url = str(Path(local_schema_folder) / "OCX_Schema.xsd")
+        schema_reader = OcxSchema(logger, local_schema_folder, use_cache=False)
+        assert schema_reader.process_schema(url) is True
+        deltas = []
+        changed = threading.Event()
+
+        def callback(delta):
+            deltas.append(delta)
+            changed.set()
+
+        watcher = SchemaWatcher(logger, schema_reader, callback, interval=0.05)
+        assert watcher.start() is True
+        assert watcher.start() is False
+        try:
+            schema = Path(url)
+            text = schema.read_text(encoding="utf-8")
+            schema.write_text(
+                text.replace(
+                    "</xs:schema>",
+                    '<xs:element name="NewPlate" type="ocx:Plate_T"/></xs:schema>',
+                ),
+                encoding="utf-8",
+            )
+            assert changed.wait(10)
+        finally:
+            watcher.stop()
+        assert watcher.is_watching() is False
+        assert len(deltas) == 1
+        assert deltas[0].added == [f"{OCX}NewPlate"]
+        assert f"{OCX}NewPlate" in schema_reader._ocx_global_elements
+
+    def test_not_parsed(self, local_schema_folder):
+        schema_reader = OcxSchema(logger, local_schema_folder, use_cache=False)
+        watcher = SchemaWatcher(logger, schema_reader)
+        assert watcher.start() is False
@@ -0,0 +1,51 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+import logging
+
+from ocx_tools.schema.parser import OcxSchema
+from ocx_tools.schema.substitution import SubstitutionGroupIndex
+
+logger = logging.Logger(__name__)
+
+OCX = "{https://3docx.org/fileadmin//ocx_schema//V287//OCX_Schema.xsd}"
+
+
+class TestSubstitutionGroups:
+    def test_transitive_members(self):
+        index = SubstitutionGroupIndex(logger)
+        index.add("a", None, True)
+        index.add("b", "a", True)
+        index.add("c", "b", False)
+        index.add("d", "a", False)
+        assert index.get_members("a") == ["b", "c", "d"]
+        assert index.get_members("a", transitive=False) == ["b", "d"]
+        assert index.get_concrete_members("a") == ["c", "d"]
+        assert index.get_heads("c") == ["b", "a"]
+        # Adding a member resets the resolved members
+        index.add("e", "c", False)
+        assert index.get_members("a") == ["b", "c", "e", "d"]
+
+    def test_cycle(self):
+        index = SubstitutionGroupIndex(logger)
+        index.add("a", "b", False)
+        index.add("b", "a", False)
+        assert index.get_members("a") == ["b"]
+        assert index.get_heads("a") == ["b"]
+
+    def test_schema_groups(self, process_schema: OcxSchema):
+        index = process_schema.get_substitution_groups()
+        assert index.get_head(f"{OCX}Vessel") == f"{OCX}Form"
+        assert index.get_members(f"{OCX}Form") == [f"{OCX}Equipment", f"{OCX}Vessel"]
+        curves = index.get_concrete_members(f"{OCX}GeometryRepresentation")
+        assert f"{OCX}Line3D" in curves
+        assert f"{OCX}Curve3D" not in curves
+        assert f"{OCX}Curve3D" in index.get_members(f"{OCX}GeometryRepresentation")
+        members = [
+            e.get_tag()
+            for e in process_schema.get_ocx_elements()
+            if e.get_substitution_group() == "ocx:Form"
+        ]
+        assert index.get_members(f"{OCX}Form", transitive=False) == members
+
+    def test_where_used(self, process_schema: OcxSchema):
+        usage = process_schema.where_used("ocx:Vessel")
+        assert f"{OCX}ocxXML" in usage["substitution"]
@@ -0,0 +1,44 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+from ocx_tools.schema.parser import OcxSchema
+from ocx_tools.schema.symbols import RelationTable, SymbolTable
+
+OCX = "{https://3docx.org/fileadmin//ocx_schema//V287//OCX_Schema.xsd}"
+
+
+class TestSymbolTable:
+    def test_intern(self):
+        symbols = SymbolTable()
+        assert symbols.intern("{urn:a}Plate") == 0
+        assert symbols.intern("name") == 1
+        assert symbols.intern("{urn:a}Plate") == 0
+        assert len(symbols) == 2
+        assert "name" in symbols
+        assert symbols.get_id("unknown") is None
+        assert symbols.get_tag(0) == "{urn:a}Plate"
+        assert symbols.get_name(0) == "Plate"
+        assert symbols.get_namespace(0) == "urn:a"
+        assert symbols.get_namespace(1) == ""
+
+    def test_schema_symbols(self, process_schema: OcxSchema):
+        symbols = process_schema.get_symbols()
+        for e in process_schema.get_ocx_elements():
+            assert symbols.get_tag(symbols.get_id(e.get_tag())) == e.get_tag()
+
+
+class TestRelationTable:
+    def test_relation(self):
+        relation = RelationTable()
+        for source, target in [(0, 3), (2, 3), (0, 1), (0, 3), (1, 3)]:
+            relation.add(source, target)
+        assert len(relation) == 5
+        assert list(relation.get_targets(0)) == [3, 1]
+        assert list(relation.get_sources(3)) == [0, 2, 1]
+        assert list(relation.get_sources(2)) == []
+        assert list(relation.get_targets(7)) == []
+        # The index is rebuilt after adding
+        relation.add(4, 1)
+        assert list(relation.get_sources(1)) == [0, 4]
+
+    def test_empty(self):
+        relation = RelationTable()
+        assert list(relation.get_targets(0)) == []
@@ -0,0 +1,95 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+import logging
+from pathlib import Path
+
+from ocx_tools.schema.parser import OcxSchema
+from ocx_tools.schema.type_hierarchy import TypeHierarchy
+
+logger = logging.Logger(__name__)
+
+OCX = "{https://3docx.org/fileadmin//ocx_schema//V287//OCX_Schema.xsd}"
+
+
+def process(folder: str) -> OcxSchema:
+    schema_reader = OcxSchema(logger, folder, use_cache=False)
+    assert schema_reader.process_schema(str(Path(folder) / "OCX_Schema.xsd")) is True
+    return schema_reader
+
+
+def hierarchy(parents: dict) -> TypeHierarchy:
+    return TypeHierarchy(
+        logger,
+        lambda tag: (parents[tag], parents[tag].upper()) if tag in parents else None,
+    )
+
+
+class TestTypeHierarchy:
+    def test_ancestors(self):
+        types = hierarchy({"a": "b", "b": "c", "d": "b"})
+        assert list(types.get_ancestors("a")) == ["b", "c"]
+        assert types.get_ancestors("a")["b"] == "B"
+        # The ancestors of the same type are shared
+        assert types.get_ancestors("d") is types.get_ancestors("a")
+        assert types.get_ancestors("c") == {}
+
+    def test_is_subtype(self):
+        types = hierarchy({"a": "b", "b": "c", "d": "b", "e": "f"})
+        assert types.is_subtype("a", "c") is True
+        assert types.is_subtype("a", "b") is True
+        assert types.is_subtype("a", "a") is True
+        assert types.is_subtype("c", "a") is False
+        assert types.is_subtype("a", "d") is False
+        assert types.is_subtype("e", "c") is False
+        assert types.is_subtype("x", "c") is False
+
+    def test_is_subtype_unlabelled(self):
+        parents = {"a": "b", "b": "c", "d": "b"}
+        lookups = []
+        types = TypeHierarchy(
+            logger, lambda tag: lookups.append(tag) or ((parents[tag], None) if tag in parents else None)
+        )
+        assert types.is_subtype("a", "c") is True
+        labelled = dict(types._intervals)
+        for _ in range(3):
+            assert types.is_subtype("x", "c") is False
+            assert types.is_subtype("d", "c") is True
+            assert types.is_subtype("d", "a") is False
+        # Tags resolved after the labelling are not labelled again, and each tag is resolved once
+        assert types._intervals == labelled
+        assert sorted(lookups) == ["a", "b", "c", "d", "x"]
+
+    def test_cycles(self):
+        types = hierarchy({"a": "b", "b": "c", "c": "b"})
+        assert list(types.get_ancestors("a")) == ["b", "c"]
+        assert types.has_cycles() is True
+        assert types.get_cycles() == [["b", "c", "b"]]
+        assert "b" not in types.get_ancestors("b")
+        assert types.is_subtype("a", "b") is True
+
+    def test_schema_parents(self, local_schema_folder):
+        schema_reader = process(local_schema_folder)
+        plate = schema_reader._ocx_global_elements[f"{OCX}Plate"]
+        assert list(plate.get_parents())[:3] == [
+            f"{OCX}Plate_T",
+            f"{OCX}StructurePart_T",
+            f"{OCX}EntityBase_T",
+        ]
+        assert schema_reader.is_subtype(f"{OCX}Plate", f"{OCX}EntityBase_T") is True
+        assert schema_reader.is_subtype(f"{OCX}EntityBase_T", f"{OCX}Plate") is False
+        assert schema_reader.get_type_hierarchy().has_cycles() is False
+
+    def test_shared_parents(self, local_schema_folder):
+        schema_reader = process(local_schema_folder)
+        by_type = {}
+        for e in schema_reader.get_ocx_elements():
+            by_type.setdefault(next(iter(e.get_parents()), None), []).append(e)
+        elements = max(
+            (elements for tag, elements in by_type.items() if tag is not None), key=len
+        )
+        assert len(elements) > 2
+        first, second = elements[:2]
+        assert first.get_parents() is second.get_parents()
+        # Adding a parent copies the shared hash table
+        first.put_parent("extra", None)
+        assert "extra" not in second.get_parents()
+        assert second.get_parents() is elements[2].get_parents()
@@ -0,0 +1,46 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+from ocx_tools.schema.parser import OcxSchema
+
+OCX = "{https://3docx.org/fileadmin//ocx_schema//V287//OCX_Schema.xsd}"
+
+
+class TestWhereUsed:
+    def test_type(self, process_schema: OcxSchema):
+        usage = process_schema.where_used("ocx:Plate_T")
+        assert usage["type"] == [f"{OCX}Plate"]
+        assert process_schema.where_used("ocx:StructurePart_T")["type"] == []
+        derived = process_schema.where_used("ocx:StructurePart_T", derived=True)
+        assert f"{OCX}Plate" in derived["type"]
+
+    def test_content(self, process_schema: OcxSchema):
+        usage = process_schema.where_used("ocx:Plate")
+        assert f"{OCX}Vessel" in usage["content"]
+        # The content model of an element with a named type is the content model of the type
+        assert f"{OCX}ComposedOf" in usage["content"]
+        assert f"{OCX}ComposedOf_T" in usage["content"]
+
+    def test_parent_type_content(self, process_schema: OcxSchema):
+        usage = process_schema.where_used("ocx:Description")
+        # The base types of the global elements with the child in their content model
+        assert f"{OCX}StructurePart_T" in usage["content"]
+        assert f"{OCX}DescriptionBase_T" in usage["content"]
+        assert f"{OCX}IdBase_T" not in usage["content"]
+
+    def test_attribute(self, process_schema: OcxSchema):
+        index = process_schema.get_where_used()
+        users = index.get_elements_with_attribute("GUIDRef")
+        assert f"{OCX}Plate" in users
+        expected = [
+            e.get_tag()
+            for e in process_schema.get_ocx_elements()
+            if "GUIDRef" in [a.get_name() for a in e.get_attributes()]
+        ]
+        assert users == expected
+
+    def test_unknown(self, process_schema: OcxSchema):
+        assert process_schema.where_used("xyz:Unknown") == {
+            "type": [],
+            "content": [],
+            "substitution": [],
+            "attribute": [],
+        }
@@ -0,0 +1,80 @@
+#  Copyright (c) 2023. OCX Consortium https://3docx.org. See the LICENSE
+import logging
+
+from lxml import etree
+
+from ocx_tools.schema.parser import OcxSchema
+from ocx_tools.schema_xml.catalog import XmlCatalog
+from ocx_tools.schema_xml.parse import LxmlParser
+
+logger = logging.Logger(__name__)
+
+
+class TestXmlCatalog:
+    def test_resolve(self, shared_datadir):
+        catalog = XmlCatalog(logger)
+        assert catalog.load(str(shared_datadir / "catalog.xml")) is True
+        xml = str((shared_datadir / "xml.xsd").resolve())
+        assert catalog.resolve("https://www.w3.org/2009/01/xml.xsd") == xml
+        assert catalog.resolve("http://www.w3.org/2001/xml.xsd") == xml
+        assert catalog.resolve(
+            "https://3docx.org/fileadmin/ocx_schema/unitsml/unitsmlSchema_lite-0.9.18.xsd"
+        ) == str((shared_datadir / "unitsmlSchema_lite-0.9.18.xsd").resolve())
+        assert catalog.resolve("https://3docx.org/other.xsd") is None
+
+    def test_next_catalog(self, shared_datadir, tmp_path):
+        catalog_file = tmp_path / "catalog.xml"
+        catalog_file.write_text(
+            '<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">'
+            '<group xml:base="schemas/"><uri name="urn:a" uri="a.xsd"/></group>'
+            f'<nextCatalog catalog="{(shared_datadir / "catalog.xml").as_uri()}"/>'
+            "</catalog>"
+        )
+        catalog = XmlCatalog(logger)
+        assert catalog.load(str(catalog_file)) is True
+        assert catalog.resolve("urn:a") == str(tmp_path / "schemas" / "a.xsd")
+        assert catalog.resolve("https://www.w3.org/2009/01/xml.xsd") is not None
+        assert len(catalog.get_files()) == 2
+
+    def test_not_a_catalog(self, shared_datadir):
+        catalog = XmlCatalog(logger)
+        assert catalog.load(str(shared_datadir / "xml.xsd")) is False
+        assert catalog.load(str(shared_datadir / "missing.xml")) is False
+
+    def test_resolver(self, shared_datadir, tmp_path):
+        schema = tmp_path / "lang.xsd"
+        schema.write_text(
+            '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" targetNamespace="urn:lang">'
+            '<xs:import namespace="http://www.w3.org/XML/1998/namespace" '
+            'schemaLocation="https://www.w3.org/2009/01/xml.xsd"/>'
+            '<xs:element name="text"><xs:complexType><xs:attribute ref="xml:lang"/>'
+            "</xs:complexType></xs:element></xs:schema>"
+        )
+        catalog = XmlCatalog(logger)
+        assert catalog.load(str(shared_datadir / "catalog.xml"))
+        parser = LxmlParser(logger, catalog.resolver())
+        assert parser.parse(str(schema)) is True
+        # The import is loaded from the local copy
+        validator = etree.XMLSchema(parser.get_root().getroottree())
+        assert validator.validate(
+            etree.fromstring('<text xmlns="urn:lang" xml:lang="en"/>')
+        )
+
+    def test_process_schema(self, shared_datadir, tmp_path):
+        folder = tmp_path / "schemas"
+        schema_reader = OcxSchema(logger, str(folder), use_cache=False)
+        assert schema_reader.load_catalog(str(shared_datadir / "catalog.xml"), strict=True)
+        assert schema_reader.process_schema(str(shared_datadir / "OCX_Schema.xsd"))
+        urls = [url for url, file in schema_reader.get_parsed_files()]
+        assert "https://www.w3.org/2009/01/xml.xsd" in urls
+        # Nothing is downloaded
+        assert not folder.exists() or list(folder.iterdir()) == []
+
+    def test_strict(self, shared_datadir, tmp_path):
+        catalog_file = tmp_path / "catalog.xml"
+        catalog_file.write_text(
+            '<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog"/>'
+        )
+        schema_reader = OcxSchema(logger, str(tmp_path), use_cache=False)
+        assert schema_reader.load_catalog(str(catalog_file), strict=True)
+        assert schema_reader.process_schema(str(shared_datadir / "OCX_Schema.xsd")) is False
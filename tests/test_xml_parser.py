@@ -1,4 +1,15 @@
 #  Copyright (c) 2022. OCX Consortium https://3docx.org. See the LICENSE
+import gzip
+import logging
+import threading
+import zipfile
+
+from lxml import etree
+
+from ocx_tools.schema_xml import parse
+from ocx_tools.schema_xml.parse import LxmlParser
+
+logger = logging.Logger(__name__)
 
 
 class TestLxmlParser:
@@ -29,3 +40,98 @@ class TestLxmlParser:
     def test_get_referenced_files(self, data_regression, load_schema_from_file):
         referenced_files = load_schema_from_file.get_referenced_files()
         data_regression.check(referenced_files)
+
+    def test_get_parser(self, load_schema_from_file):
+        parser = load_schema_from_file.get_parser()
+        assert load_schema_from_file.get_parser() is parser
+        assert load_schema_from_file.get_parser(store_ids=True) is not parser
+        other = []
+        thread = threading.Thread(target=lambda: other.append(LxmlParser.get_parser()))
+        thread.start()
+        thread.join()
+        assert other[0] is not parser
+
+    def test_get_parser_resolver(self, load_schema_from_file):
+        first, second = etree.Resolver(), etree.Resolver()
+        parser = LxmlParser.get_parser(resolver=first)
+        assert LxmlParser.get_parser(resolver=first) is parser
+        assert LxmlParser.get_parser() is not parser
+        # A new resolver replaces the parser of the previous one
+        assert LxmlParser.get_parser(resolver=second) is not parser
+        parsers = parse._parser_pool.parsers
+        assert [entry[0] for entry in parsers.values()].count(first) == 0
+
+    def test_parse_many(self, shared_datadir, load_schema_from_file):
+        root = load_schema_from_file.get_root()
+        files = [shared_datadir / "xml.xsd", shared_datadir / "missing.xsd"]
+        trees = load_schema_from_file.parse_many(files)
+        assert trees[0].getroot().get("targetNamespace") == "http://www.w3.org/XML/1998/namespace"
+        assert trees[1] is None
+        assert load_schema_from_file.get_root() is root
+
+    def test_parse_bytes(self, shared_datadir):
+        parser = LxmlParser(logger)
+        data = (shared_datadir / "unitsmlSchema_lite-0.9.18.xsd").read_bytes()
+        assert parser.parse_bytes(data, base_url="https://example.com/schemas/unitsml.xsd")
+        assert parser.doc_url() == "https://example.com/schemas/unitsml.xsd"
+        assert parser.get_target_namespace() == "urn:oasis:names:tc:unitsml:schema:xsd:UnitsMLSchema_lite-0.9.18"
+        assert parser.resolve_location("xml.xsd") == "https://example.com/schemas/xml.xsd"
+        assert parser.resolve_location("https://www.w3.org/2009/01/xml.xsd") == "https://www.w3.org/2009/01/xml.xsd"
+        assert parser.parse_bytes(b"<unclosed>") is False
+
+    def test_parse_buffer(self, shared_datadir, load_schema_from_file):
+        parser = LxmlParser(logger)
+        data = (shared_datadir / "OCX_Schema.xsd").read_bytes()
+        assert parser.parse_buffer(memoryview(data), base_url=str(shared_datadir / "OCX_Schema.xsd"))
+        assert len(parser.get_root()) == len(load_schema_from_file.get_root())
+        assert parser.resolve_location("xml.xsd") == str(shared_datadir / "xml.xsd")
+
+    def test_iterparse(self, tmp_path):
+        document = tmp_path / "model.xml"
+        with open(document, "w") as f:
+            f.write('<ocx:Model xmlns:ocx="urn:ocx"><ocx:Plates>')
+            for i in range(5000):
+                f.write(f'<ocx:Plate id="p{i}"><ocx:Thickness value="{i}"/></ocx:Plate>')
+            f.write("</ocx:Plates></ocx:Model>")
+        thickness = []
+        preceding = []
+
+        def plate(element):
+            thickness.append(element[0].get("value"))
+            previous = element.getprevious()
+            if previous is not None:
+                preceding.append(len(previous))
+                preceding.append(previous.getprevious() is not None)
+
+        parser = LxmlParser(logger)
+        statistics = parser.iterparse(document, {"{urn:ocx}Plate": plate})
+        assert statistics.elements == 10002
+        assert statistics.handled == 5000
+        assert thickness[-1] == "4999"
+        # Processed plates are released
+        assert not any(preceding)
+        assert statistics.elements_per_second > 0
+
+    def test_iterparse_local_name(self, shared_datadir):
+        parser = LxmlParser(logger)
+        names = []
+        statistics = parser.iterparse(
+            shared_datadir / "xml.xsd", {"attribute": lambda e: names.append(e.get("name"))}
+        )
+        assert "lang" in names
+        assert statistics.handled == len(names)
+
+    def test_parse_archive(self, shared_datadir, tmp_path):
+        archive = tmp_path / "schemas.zip"
+        with zipfile.ZipFile(archive, "w") as bundle:
+            bundle.write(shared_datadir / "xml.xsd", "w3c/xml.xsd")
+        compressed = tmp_path / "xml.xsd.gz"
+        compressed.write_bytes(gzip.compress((shared_datadir / "xml.xsd").read_bytes()))
+        parser = LxmlParser(logger)
+        assert parser.parse(f"{archive}!/w3c/xml.xsd") is True
+        assert parser.get_target_namespace() == "http://www.w3.org/XML/1998/namespace"
+        assert parser.doc_url() == f"{archive}!/w3c/xml.xsd"
+        assert parser.resolve_location("other.xsd") == f"{archive}!/w3c/other.xsd"
+        assert parser.parse(str(compressed)) is True
+        assert parser.get_target_namespace() == "http://www.w3.org/XML/1998/namespace"
+        assert parser.parse(f"{archive}!/missing.xsd") is False